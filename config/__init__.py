@@ -1,8 +1,19 @@
 """
 Configuración centralizada del proyecto SICIAP Cloud
+Cada clase se importa al primer uso (el .env se carga una sola vez, ver env.py).
 """
-from .settings import Settings
-from .database import DatabaseConfig
-from .supabase import SupabaseConfig
+from importlib import import_module
 
-__all__ = ['Settings', 'DatabaseConfig', 'SupabaseConfig']
+_EXPORTS = {
+    'Settings': 'settings',
+    'DatabaseConfig': 'database',
+    'SupabaseConfig': 'supabase',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(import_module(f'.{_EXPORTS[name]}', __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,11 +2,10 @@
 Configuración de base de datos PostgreSQL local
 """
 import os
-from dotenv import load_dotenv
-from pathlib import Path
 
-env_path = Path(__file__).parent.parent / '.env'
-load_dotenv(env_path)
+from config.env import load_env
+
+load_env()
 
 
 class DatabaseConfig:
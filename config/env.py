@@ -0,0 +1,14 @@
+"""
+Carga del .env del proyecto, una sola vez por proceso
+"""
+from functools import lru_cache
+from pathlib import Path
+
+ENV_PATH = Path(__file__).parent.parent / '.env'
+
+
+@lru_cache(maxsize=None)
+def load_env() -> bool:
+    """Carga ENV_PATH en os.environ (las llamadas siguientes no hacen nada)"""
+    from dotenv import load_dotenv
+    return load_dotenv(ENV_PATH)
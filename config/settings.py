@@ -3,11 +3,10 @@ Configuración general del sistema
 """
 import os
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Cargar variables de entorno
-env_path = Path(__file__).parent.parent / '.env'
-load_dotenv(env_path)
+from config.env import load_env
+
+load_env()
 
 
 class Settings:
@@ -20,22 +19,25 @@ class Settings:
     
     # Configuración ETL
     ETL_BATCH_SIZE = int(os.getenv('ETL_BATCH_SIZE', '1000'))
+    # Límites del ajuste adaptativo de lotes en la sincronización (AIMD)
+    ETL_BATCH_SIZE_MIN = int(os.getenv('ETL_BATCH_SIZE_MIN', '200'))
+    ETL_BATCH_SIZE_MAX = int(os.getenv('ETL_BATCH_SIZE_MAX', '10000'))
+    ETL_BATCH_TARGET_SECONDS = float(os.getenv('ETL_BATCH_TARGET_SECONDS', '2.0'))
     ETL_LOG_LEVEL = os.getenv('ETL_LOG_LEVEL', 'INFO')
     
     # Configuración Streamlit
     STREAMLIT_PORT = int(os.getenv('STREAMLIT_SERVER_PORT', '8501'))
     STREAMLIT_ADDRESS = os.getenv('STREAMLIT_SERVER_ADDRESS', 'localhost')
     
-    # Crear directorios si no existen
-    DATA_DIR.mkdir(exist_ok=True)
-    LOG_DIR.mkdir(exist_ok=True)
-    
+    # Los directorios se crean al pedirlos (no al importar la configuración)
     @classmethod
     def get_data_dir(cls):
         """Retorna el directorio de datos"""
+        cls.DATA_DIR.mkdir(exist_ok=True)
         return cls.DATA_DIR
     
     @classmethod
     def get_log_dir(cls):
         """Retorna el directorio de logs"""
+        cls.LOG_DIR.mkdir(exist_ok=True)
         return cls.LOG_DIR
@@ -3,11 +3,10 @@ Configuración de Supabase (nube)
 """
 import os
 from urllib.parse import urlparse
-from dotenv import load_dotenv
-from pathlib import Path
 
-env_path = Path(__file__).parent.parent / '.env'
-load_dotenv(env_path)
+from config.env import load_env
+
+load_env()
 
 
 def _resolve_db_host_and_user():
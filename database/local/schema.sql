@@ -240,6 +240,65 @@ CREATE TABLE IF NOT EXISTS siciap.vencimientos_parques (
 CREATE INDEX IF NOT EXISTS idx_vencimientos_codigo ON siciap.vencimientos_parques(codigo);
 CREATE INDEX IF NOT EXISTS idx_vencimientos_fecha ON siciap.vencimientos_parques(fec_vencimiento);
 
+-- =============================================================================
+-- CLAVES NORMALIZADAS (columnas generadas + índices)
+-- Descripción: Claves de unión ya recortadas (TRIM) para unir/deduplicar por
+-- columnas indexadas en vez de expresiones. Las calcula Postgres: el ETL no las
+-- envía y el sync no las sube (en Supabase se crean en migracion_definitiva.sql).
+-- ALTER ... ADD COLUMN IF NOT EXISTS: sirve también para bases ya creadas.
+-- =============================================================================
+ALTER TABLE siciap.ejecucion
+  ADD COLUMN IF NOT EXISTS licitacion_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(licitacion AS TEXT))) STORED,
+  ADD COLUMN IF NOT EXISTS proveedor_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(proveedor AS TEXT))) STORED,
+  ADD COLUMN IF NOT EXISTS codigo_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(codigo AS TEXT))) STORED,
+  ADD COLUMN IF NOT EXISTS item_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(item AS TEXT))) STORED;
+
+ALTER TABLE siciap.ordenes
+  ADD COLUMN IF NOT EXISTS llamado_norm TEXT GENERATED ALWAYS AS (COALESCE(TRIM(CAST(llamado AS TEXT)), '')) STORED,
+  ADD COLUMN IF NOT EXISTS proveedor_norm TEXT GENERATED ALWAYS AS (COALESCE(TRIM(CAST(proveedor AS TEXT)), '')) STORED,
+  ADD COLUMN IF NOT EXISTS codigo_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(codigo AS TEXT))) STORED;
+
+ALTER TABLE siciap.stock_critico
+  ADD COLUMN IF NOT EXISTS codigo_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(codigo AS TEXT))) STORED;
+
+ALTER TABLE siciap.vencimientos_parques
+  ADD COLUMN IF NOT EXISTS codigo_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(codigo AS TEXT))) STORED;
+
+ALTER TABLE siciap.cantidad_solicitada
+  ADD COLUMN IF NOT EXISTS licitacion_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(licitacion AS TEXT))) STORED,
+  ADD COLUMN IF NOT EXISTS codigo_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(codigo AS TEXT))) STORED,
+  ADD COLUMN IF NOT EXISTS item_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(item AS TEXT))) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_ejecucion_clave_norm
+    ON siciap.ejecucion(id_llamado, licitacion, codigo_norm, item_norm, id DESC);
+CREATE INDEX IF NOT EXISTS idx_ejecucion_codigo_norm ON siciap.ejecucion(codigo_norm);
+CREATE INDEX IF NOT EXISTS idx_ordenes_pendiente_norm
+    ON siciap.ordenes(id_llamado, llamado_norm, proveedor_norm, codigo_norm);
+CREATE INDEX IF NOT EXISTS idx_stock_critico_codigo_norm ON siciap.stock_critico(codigo_norm);
+CREATE INDEX IF NOT EXISTS idx_vencimientos_codigo_norm
+    ON siciap.vencimientos_parques(codigo_norm, fec_vencimiento);
+CREATE INDEX IF NOT EXISTS idx_cantidad_solicitada_clave_norm
+    ON siciap.cantidad_solicitada(id_llamado, licitacion_norm, codigo_norm, item_norm);
+
+-- =============================================================================
+-- TABLA: sync_estado
+-- Descripción: Tablas modificadas desde la última sincronización a Supabase.
+-- Los procesadores incrementan "generacion" al importar; el sync guarda la
+-- generación subida. Sucia = generacion > generacion_sincronizada.
+-- (El SyncManager también la crea si no existe.)
+-- =============================================================================
+CREATE TABLE IF NOT EXISTS siciap.sync_estado (
+    tabla VARCHAR(100) PRIMARY KEY,
+    generacion BIGINT NOT NULL DEFAULT 0,
+    generacion_sincronizada BIGINT NOT NULL DEFAULT 0,
+    modificado_en TIMESTAMPTZ DEFAULT now(),
+    sincronizado_en TIMESTAMPTZ,
+    -- Última sincronización exitosa (para estimar la duración de la próxima)
+    filas_sincronizadas BIGINT,
+    segundos_sincronizacion DOUBLE PRECISION,
+    filas_por_segundo DOUBLE PRECISION
+);
+
 -- =============================================================================
 -- COMENTARIOS EN TABLAS
 -- =============================================================================
@@ -251,3 +310,4 @@ COMMENT ON TABLE siciap.pedidos IS 'Pedidos pendientes';
 COMMENT ON TABLE siciap.cantidad_solicitada IS 'Cantidad solicitada y fecha "Ver en fecha" por ítem';
 COMMENT ON TABLE siciap.recordatorios IS 'Recordatorios y alertas';
 COMMENT ON TABLE siciap.vencimientos_parques IS 'Vencimientos de productos en parques';
+COMMENT ON TABLE siciap.sync_estado IS 'Generación por tabla para sincronizar solo las tablas modificadas';
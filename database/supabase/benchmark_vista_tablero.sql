@@ -0,0 +1,308 @@
+-- =============================================================================
+-- SICIAP CLOUD - BENCHMARK DE vista_tablero_principal
+-- Compara, sobre datos sintéticos, la vista anterior (joins por TRIM(CAST(...))
+-- y la fórmula de cobertura repetida 4 veces para nivel_stock) contra la
+-- actual (claves *_norm indexadas + métricas calculadas una vez vía LATERAL).
+--
+-- Uso (Supabase SQL Editor o psql), después de migracion_definitiva.sql:
+--   1. Ajustar bench.filas (filas de ejecucion): 50000 y luego 200000
+--   2. Ejecutar todo el script y comparar los "Execution Time" de cada EXPLAIN
+-- Trabaja en el esquema "bench" y lo elimina al final: no toca public.
+--
+-- Resultados de referencia: PostgreSQL 16.2 local, configuración por defecto
+-- (work_mem 4MB), schema.sql + migracion_definitiva.sql; mediana de 3 corridas,
+-- "Execution Time" en ms. Control: 0 diferencias de semáforo en ambos tamaños.
+--
+--   filas     consulta                    anterior   actual
+--   50000     vista completa (25k filas)       428      262
+--   50000     nivel_stock = 'Crítico'          363      222
+--   200000    vista completa (100k filas)     1905     1218
+--   200000    nivel_stock = 'Crítico'         1654      983
+--
+-- Planes (200000 filas): la anterior deduplica con Incremental Sort sobre
+-- TRIM(CAST(...)) y une por Merge Join con sorts externos a disco (~8 MB cada
+-- uno); el planificador estima 3.000 millones de filas para 100k reales. La
+-- actual deduplica con Unique sobre el índice (id_llamado, licitacion,
+-- codigo_norm, item_norm, id DESC), sin ordenar, y une todo por Hash Join
+-- sobre las claves *_norm; solo queda el sort final del ORDER BY.
+-- =============================================================================
+
+SET bench.filas = '50000';   -- repetir con '200000'
+
+DROP SCHEMA IF EXISTS bench CASCADE;
+CREATE SCHEMA bench;
+
+-- Mismas columnas, columnas generadas e índices que las tablas reales
+CREATE TABLE bench.ejecucion (LIKE public.ejecucion INCLUDING GENERATED INCLUDING INDEXES);
+CREATE TABLE bench.datosejecucion (LIKE public.datosejecucion INCLUDING INDEXES);
+CREATE TABLE bench.ordenes (LIKE public.ordenes INCLUDING GENERATED INCLUDING INDEXES);
+CREATE TABLE bench.stock_critico (LIKE public.stock_critico INCLUDING GENERATED INCLUDING INDEXES);
+CREATE TABLE bench.vencimientos_parques (LIKE public.vencimientos_parques INCLUDING GENERATED INCLUDING INDEXES);
+CREATE TABLE bench.cantidad_solicitada (LIKE public.cantidad_solicitada INCLUDING GENERATED INCLUDING INDEXES);
+
+-- =============================================================================
+-- DATOS SINTÉTICOS
+-- N filas de ejecución, N/50 llamados, N/4 códigos; ~10% de códigos con
+-- espacios al final. La clave (id_llamado, codigo, item) se repite cada N/2
+-- filas: la MITAD de las filas son duplicadas (en los Excel reales son muchas
+-- menos), así DISTINCT ON trabaja de más y la vista devuelve N/2 filas.
+-- =============================================================================
+INSERT INTO bench.ejecucion (id, id_llamado, licitacion, proveedor, codigo, medicamento, item,
+                             cantidad_maxima, cantidad_emitida, porcentaje_emitido, precio_unitario)
+SELECT
+    g,
+    1000 + g % (n / 50),
+    'LIC-' || (g % (n / 50)),
+    'PROVEEDOR ' || (g % 300),
+    lpad(((g * 7) % (n / 4))::TEXT, 6, '0') || CASE WHEN g % 10 = 0 THEN ' ' ELSE '' END,
+    'MEDICAMENTO ' || (g % (n / 4)),
+    -- ~5% de filas con el ítem de la fila anterior (la fila anterior tiene otro
+    -- código, así que no agrega duplicados)
+    CASE WHEN g % 20 = 0 THEN ((g - 1) % 50)::TEXT ELSE (g % 50)::TEXT END,
+    (random() * 10000)::NUMERIC(18,2),
+    (random() * 5000)::NUMERIC(18,2),
+    (random() * 100)::NUMERIC(18,2),
+    (random() * 500)::NUMERIC(18,4)
+FROM (SELECT current_setting('bench.filas')::INT AS n) p,
+     generate_series(1, current_setting('bench.filas')::INT) g;
+
+INSERT INTO bench.datosejecucion (id_llamado, descripcion_llamado, dirigido_a, lugares, precio_unitario)
+SELECT 1000 + l, 'Llamado sintético ' || l, 'Hospitales', 'Parque central', (random() * 500)::NUMERIC(18,4)
+FROM generate_series(0, current_setting('bench.filas')::INT / 50 - 1) l;
+
+INSERT INTO bench.stock_critico (id, codigo, stock_actual, stock_disponible, dmp)
+SELECT c + 1, lpad(c::TEXT, 6, '0'),
+       (random() * 20000)::NUMERIC(18,2),
+       CASE WHEN c % 7 = 0 THEN 0 ELSE (random() * 20000)::NUMERIC(18,2) END,
+       CASE WHEN c % 11 = 0 THEN 0 ELSE (random() * 3000)::NUMERIC(18,2) END
+FROM generate_series(0, current_setting('bench.filas')::INT / 4 - 1) c;
+
+INSERT INTO bench.vencimientos_parques (id, codigo, fec_vencimiento, stock_disponible, parque)
+SELECT v, lpad((v % (current_setting('bench.filas')::INT / 4))::TEXT, 6, '0'),
+       CURRENT_DATE + ((v % 720) - 120),
+       (random() * 5000)::NUMERIC(18,2),
+       'PARQUE ' || (v % 5)
+FROM generate_series(1, current_setting('bench.filas')::INT / 2) v;
+
+INSERT INTO bench.ordenes (id, id_llamado, llamado, proveedor, codigo, item, estado, saldo)
+SELECT o, e.id_llamado, e.licitacion, e.proveedor, e.codigo, e.item,
+       CASE WHEN o % 3 = 0 THEN 'Entregado' ELSE 'Pendiente' END,
+       (random() * 1000)::NUMERIC(18,6)
+FROM generate_series(1, current_setting('bench.filas')::INT / 2) o
+JOIN bench.ejecucion e ON e.id = o * 2;
+
+INSERT INTO bench.cantidad_solicitada (id_llamado, licitacion, codigo, item, cantidad_solicitada)
+SELECT DISTINCT ON (e.id_llamado, e.licitacion, e.codigo, e.item)
+       e.id_llamado, e.licitacion, e.codigo, e.item, (random() * 1000)::NUMERIC(18,2)
+FROM bench.ejecucion e
+WHERE e.id % 10 = 1 AND e.item IS NOT NULL;
+
+ANALYZE bench.ejecucion, bench.datosejecucion, bench.ordenes,
+        bench.stock_critico, bench.vencimientos_parques, bench.cantidad_solicitada;
+
+-- =============================================================================
+-- VISTA ANTERIOR: joins por expresiones TRIM(CAST(...)) y fórmula repetida
+-- =============================================================================
+CREATE VIEW bench.vista_anterior AS
+WITH
+stock_por_codigo AS (
+    SELECT TRIM(CAST(codigo AS TEXT)) AS codigo,
+           COALESCE(stock_disponible, 0) AS stock_disponible,
+           COALESCE(stock_actual, 0) AS stock_actual,
+           COALESCE(dmp, 0) AS dmp
+    FROM bench.stock_critico
+    WHERE codigo IS NOT NULL AND TRIM(CAST(codigo AS TEXT)) != ''
+),
+venc_por_codigo AS (
+    SELECT TRIM(CAST(codigo AS TEXT)) AS codigo,
+           SUM(COALESCE(stock_disponible, 0)) AS stock_sin_vencidos
+    FROM bench.vencimientos_parques
+    WHERE codigo IS NOT NULL
+      AND (fec_vencimiento >= CURRENT_DATE OR fec_vencimiento IS NULL OR EXTRACT(YEAR FROM fec_vencimiento) = 5000)
+    GROUP BY TRIM(CAST(codigo AS TEXT))
+),
+pendiente_entrega AS (
+    SELECT id_llamado,
+           COALESCE(TRIM(CAST(llamado AS TEXT)), '') AS licitacion,
+           COALESCE(TRIM(CAST(proveedor AS TEXT)), '') AS proveedor,
+           TRIM(CAST(codigo AS TEXT)) AS codigo,
+           SUM(COALESCE(saldo, 0)) AS pendiente_entrega
+    FROM bench.ordenes
+    WHERE codigo IS NOT NULL AND TRIM(CAST(codigo AS TEXT)) != ''
+      AND (estado IS NULL OR LOWER(TRIM(CAST(estado AS TEXT))) NOT IN (
+          'entregado', 'finalizado', 'completado', 'completada',
+          'entrega parcial', 'entrega total'
+      ))
+    GROUP BY id_llamado, llamado, proveedor, codigo
+),
+ejecucion_dedup AS (
+    SELECT DISTINCT ON (e.id_llamado, e.licitacion, TRIM(CAST(e.codigo AS TEXT)), TRIM(CAST(e.item AS TEXT)))
+        e.*
+    FROM bench.ejecucion e
+    WHERE e.codigo IS NOT NULL AND TRIM(CAST(e.codigo AS TEXT)) != ''
+    ORDER BY e.id_llamado, e.licitacion, TRIM(CAST(e.codigo AS TEXT)), TRIM(CAST(e.item AS TEXT)), e.id DESC
+)
+SELECT
+    e.id_llamado,
+    e.licitacion,
+    TRIM(CAST(e.codigo AS TEXT)) AS codigo,
+    e.item,
+    (COALESCE(e.cantidad_maxima, 0) - COALESCE(e.cantidad_emitida, 0)) AS saldo_contrato,
+    COALESCE(pe.pendiente_entrega, 0) AS pendiente_entrega,
+    COALESCE(NULLIF(v.stock_sin_vencidos, 0), s.stock_disponible, s.stock_actual, 0) AS stock_actual,
+    COALESCE(s.dmp, 0) AS dmp_actual,
+    COALESCE(cs.cantidad_solicitada, 0) AS cantidad_solicitada,
+    CASE
+        WHEN COALESCE(s.dmp, 0) > 0 THEN
+            ROUND((COALESCE(NULLIF(v.stock_sin_vencidos, 0), s.stock_disponible, s.stock_actual, 0)
+                   + (COALESCE(e.cantidad_maxima, 0) - COALESCE(e.cantidad_emitida, 0))
+                   + COALESCE(cs.cantidad_solicitada, 0)) / s.dmp, 1)
+        ELSE NULL
+    END AS cobertura_meses,
+    CASE
+        WHEN COALESCE(s.dmp, 0) = 0 THEN 'Sin DMP'
+        WHEN COALESCE(NULLIF(v.stock_sin_vencidos, 0), s.stock_disponible, s.stock_actual, 0) = 0 THEN 'Sin Stock'
+        WHEN (CASE WHEN COALESCE(s.dmp, 0) > 0 THEN
+                  ROUND((COALESCE(NULLIF(v.stock_sin_vencidos, 0), s.stock_disponible, s.stock_actual, 0)
+                         + (COALESCE(e.cantidad_maxima, 0) - COALESCE(e.cantidad_emitida, 0))
+                         + COALESCE(cs.cantidad_solicitada, 0)) / s.dmp, 1)
+              ELSE NULL END) < 1 THEN 'Crítico'
+        WHEN (CASE WHEN COALESCE(s.dmp, 0) > 0 THEN
+                  ROUND((COALESCE(NULLIF(v.stock_sin_vencidos, 0), s.stock_disponible, s.stock_actual, 0)
+                         + (COALESCE(e.cantidad_maxima, 0) - COALESCE(e.cantidad_emitida, 0))
+                         + COALESCE(cs.cantidad_solicitada, 0)) / s.dmp, 1)
+              ELSE NULL END) BETWEEN 1 AND 3 THEN 'Atención'
+        ELSE 'Óptimo'
+    END AS nivel_stock
+FROM ejecucion_dedup e
+LEFT JOIN bench.datosejecucion d ON e.id_llamado = d.id_llamado
+LEFT JOIN pendiente_entrega pe
+    ON e.id_llamado = pe.id_llamado
+    AND TRIM(CAST(e.licitacion AS TEXT)) = pe.licitacion
+    AND TRIM(CAST(e.proveedor AS TEXT)) = pe.proveedor
+    AND TRIM(CAST(e.codigo AS TEXT)) = pe.codigo
+LEFT JOIN stock_por_codigo s ON TRIM(CAST(e.codigo AS TEXT)) = s.codigo
+LEFT JOIN venc_por_codigo v ON TRIM(CAST(e.codigo AS TEXT)) = v.codigo
+LEFT JOIN bench.cantidad_solicitada cs
+    ON e.id_llamado = cs.id_llamado
+    AND TRIM(CAST(e.licitacion AS TEXT)) = TRIM(CAST(cs.licitacion AS TEXT))
+    AND TRIM(CAST(e.codigo AS TEXT)) = TRIM(CAST(cs.codigo AS TEXT))
+    AND TRIM(CAST(e.item AS TEXT)) = TRIM(CAST(cs.item AS TEXT))
+WHERE e.codigo IS NOT NULL AND TRIM(CAST(e.codigo AS TEXT)) != ''
+ORDER BY e.id_llamado, e.licitacion, e.codigo, e.item;
+
+-- =============================================================================
+-- VISTA ACTUAL: claves *_norm + métricas una vez por fila (LATERAL)
+-- (mismas columnas de métricas que vista_anterior, para comparar igual contra igual)
+-- =============================================================================
+CREATE VIEW bench.vista_actual AS
+WITH
+stock_por_codigo AS (
+    SELECT codigo_norm AS codigo,
+           COALESCE(stock_disponible, 0) AS stock_disponible,
+           COALESCE(stock_actual, 0) AS stock_actual,
+           COALESCE(dmp, 0) AS dmp
+    FROM bench.stock_critico
+    WHERE codigo_norm != ''
+),
+venc_por_codigo AS (
+    SELECT codigo_norm AS codigo,
+           SUM(COALESCE(stock_disponible, 0)) AS stock_sin_vencidos
+    FROM bench.vencimientos_parques
+    WHERE codigo_norm IS NOT NULL
+      AND (fec_vencimiento >= CURRENT_DATE OR fec_vencimiento IS NULL OR EXTRACT(YEAR FROM fec_vencimiento) = 5000)
+    GROUP BY codigo_norm
+),
+pendiente_entrega AS (
+    SELECT id_llamado, llamado_norm AS licitacion, proveedor_norm AS proveedor, codigo_norm AS codigo,
+           SUM(COALESCE(saldo, 0)) AS pendiente_entrega
+    FROM bench.ordenes
+    WHERE codigo_norm != ''
+      AND (estado IS NULL OR LOWER(TRIM(CAST(estado AS TEXT))) NOT IN (
+          'entregado', 'finalizado', 'completado', 'completada',
+          'entrega parcial', 'entrega total'
+      ))
+    GROUP BY id_llamado, llamado_norm, proveedor_norm, codigo_norm
+),
+ejecucion_dedup AS (
+    SELECT DISTINCT ON (e.id_llamado, e.licitacion, e.codigo_norm, e.item_norm)
+        e.*
+    FROM bench.ejecucion e
+    WHERE e.codigo_norm != ''
+    ORDER BY e.id_llamado, e.licitacion, e.codigo_norm, e.item_norm, e.id DESC
+)
+SELECT
+    e.id_llamado,
+    e.licitacion,
+    e.codigo_norm AS codigo,
+    e.item,
+    m.saldo_contrato,
+    COALESCE(pe.pendiente_entrega, 0) AS pendiente_entrega,
+    m.stock_efectivo AS stock_actual,
+    m.dmp AS dmp_actual,
+    m.cantidad_solicitada,
+    c.cobertura_meses,
+    CASE
+        WHEN m.dmp = 0 THEN 'Sin DMP'
+        WHEN m.stock_efectivo = 0 THEN 'Sin Stock'
+        WHEN c.cobertura_meses < 1 THEN 'Crítico'
+        WHEN c.cobertura_meses BETWEEN 1 AND 3 THEN 'Atención'
+        ELSE 'Óptimo'
+    END AS nivel_stock
+FROM ejecucion_dedup e
+LEFT JOIN bench.datosejecucion d ON e.id_llamado = d.id_llamado
+LEFT JOIN pendiente_entrega pe
+    ON e.id_llamado = pe.id_llamado
+    AND e.licitacion_norm = pe.licitacion
+    AND e.proveedor_norm = pe.proveedor
+    AND e.codigo_norm = pe.codigo
+LEFT JOIN stock_por_codigo s ON e.codigo_norm = s.codigo
+LEFT JOIN venc_por_codigo v ON e.codigo_norm = v.codigo
+LEFT JOIN bench.cantidad_solicitada cs
+    ON e.id_llamado = cs.id_llamado
+    AND e.licitacion_norm = cs.licitacion_norm
+    AND e.codigo_norm = cs.codigo_norm
+    AND e.item_norm = cs.item_norm
+CROSS JOIN LATERAL (
+    SELECT
+        COALESCE(NULLIF(v.stock_sin_vencidos, 0), s.stock_disponible, s.stock_actual, 0) AS stock_efectivo,
+        COALESCE(e.cantidad_maxima, 0) - COALESCE(e.cantidad_emitida, 0) AS saldo_contrato,
+        COALESCE(cs.cantidad_solicitada, 0) AS cantidad_solicitada,
+        COALESCE(s.dmp, 0) AS dmp
+) m
+CROSS JOIN LATERAL (
+    SELECT CASE WHEN m.dmp > 0
+                THEN ROUND((m.stock_efectivo + m.saldo_contrato + m.cantidad_solicitada) / m.dmp, 1)
+           END AS cobertura_meses
+) c
+ORDER BY e.id_llamado, e.licitacion, e.codigo_norm, e.item;
+
+-- =============================================================================
+-- CONTROL: ambas vistas deben dar el mismo semáforo (esperado: 0 diferencias;
+-- la vista actual puede tener MENOS filas si había variantes con espacios en
+-- ordenes que antes duplicaban filas)
+-- =============================================================================
+SELECT
+    (SELECT COUNT(*) FROM bench.vista_anterior) AS filas_anterior,
+    (SELECT COUNT(*) FROM bench.vista_actual) AS filas_actual,
+    (SELECT COUNT(*) FROM (
+        SELECT id_llamado, licitacion, codigo, item, nivel_stock, cobertura_meses FROM bench.vista_anterior
+        EXCEPT
+        SELECT id_llamado, licitacion, codigo, item, nivel_stock, cobertura_meses FROM bench.vista_actual
+    ) x) AS diferencias;
+
+-- =============================================================================
+-- EXPLAIN ANALYZE (comparar "Execution Time"; correr dos veces para cache caliente)
+-- =============================================================================
+EXPLAIN (ANALYZE, BUFFERS, SUMMARY) SELECT * FROM bench.vista_anterior;
+EXPLAIN (ANALYZE, BUFFERS, SUMMARY) SELECT * FROM bench.vista_actual;
+
+-- Consulta típica del dashboard: un semáforo filtrado
+EXPLAIN (ANALYZE, BUFFERS, SUMMARY) SELECT * FROM bench.vista_anterior WHERE nivel_stock = 'Crítico';
+EXPLAIN (ANALYZE, BUFFERS, SUMMARY) SELECT * FROM bench.vista_actual WHERE nivel_stock = 'Crítico';
+
+-- =============================================================================
+-- LIMPIEZA
+-- =============================================================================
+DROP SCHEMA bench CASCADE;
+RESET bench.filas;
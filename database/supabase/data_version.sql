@@ -0,0 +1,80 @@
+-- =============================================================================
+-- SICIAP CLOUD - VERSIONES DE DATOS (invalidación de caché del frontend)
+-- Ejecutar en Supabase SQL Editor (una vez; no depende de otras migraciones)
+-- =============================================================================
+-- Cada conjunto de datos (una tabla sincronizada o 'tablero') tiene un contador
+-- que sube cada vez que cambia: el SyncManager lo sube al publicar tablas y el
+-- dashboard al guardar ediciones. Las páginas consultan esta tabla (pocas filas)
+-- y usan la versión como clave de caché: si no cambió, no vuelven a descargar
+-- nada; si cambió, los datos nuevos se ven en la próxima carga.
+-- 'sincronizacion' sube solo con el sync: distingue una publicación de tablas
+-- (recarga completa del tablero) de una edición puntual (refresco por delta).
+
+CREATE TABLE IF NOT EXISTS public.data_version (
+    dataset TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 1,
+    actualizado_en TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+COMMENT ON TABLE public.data_version IS 'Versión por conjunto de datos; sube con cada sincronización o edición (clave de caché del frontend)';
+
+INSERT INTO public.data_version (dataset)
+VALUES ('tablero'), ('ordenes'), ('ejecucion'), ('datosejecucion'), ('stock_critico'),
+       ('pedidos'), ('cantidad_solicitada'), ('vencimientos_parques'), ('sincronizacion')
+ON CONFLICT (dataset) DO NOTHING;
+
+-- SECURITY DEFINER: la API (anon/authenticated) solo puede leer la tabla;
+-- subir versiones pasa siempre por esta función.
+-- El dashboard la llama con la clave pública, así que desde la API (petición con
+-- JWT) solo sube los conjuntos que edita el dashboard y cada uno como mucho una
+-- vez cada 5 segundos: si omite alguno devuelve FALSE y el frontend reintenta
+-- pasado el intervalo. El sync (conexión directa, sin JWT) no tiene límites.
+-- Antes devolvía void: CREATE OR REPLACE no puede cambiar el tipo de retorno
+DROP FUNCTION IF EXISTS public.bump_data_version(TEXT[]);
+CREATE OR REPLACE FUNCTION public.bump_data_version(p_datasets TEXT[])
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_api BOOLEAN := COALESCE(current_setting('request.jwt.claims', true), '') <> '';
+    v_datasets TEXT[];
+    v_subidos INTEGER;
+BEGIN
+    SELECT array_agg(DISTINCT d) INTO v_datasets
+    FROM unnest(p_datasets) AS d
+    WHERE NOT v_api OR d IN ('tablero', 'cantidad_solicitada', 'datosejecucion');
+    IF v_datasets IS NULL THEN
+        RETURN TRUE;
+    END IF;
+
+    WITH subidos AS (
+        INSERT INTO public.data_version AS v (dataset, version, actualizado_en)
+        SELECT d, 1, now() FROM unnest(v_datasets) AS d
+        ON CONFLICT (dataset) DO UPDATE
+           SET version = v.version + 1,
+               actualizado_en = now()
+           WHERE NOT v_api OR v.actualizado_en <= now() - INTERVAL '5 seconds'
+        RETURNING 1
+    )
+    SELECT COUNT(*) INTO v_subidos FROM subidos;
+    RETURN v_subidos = cardinality(v_datasets);
+END;
+$$;
+
+COMMENT ON FUNCTION public.bump_data_version(TEXT[]) IS 'Sube la versión de los conjuntos de datos dados (SyncManager y dashboard editable); FALSE si la API pidió alguno dentro del intervalo mínimo';
+
+-- =============================================================================
+-- EXPONER A LA API REST
+-- =============================================================================
+GRANT SELECT ON public.data_version TO anon, authenticated, service_role;
+
+-- anon: la app desplegada usa la clave pública (ver los límites de la función)
+REVOKE ALL ON FUNCTION public.bump_data_version(TEXT[]) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.bump_data_version(TEXT[]) TO anon, authenticated, service_role;
+
+NOTIFY pgrst, 'reload schema';
+
+-- Verificación
+SELECT dataset, version, actualizado_en FROM public.data_version ORDER BY dataset;
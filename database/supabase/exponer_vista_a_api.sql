@@ -14,6 +14,10 @@ GRANT SELECT ON public.vista_tablero_principal TO anon;
 GRANT SELECT ON public.vista_tablero_principal TO authenticated;
 GRANT SELECT ON public.vista_tablero_principal TO service_role;
 
+-- 1b. Vista materializada (si se creó con vista_tablero_materializada.sql, que ya incluye sus GRANT)
+-- GRANT SELECT ON public.vista_tablero_materializada TO anon, authenticated, service_role;
+-- GRANT EXECUTE ON FUNCTION public.refrescar_vista_tablero() TO anon, authenticated, service_role;
+
 -- 2. Opcional: permitir que la tabla cantidad_solicitada acepte UPSERT desde la API
 -- (necesario para que el botón "Guardar cambios" del dashboard funcione)
 GRANT SELECT, INSERT, UPDATE ON public.cantidad_solicitada TO anon;
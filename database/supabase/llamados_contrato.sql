@@ -0,0 +1,56 @@
+-- =============================================================================
+-- SICIAP CLOUD - LLAMADOS PARA "DATOS DEL CONTRATO" (dashboard editable)
+-- Ejecutar en Supabase SQL Editor después de migracion_definitiva.sql
+-- =============================================================================
+-- La pestaña "Datos del Contrato" solo necesita la lista de llamados distintos
+-- (id_llamado, licitación) y lo ya cargado en datosejecucion. Antes descargaba
+-- todas las filas de ejecución para deduplicarlas en el navegador; esta función
+-- devuelve una fila por llamado (unos cientos), ya unida con datosejecucion y
+-- ordenada como la muestra el selector.
+
+CREATE OR REPLACE FUNCTION public.llamados_contrato()
+RETURNS TABLE (
+    id_llamado BIGINT,
+    licitacion TEXT,
+    items BIGINT,
+    tiene_datos BOOLEAN,
+    vigente TEXT,
+    dirigido_a TEXT,
+    lugares TEXT,
+    observaciones_generales TEXT
+)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    -- El GROUP BY recorre idx_ejecucion_clave_norm (id_llamado, licitacion, ...)
+    SELECT e.id_llamado::BIGINT,
+           e.licitacion::TEXT,
+           e.items,
+           d.id_llamado IS NOT NULL,
+           d.vigente::TEXT,
+           d.dirigido_a,
+           d.lugares,
+           d.observaciones_generales
+    FROM (
+        SELECT x.id_llamado, x.licitacion, COUNT(*) AS items
+        FROM public.ejecucion x
+        WHERE x.id_llamado IS NOT NULL
+        GROUP BY x.id_llamado, x.licitacion
+    ) e
+    LEFT JOIN public.datosejecucion d ON d.id_llamado = e.id_llamado
+    ORDER BY e.id_llamado DESC, e.licitacion;
+$$;
+
+COMMENT ON FUNCTION public.llamados_contrato() IS 'Llamados distintos de ejecución con sus datos de contrato (selector de Datos del Contrato)';
+
+-- =============================================================================
+-- EXPONER A LA API REST
+-- =============================================================================
+GRANT EXECUTE ON FUNCTION public.llamados_contrato() TO anon, authenticated, service_role;
+
+NOTIFY pgrst, 'reload schema';
+
+-- Verificación
+SELECT COUNT(*) AS llamados, COUNT(*) FILTER (WHERE tiene_datos) AS con_datos
+FROM public.llamados_contrato();
@@ -156,12 +156,59 @@ CREATE INDEX IF NOT EXISTS idx_datosejecucion_id_llamado ON public.datosejecucio
 
 COMMENT ON TABLE public.datosejecucion IS 'Datos adicionales de ejecución por llamado (vigente, dirigido a, lugares, etc.)';
 
+-- =============================================================================
+-- PARTE 2.3: CLAVES NORMALIZADAS (columnas generadas + índices)
+-- =============================================================================
+-- La vista une por TRIM(codigo), TRIM(item), etc. Comparar expresiones impide
+-- usar los índices idx_*_codigo y obliga a hash joins/ordenamientos sobre las
+-- tablas completas. Las columnas *_norm guardan la clave ya normalizada
+-- (GENERATED ... STORED: el ETL y la API no las envían, Postgres las calcula)
+-- y la vista une por ellas. Requiere los tipos corregidos en la PARTE 1: con
+-- las columnas generadas creadas, Postgres no permite cambiar el tipo de
+-- codigo/item (habría que borrar antes la columna *_norm correspondiente).
+
+ALTER TABLE public.ejecucion
+  ADD COLUMN IF NOT EXISTS licitacion_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(licitacion AS TEXT))) STORED,
+  ADD COLUMN IF NOT EXISTS proveedor_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(proveedor AS TEXT))) STORED,
+  ADD COLUMN IF NOT EXISTS codigo_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(codigo AS TEXT))) STORED,
+  ADD COLUMN IF NOT EXISTS item_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(item AS TEXT))) STORED;
+
+ALTER TABLE public.ordenes
+  ADD COLUMN IF NOT EXISTS llamado_norm TEXT GENERATED ALWAYS AS (COALESCE(TRIM(CAST(llamado AS TEXT)), '')) STORED,
+  ADD COLUMN IF NOT EXISTS proveedor_norm TEXT GENERATED ALWAYS AS (COALESCE(TRIM(CAST(proveedor AS TEXT)), '')) STORED,
+  ADD COLUMN IF NOT EXISTS codigo_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(codigo AS TEXT))) STORED;
+
+ALTER TABLE public.stock_critico
+  ADD COLUMN IF NOT EXISTS codigo_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(codigo AS TEXT))) STORED;
+
+ALTER TABLE public.vencimientos_parques
+  ADD COLUMN IF NOT EXISTS codigo_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(codigo AS TEXT))) STORED;
+
+ALTER TABLE public.cantidad_solicitada
+  ADD COLUMN IF NOT EXISTS licitacion_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(licitacion AS TEXT))) STORED,
+  ADD COLUMN IF NOT EXISTS codigo_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(codigo AS TEXT))) STORED,
+  ADD COLUMN IF NOT EXISTS item_norm TEXT GENERATED ALWAYS AS (TRIM(CAST(item AS TEXT))) STORED;
+
+-- Clave natural de ejecución en el orden del DISTINCT ON (id DESC = más reciente primero)
+CREATE INDEX IF NOT EXISTS idx_ejecucion_clave_norm
+    ON public.ejecucion(id_llamado, licitacion, codigo_norm, item_norm, id DESC);
+CREATE INDEX IF NOT EXISTS idx_ejecucion_codigo_norm ON public.ejecucion(codigo_norm);
+CREATE INDEX IF NOT EXISTS idx_ordenes_pendiente_norm
+    ON public.ordenes(id_llamado, llamado_norm, proveedor_norm, codigo_norm);
+CREATE INDEX IF NOT EXISTS idx_stock_critico_codigo_norm ON public.stock_critico(codigo_norm);
+CREATE INDEX IF NOT EXISTS idx_vencimientos_codigo_norm
+    ON public.vencimientos_parques(codigo_norm, fec_vencimiento);
+CREATE INDEX IF NOT EXISTS idx_cantidad_solicitada_clave_norm
+    ON public.cantidad_solicitada(id_llamado, licitacion_norm, codigo_norm, item_norm);
+
 -- =============================================================================
 -- PARTE 3: VISTA MAESTRA vista_tablero_principal (El Cerebro)
 -- Replica EXACTAMENTE la lógica de siciap_app.py
 -- =============================================================================
 -- DROP primero evita el error "cannot change name of view column" al cambiar
 -- orden o nombres de columnas respecto a la vista anterior.
+-- CASCADE elimina también vista_tablero_materializada: después de este script
+-- volver a ejecutar vista_tablero_materializada.sql.
 DROP VIEW IF EXISTS public.vista_tablero_principal CASCADE;
 
 CREATE VIEW public.vista_tablero_principal AS
@@ -169,64 +216,65 @@ WITH
 -- Stock por código desde stock_critico
 stock_por_codigo AS (
     SELECT
-        TRIM(CAST(codigo AS TEXT)) AS codigo,
+        codigo_norm AS codigo,
         COALESCE(stock_disponible, 0) AS stock_disponible,
         COALESCE(stock_actual, 0) AS stock_actual,
         COALESCE(dmp, 0) AS dmp
     FROM public.stock_critico
-    WHERE codigo IS NOT NULL AND TRIM(CAST(codigo AS TEXT)) != ''
+    WHERE codigo_norm != ''
 ),
 -- Stock sin vencidos desde vencimientos_parques (si existe)
 venc_por_codigo AS (
     SELECT
-        TRIM(CAST(codigo AS TEXT)) AS codigo,
+        codigo_norm AS codigo,
         SUM(COALESCE(stock_disponible, 0)) AS stock_sin_vencidos
     FROM public.vencimientos_parques
-    WHERE codigo IS NOT NULL
+    WHERE codigo_norm IS NOT NULL
       AND (fec_vencimiento >= CURRENT_DATE OR fec_vencimiento IS NULL OR EXTRACT(YEAR FROM fec_vencimiento) = 5000)
-    GROUP BY TRIM(CAST(codigo AS TEXT))
+    GROUP BY codigo_norm
 ),
 -- Pendiente de entrega desde órdenes (excl. entregado/finalizado)
 pendiente_entrega AS (
     SELECT
         id_llamado,
-        COALESCE(TRIM(CAST(llamado AS TEXT)), '') AS licitacion,
-        COALESCE(TRIM(CAST(proveedor AS TEXT)), '') AS proveedor,
-        TRIM(CAST(codigo AS TEXT)) AS codigo,
+        llamado_norm AS licitacion,
+        proveedor_norm AS proveedor,
+        codigo_norm AS codigo,
         SUM(COALESCE(saldo, 0)) AS pendiente_entrega
     FROM public.ordenes
-    WHERE codigo IS NOT NULL AND TRIM(CAST(codigo AS TEXT)) != ''
+    WHERE codigo_norm != ''
       AND (estado IS NULL OR LOWER(TRIM(CAST(estado AS TEXT))) NOT IN (
           'entregado', 'finalizado', 'completado', 'completada',
           'entrega parcial', 'entrega total'
       ))
-    GROUP BY id_llamado, llamado, proveedor, codigo
+    -- Agrupar por las claves normalizadas: variantes con espacios no duplican filas
+    GROUP BY id_llamado, llamado_norm, proveedor_norm, codigo_norm
 ),
 -- Ejecución deduplicada: mantener solo un registro por (id_llamado, licitacion, codigo, item)
 -- Prioriza el registro más reciente (ID más alto)
 ejecucion_dedup AS (
-    SELECT DISTINCT ON (e.id_llamado, e.licitacion, TRIM(CAST(e.codigo AS TEXT)), TRIM(CAST(e.item AS TEXT)))
+    -- Recorre idx_ejecucion_clave_norm en orden (sin ordenar la tabla completa)
+    SELECT DISTINCT ON (e.id_llamado, e.licitacion, e.codigo_norm, e.item_norm)
         e.*
     FROM public.ejecucion e
-    WHERE e.codigo IS NOT NULL AND TRIM(CAST(e.codigo AS TEXT)) != ''
+    WHERE e.codigo_norm != ''
     ORDER BY 
         e.id_llamado, 
         e.licitacion, 
-        TRIM(CAST(e.codigo AS TEXT)), 
-        TRIM(CAST(e.item AS TEXT)),
+        e.codigo_norm, 
+        e.item_norm,
         e.id DESC  -- Prioriza el registro más reciente
 )
 SELECT
     e.id_llamado,
     e.licitacion,
     COALESCE(NULLIF(TRIM(d.descripcion_llamado), ''), e.licitacion) AS nombre_llamado,
-    TRIM(CAST(e.codigo AS TEXT)) AS codigo,
+    e.codigo_norm AS codigo,
     e.medicamento AS producto,
     e.proveedor,
     COALESCE(e.cantidad_maxima, 0) AS cantidad_maxima,
     COALESCE(e.cantidad_emitida, 0) AS cantidad_emitida,
-    -- Saldo contrato: cantidad_maxima - cantidad_emitida
-    (COALESCE(e.cantidad_maxima, 0) - COALESCE(e.cantidad_emitida, 0)) AS saldo_contrato,
+    m.saldo_contrato,
     COALESCE(e.porcentaje_emitido, 0) AS porcentaje_emitido,
     COALESCE(e.precio_unitario, d.precio_unitario) AS precio_unitario,
     e.item,
@@ -234,101 +282,58 @@ SELECT
     COALESCE(d.lugares, '') AS lugar,
     COALESCE(d.vigente::TEXT, '') AS vigente,
     COALESCE(pe.pendiente_entrega, 0) AS pendiente_entrega,
-    -- Stock actual: prioriza stock sin vencidos, luego stock disponible, luego stock_actual
-    COALESCE(
-        NULLIF(v.stock_sin_vencidos, 0),
-        s.stock_disponible,
-        s.stock_actual,
-        0
-    ) AS stock_actual,
-    COALESCE(s.dmp, 0) AS dmp_actual,
+    m.stock_efectivo AS stock_actual,
+    m.dmp AS dmp_actual,
     -- Cantidad solicitada y fecha
-    COALESCE(cs.cantidad_solicitada, 0) AS cantidad_solicitada,
+    m.cantidad_solicitada,
     cs.emitir_en AS ver_en_fecha,
     cs.comentario AS comentario,
-    -- COBERTURA EN MESES: (Stock actual + Saldo contrato + Cantidad solicitada) / DMP
-    -- Replica EXACTAMENTE la lógica de siciap_app.py: (s + p + c) / d
-    CASE
-        WHEN COALESCE(s.dmp, 0) > 0 THEN
-            ROUND(
-                (
-                    COALESCE(
-                        NULLIF(v.stock_sin_vencidos, 0),
-                        s.stock_disponible,
-                        s.stock_actual,
-                        0
-                    ) + 
-                    (COALESCE(e.cantidad_maxima, 0) - COALESCE(e.cantidad_emitida, 0)) + 
-                    COALESCE(cs.cantidad_solicitada, 0)
-                ) / s.dmp,
-                1
-            )
-        ELSE NULL
-    END AS cobertura_meses,
+    c.cobertura_meses,
     -- NIVEL STOCK (Semáforo): basado en cobertura_meses
     CASE
-        WHEN COALESCE(s.dmp, 0) = 0 THEN 'Sin DMP'
-        WHEN COALESCE(
-            NULLIF(v.stock_sin_vencidos, 0),
-            s.stock_disponible,
-            s.stock_actual,
-            0
-        ) = 0 THEN 'Sin Stock'
-        WHEN (
-            CASE
-                WHEN COALESCE(s.dmp, 0) > 0 THEN
-                    ROUND(
-                        (
-                            COALESCE(
-                                NULLIF(v.stock_sin_vencidos, 0),
-                                s.stock_disponible,
-                                s.stock_actual,
-                                0
-                            ) + 
-                            (COALESCE(e.cantidad_maxima, 0) - COALESCE(e.cantidad_emitida, 0)) + 
-                            COALESCE(cs.cantidad_solicitada, 0)
-                        ) / s.dmp,
-                        1
-                    )
-                ELSE NULL
-            END
-        ) < 1 THEN 'Crítico'
-        WHEN (
-            CASE
-                WHEN COALESCE(s.dmp, 0) > 0 THEN
-                    ROUND(
-                        (
-                            COALESCE(
-                                NULLIF(v.stock_sin_vencidos, 0),
-                                s.stock_disponible,
-                                s.stock_actual,
-                                0
-                            ) + 
-                            (COALESCE(e.cantidad_maxima, 0) - COALESCE(e.cantidad_emitida, 0)) + 
-                            COALESCE(cs.cantidad_solicitada, 0)
-                        ) / s.dmp,
-                        1
-                    )
-                ELSE NULL
-            END
-        ) BETWEEN 1 AND 3 THEN 'Atención'
+        WHEN m.dmp = 0 THEN 'Sin DMP'
+        WHEN m.stock_efectivo = 0 THEN 'Sin Stock'
+        WHEN c.cobertura_meses < 1 THEN 'Crítico'
+        WHEN c.cobertura_meses BETWEEN 1 AND 3 THEN 'Atención'
         ELSE 'Óptimo'
-    END AS nivel_stock
+    END AS nivel_stock,
+    -- Última edición desde el dashboard (cantidad solicitada o datos del contrato):
+    -- el frontend trae solo las filas más nuevas que su copia en caché
+    GREATEST(cs.actualizado_en, d.actualizado_en) AS actualizado_en
 FROM ejecucion_dedup e
 LEFT JOIN public.datosejecucion d ON e.id_llamado = d.id_llamado
 LEFT JOIN pendiente_entrega pe
     ON e.id_llamado = pe.id_llamado
-    AND TRIM(CAST(e.licitacion AS TEXT)) = pe.licitacion
-    AND TRIM(CAST(e.proveedor AS TEXT)) = pe.proveedor
-    AND TRIM(CAST(e.codigo AS TEXT)) = pe.codigo
-LEFT JOIN stock_por_codigo s ON TRIM(CAST(e.codigo AS TEXT)) = s.codigo
-LEFT JOIN venc_por_codigo v ON TRIM(CAST(e.codigo AS TEXT)) = v.codigo
+    AND e.licitacion_norm = pe.licitacion
+    AND e.proveedor_norm = pe.proveedor
+    AND e.codigo_norm = pe.codigo
+LEFT JOIN stock_por_codigo s ON e.codigo_norm = s.codigo
+LEFT JOIN venc_por_codigo v ON e.codigo_norm = v.codigo
 LEFT JOIN public.cantidad_solicitada cs
     ON e.id_llamado = cs.id_llamado
-    AND TRIM(CAST(e.licitacion AS TEXT)) = TRIM(CAST(cs.licitacion AS TEXT))
-    AND TRIM(CAST(e.codigo AS TEXT)) = TRIM(CAST(cs.codigo AS TEXT))
-    AND TRIM(CAST(e.item AS TEXT)) = TRIM(CAST(cs.item AS TEXT))
-WHERE e.codigo IS NOT NULL AND TRIM(CAST(e.codigo AS TEXT)) != ''
+    AND e.licitacion_norm = cs.licitacion_norm
+    AND e.codigo_norm = cs.codigo_norm
+    AND e.item_norm = cs.item_norm
+-- Métricas base, calculadas UNA vez por fila
+CROSS JOIN LATERAL (
+    SELECT
+        -- Stock actual: prioriza stock sin vencidos, luego stock disponible, luego stock_actual
+        COALESCE(NULLIF(v.stock_sin_vencidos, 0), s.stock_disponible, s.stock_actual, 0) AS stock_efectivo,
+        -- Saldo contrato: cantidad_maxima - cantidad_emitida
+        COALESCE(e.cantidad_maxima, 0) - COALESCE(e.cantidad_emitida, 0) AS saldo_contrato,
+        COALESCE(cs.cantidad_solicitada, 0) AS cantidad_solicitada,
+        COALESCE(s.dmp, 0) AS dmp
+) m
+-- COBERTURA EN MESES: (Stock actual + Saldo contrato + Cantidad solicitada) / DMP
+-- Replica EXACTAMENTE la lógica de siciap_app.py: (s + p + c) / d
+CROSS JOIN LATERAL (
+    SELECT
+        CASE
+            WHEN m.dmp > 0 THEN
+                ROUND((m.stock_efectivo + m.saldo_contrato + m.cantidad_solicitada) / m.dmp, 1)
+            ELSE NULL
+        END AS cobertura_meses
+) c
 ORDER BY e.id_llamado, e.licitacion, e.codigo, e.item;
 
 COMMENT ON VIEW public.vista_tablero_principal IS 'Vista unificada que replica EXACTAMENTE la lógica de siciap_app.py: cobertura_meses = (Stock + Saldo + Cantidad Solicitada) / DMP, nivel_stock basado en cobertura';
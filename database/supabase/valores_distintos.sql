@@ -0,0 +1,45 @@
+-- =============================================================================
+-- SICIAP CLOUD - OPCIONES DE FILTROS (valores distintos de una columna)
+-- Ejecutar en Supabase SQL Editor después de schema.sql
+-- =============================================================================
+-- Las páginas de órdenes, stock, pedidos y ejecución arman sus selectbox con los
+-- valores distintos de una columna. Sin esta función el frontend descarga esa
+-- columna fila por fila (O(tabla) por filtro); con ella llega solo la lista de
+-- valores, como tablero_licitaciones() para el tablero.
+-- Solo se aceptan los pares tabla/columna de la lista (el nombre se arma en SQL
+-- dinámico). SECURITY INVOKER (por defecto): rigen los permisos de quien llama.
+
+CREATE OR REPLACE FUNCTION public.valores_distintos(p_tabla TEXT, p_columna TEXT)
+RETURNS TABLE (valor TEXT)
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+BEGIN
+    IF (p_tabla, p_columna) NOT IN (
+        ('ordenes', 'estado'),
+        ('ordenes', 'proveedor'),
+        ('stock_critico', 'estado'),
+        ('pedidos', 'estado'),
+        ('ejecucion', 'licitacion')
+    ) THEN
+        RAISE EXCEPTION 'valores_distintos: %.% no está permitido', p_tabla, p_columna;
+    END IF;
+    RETURN QUERY EXECUTE format(
+        'SELECT DISTINCT %1$I::TEXT FROM public.%2$I WHERE %1$I IS NOT NULL ORDER BY 1',
+        p_columna, p_tabla
+    );
+END;
+$$;
+
+COMMENT ON FUNCTION public.valores_distintos(TEXT, TEXT) IS 'Valores distintos de una columna para los filtros del frontend (pares tabla/columna permitidos)';
+
+-- =============================================================================
+-- EXPONER A LA API REST
+-- =============================================================================
+GRANT EXECUTE ON FUNCTION public.valores_distintos(TEXT, TEXT) TO anon, authenticated, service_role;
+
+NOTIFY pgrst, 'reload schema';
+
+-- Verificación
+SELECT * FROM public.valores_distintos('ordenes', 'estado');
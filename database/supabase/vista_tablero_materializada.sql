@@ -0,0 +1,335 @@
+-- =============================================================================
+-- SICIAP CLOUD - VISTA MATERIALIZADA DEL TABLERO
+-- Ejecutar en Supabase SQL Editor DESPUÉS de migracion_definitiva.sql
+-- (el DROP VIEW ... CASCADE de esa migración elimina también esta vista:
+--  si se vuelve a correr la migración, volver a correr este script)
+-- =============================================================================
+-- vista_tablero_principal recalcula DISTINCT ON + agregaciones + joins en cada
+-- petición de la API. Esta vista materializada guarda el resultado ya calculado;
+-- el SyncManager la refresca (CONCURRENTLY, sin bloquear lecturas) al terminar
+-- cada sincronización y el dashboard editable al guardar cambios.
+
+-- CASCADE: las funciones RPC de abajo dependen del tipo de fila de la vista
+DROP MATERIALIZED VIEW IF EXISTS public.vista_tablero_materializada CASCADE;
+
+-- DISTINCT ON garantiza una fila por clave natural aunque stock_critico o
+-- cantidad_solicitada tengan duplicados que multipliquen filas en la vista:
+-- el índice único es requisito de REFRESH ... CONCURRENTLY.
+-- El desempate hace que cada refresco conserve siempre la misma fila: la editada
+-- más recientemente y, a igual fecha, por proveedor y cantidades.
+CREATE MATERIALIZED VIEW public.vista_tablero_materializada AS
+SELECT DISTINCT ON (id_llamado, licitacion, codigo, item)
+    *
+FROM public.vista_tablero_principal
+ORDER BY id_llamado, licitacion, codigo, item,
+         actualizado_en DESC NULLS LAST,
+         proveedor NULLS LAST,
+         pendiente_entrega DESC,
+         cantidad_solicitada DESC,
+         ver_en_fecha DESC NULLS LAST,
+         comentario NULLS LAST
+WITH DATA;
+
+-- NULLS NOT DISTINCT (PostgreSQL 15+): item puede venir NULL (licitacion es NOT NULL)
+CREATE UNIQUE INDEX IF NOT EXISTS ux_vista_tablero_materializada_clave
+    ON public.vista_tablero_materializada (id_llamado, licitacion, codigo, item)
+    NULLS NOT DISTINCT;
+
+-- Filtros frecuentes del dashboard
+CREATE INDEX IF NOT EXISTS idx_vista_tablero_materializada_nivel
+    ON public.vista_tablero_materializada (nivel_stock);
+CREATE INDEX IF NOT EXISTS idx_vista_tablero_materializada_codigo
+    ON public.vista_tablero_materializada (codigo);
+CREATE INDEX IF NOT EXISTS idx_vista_tablero_materializada_licitacion
+    ON public.vista_tablero_materializada (licitacion);
+
+-- Refresco por delta del frontend: filas editadas después de una fecha
+CREATE INDEX IF NOT EXISTS idx_vista_tablero_materializada_actualizado_en
+    ON public.vista_tablero_materializada (actualizado_en);
+
+-- Paginación por clave (keyset): mismo orden que tablero_pagina(). item puede ser NULL
+-- y la comparación de filas con NULL no sirve, por eso COALESCE(item, '').
+CREATE INDEX IF NOT EXISTS idx_vista_tablero_materializada_keyset
+    ON public.vista_tablero_materializada (id_llamado, licitacion, codigo, (COALESCE(item, '')));
+
+COMMENT ON MATERIALIZED VIEW public.vista_tablero_materializada IS 'Resultado precalculado de vista_tablero_principal; refrescar con public.refrescar_vista_tablero()';
+
+-- =============================================================================
+-- REFRESCO (RPC)
+-- =============================================================================
+-- SECURITY DEFINER: la API (anon/authenticated) no es dueña de la vista y no
+-- podría refrescarla directamente. El dashboard la llama con la clave pública,
+-- así que la función se limita sola: un refresco a la vez y como mucho uno cada
+-- 10 segundos (inicio a inicio). Si lo omite devuelve FALSE y el frontend
+-- reintenta pasado el intervalo, para que la edición recién guardada se incluya.
+-- El sync refresca con su propia conexión (REFRESH directo), sin este límite.
+CREATE TABLE IF NOT EXISTS public.tablero_refresco (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    refrescado_en TIMESTAMPTZ NOT NULL DEFAULT '-infinity'
+);
+INSERT INTO public.tablero_refresco DEFAULT VALUES ON CONFLICT (id) DO NOTHING;
+REVOKE ALL ON public.tablero_refresco FROM anon, authenticated;
+
+COMMENT ON TABLE public.tablero_refresco IS 'Inicio del último refresco pedido por la API (límite de refrescar_vista_tablero)';
+
+-- Antes devolvía void: CREATE OR REPLACE no puede cambiar el tipo de retorno
+DROP FUNCTION IF EXISTS public.refrescar_vista_tablero();
+CREATE OR REPLACE FUNCTION public.refrescar_vista_tablero()
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_inicio TIMESTAMPTZ := clock_timestamp();
+BEGIN
+    -- Ya hay un refresco en curso: no encolar otro detrás
+    IF NOT pg_try_advisory_xact_lock(hashtext('refrescar_vista_tablero')) THEN
+        RETURN FALSE;
+    END IF;
+    IF EXISTS (
+        SELECT 1 FROM public.tablero_refresco
+        WHERE refrescado_en > v_inicio - INTERVAL '10 seconds'
+    ) THEN
+        RETURN FALSE;
+    END IF;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY public.vista_tablero_materializada;
+    UPDATE public.tablero_refresco SET refrescado_en = v_inicio;
+    RETURN TRUE;
+END;
+$$;
+
+COMMENT ON FUNCTION public.refrescar_vista_tablero() IS 'Refresca vista_tablero_materializada sin bloquear lecturas (dashboard editable); FALSE si lo omitió por el límite de frecuencia';
+
+-- =============================================================================
+-- PAGINACIÓN POR CLAVE (RPC)
+-- =============================================================================
+-- Devuelve la página siguiente a la última clave vista (id_llamado, licitacion,
+-- codigo, item). A diferencia de .range() (OFFSET), cada página es una búsqueda
+-- en el índice: el costo por página no crece con el número de página.
+-- Primera página: llamar sin clave (p_id_llamado NULL).
+CREATE OR REPLACE FUNCTION public.tablero_pagina(
+    p_id_llamado BIGINT DEFAULT NULL,
+    p_licitacion TEXT DEFAULT NULL,
+    p_codigo TEXT DEFAULT NULL,
+    p_item TEXT DEFAULT NULL,
+    p_limite INTEGER DEFAULT 5000
+)
+RETURNS SETOF public.vista_tablero_materializada
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+DECLARE
+    v_limite INTEGER := LEAST(GREATEST(COALESCE(p_limite, 5000), 1), 10000);
+BEGIN
+    IF p_id_llamado IS NULL THEN
+        RETURN QUERY
+            SELECT t.*
+            FROM public.vista_tablero_materializada t
+            ORDER BY t.id_llamado, t.licitacion, t.codigo, COALESCE(t.item, '')
+            LIMIT v_limite;
+    ELSE
+        RETURN QUERY
+            SELECT t.*
+            FROM public.vista_tablero_materializada t
+            WHERE (t.id_llamado, t.licitacion, t.codigo, COALESCE(t.item, ''))
+                > (p_id_llamado, p_licitacion, p_codigo, COALESCE(p_item, ''))
+            ORDER BY t.id_llamado, t.licitacion, t.codigo, COALESCE(t.item, '')
+            LIMIT v_limite;
+    END IF;
+END;
+$$;
+
+COMMENT ON FUNCTION public.tablero_pagina(BIGINT, TEXT, TEXT, TEXT, INTEGER) IS 'Página del tablero posterior a la clave dada (keyset); usada por fetch_vista_tablero_todos';
+
+-- Bloque filtrado para la grilla por bloques del dashboard editable: mismo keyset
+-- que tablero_pagina, con los filtros de la grilla resueltos en el servidor
+-- (NULL = sin filtro). El navegador recibe solo el bloque visible.
+CREATE OR REPLACE FUNCTION public.tablero_bloque(
+    p_id_llamado BIGINT DEFAULT NULL,
+    p_licitacion TEXT DEFAULT NULL,
+    p_codigo TEXT DEFAULT NULL,
+    p_item TEXT DEFAULT NULL,
+    p_filtro_licitacion TEXT DEFAULT NULL,
+    p_nivel_stock TEXT DEFAULT NULL,
+    p_busqueda TEXT DEFAULT NULL,
+    p_limite INTEGER DEFAULT 500
+)
+RETURNS SETOF public.vista_tablero_materializada
+LANGUAGE plpgsql
+STABLE
+SET search_path = public
+AS $$
+DECLARE
+    v_limite INTEGER := LEAST(GREATEST(COALESCE(p_limite, 500), 1), 5000);
+BEGIN
+    -- Dos ramas, como tablero_pagina: con "p_id_llamado IS NULL OR (...) > (...)"
+    -- el plan genérico no puede usar la clave como rango del índice keyset y
+    -- recorre el índice desde el principio hasta el cursor en cada bloque
+    IF p_id_llamado IS NULL THEN
+        RETURN QUERY
+            SELECT t.*
+            FROM public.vista_tablero_materializada t
+            WHERE (p_filtro_licitacion IS NULL OR t.licitacion = p_filtro_licitacion)
+              AND (p_nivel_stock IS NULL OR t.nivel_stock = p_nivel_stock)
+              AND (p_busqueda IS NULL
+                   OR t.producto ILIKE '%' || p_busqueda || '%'
+                   OR t.codigo ILIKE '%' || p_busqueda || '%')
+            ORDER BY t.id_llamado, t.licitacion, t.codigo, COALESCE(t.item, '')
+            LIMIT v_limite;
+    ELSE
+        RETURN QUERY
+            SELECT t.*
+            FROM public.vista_tablero_materializada t
+            WHERE (t.id_llamado, t.licitacion, t.codigo, COALESCE(t.item, ''))
+                > (p_id_llamado, p_licitacion, p_codigo, COALESCE(p_item, ''))
+              AND (p_filtro_licitacion IS NULL OR t.licitacion = p_filtro_licitacion)
+              AND (p_nivel_stock IS NULL OR t.nivel_stock = p_nivel_stock)
+              AND (p_busqueda IS NULL
+                   OR t.producto ILIKE '%' || p_busqueda || '%'
+                   OR t.codigo ILIKE '%' || p_busqueda || '%')
+            ORDER BY t.id_llamado, t.licitacion, t.codigo, COALESCE(t.item, '')
+            LIMIT v_limite;
+    END IF;
+END;
+$$;
+
+COMMENT ON FUNCTION public.tablero_bloque(BIGINT, TEXT, TEXT, TEXT, TEXT, TEXT, TEXT, INTEGER) IS 'Bloque filtrado del tablero posterior a la clave dada (keyset); grilla por bloques del dashboard editable';
+
+-- Total de filas con los mismos filtros (para "bloque N de M")
+CREATE OR REPLACE FUNCTION public.tablero_bloque_total(
+    p_filtro_licitacion TEXT DEFAULT NULL,
+    p_nivel_stock TEXT DEFAULT NULL,
+    p_busqueda TEXT DEFAULT NULL
+)
+RETURNS BIGINT
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT COUNT(*)
+    FROM public.vista_tablero_materializada t
+    WHERE (p_filtro_licitacion IS NULL OR t.licitacion = p_filtro_licitacion)
+      AND (p_nivel_stock IS NULL OR t.nivel_stock = p_nivel_stock)
+      AND (p_busqueda IS NULL
+           OR t.producto ILIKE '%' || p_busqueda || '%'
+           OR t.codigo ILIKE '%' || p_busqueda || '%');
+$$;
+
+-- =============================================================================
+-- KPIs DEL DASHBOARD GERENCIAL (RPC)
+-- =============================================================================
+-- Devuelve ya agregados los indicadores y desgloses de dashboard_principal,
+-- aplicando los filtros del sidebar (NULL = sin filtro). Una respuesta chica
+-- sin importar cuántas filas tenga el tablero.
+CREATE OR REPLACE FUNCTION public.tablero_kpis(
+    p_licitacion TEXT DEFAULT NULL,
+    p_nivel_stock TEXT DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+WITH f AS (
+    SELECT licitacion, proveedor, nivel_stock, cantidad_maxima, cantidad_emitida,
+           cantidad_solicitada, precio_unitario
+    FROM public.vista_tablero_materializada
+    WHERE (p_licitacion IS NULL OR licitacion = p_licitacion)
+      AND (p_nivel_stock IS NULL OR nivel_stock = p_nivel_stock)
+),
+totales AS (
+    SELECT
+        COUNT(*) AS total_items,
+        COUNT(*) FILTER (WHERE nivel_stock IN ('Crítico', 'Sin Stock')) AS items_criticos,
+        COALESCE(SUM(cantidad_maxima), 0) AS cantidad_maxima,
+        COALESCE(SUM(cantidad_emitida), 0) AS cantidad_emitida,
+        COALESCE(SUM(cantidad_solicitada), 0) AS cantidad_solicitada,
+        -- Igual que el dashboard: precio faltante cuenta como 0 en el promedio
+        COALESCE(AVG(COALESCE(precio_unitario, 0)), 0) AS precio_promedio
+    FROM f
+)
+SELECT jsonb_build_object(
+    'total_items', t.total_items,
+    'items_criticos', t.items_criticos,
+    'cantidad_maxima', t.cantidad_maxima,
+    'cantidad_emitida', t.cantidad_emitida,
+    'cantidad_solicitada', t.cantidad_solicitada,
+    'precio_promedio', t.precio_promedio,
+    'por_nivel', COALESCE((
+        SELECT jsonb_agg(jsonb_build_object('nivel_stock', nivel_stock, 'items', items) ORDER BY items DESC)
+        FROM (SELECT nivel_stock, COUNT(*) AS items FROM f GROUP BY nivel_stock) n
+    ), '[]'::JSONB),
+    'por_licitacion', COALESCE((
+        SELECT jsonb_agg(jsonb_build_object(
+                   'licitacion', licitacion, 'items', items,
+                   'cantidad_maxima', cantidad_maxima, 'cantidad_emitida', cantidad_emitida
+               ) ORDER BY cantidad_maxima DESC)
+        FROM (
+            SELECT licitacion, COUNT(*) AS items,
+                   COALESCE(SUM(cantidad_maxima), 0) AS cantidad_maxima,
+                   COALESCE(SUM(cantidad_emitida), 0) AS cantidad_emitida
+            FROM f GROUP BY licitacion
+            ORDER BY cantidad_maxima DESC
+            LIMIT 10
+        ) l
+    ), '[]'::JSONB),
+    'por_proveedor', COALESCE((
+        SELECT jsonb_agg(jsonb_build_object(
+                   'proveedor', proveedor, 'items', items, 'items_criticos', items_criticos,
+                   'cantidad_maxima', cantidad_maxima
+               ) ORDER BY items DESC)
+        FROM (
+            SELECT proveedor, COUNT(*) AS items,
+                   COUNT(*) FILTER (WHERE nivel_stock IN ('Crítico', 'Sin Stock')) AS items_criticos,
+                   COALESCE(SUM(cantidad_maxima), 0) AS cantidad_maxima
+            FROM f GROUP BY proveedor
+            ORDER BY items DESC
+            LIMIT 10
+        ) pr
+    ), '[]'::JSONB)
+)
+FROM totales t;
+$$;
+
+COMMENT ON FUNCTION public.tablero_kpis(TEXT, TEXT) IS 'KPIs y desgloses (nivel, licitación, proveedor) del dashboard gerencial, filtrados';
+
+-- Opciones del filtro "Licitación" sin descargar el tablero
+CREATE OR REPLACE FUNCTION public.tablero_licitaciones()
+RETURNS TABLE (licitacion TEXT)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT DISTINCT t.licitacion::TEXT
+    FROM public.vista_tablero_materializada t
+    WHERE t.licitacion IS NOT NULL
+    ORDER BY 1;
+$$;
+
+-- =============================================================================
+-- EXPONER A LA API REST
+-- =============================================================================
+GRANT SELECT ON public.vista_tablero_materializada TO anon;
+GRANT SELECT ON public.vista_tablero_materializada TO authenticated;
+GRANT SELECT ON public.vista_tablero_materializada TO service_role;
+
+-- anon: la app desplegada usa la clave pública; el límite de frecuencia de la
+-- función acota cuántos refrescos se pueden pedir por la API
+REVOKE ALL ON FUNCTION public.refrescar_vista_tablero() FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.refrescar_vista_tablero() TO anon;
+GRANT EXECUTE ON FUNCTION public.refrescar_vista_tablero() TO authenticated;
+GRANT EXECUTE ON FUNCTION public.refrescar_vista_tablero() TO service_role;
+
+GRANT EXECUTE ON FUNCTION public.tablero_pagina(BIGINT, TEXT, TEXT, TEXT, INTEGER) TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.tablero_kpis(TEXT, TEXT) TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.tablero_licitaciones() TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.tablero_bloque(BIGINT, TEXT, TEXT, TEXT, TEXT, TEXT, TEXT, INTEGER) TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.tablero_bloque_total(TEXT, TEXT, TEXT) TO anon, authenticated, service_role;
+
+-- Recargar el esquema de PostgREST para que la vista y la función aparezcan en la API
+NOTIFY pgrst, 'reload schema';
+
+-- Verificación
+SELECT COUNT(*) AS filas_materializadas FROM public.vista_tablero_materializada;
@@ -6,6 +6,9 @@ from config.database import DatabaseConfig
 
 # Configuración de procesamiento por lotes
 BATCH_SIZE = Settings.ETL_BATCH_SIZE
+BATCH_SIZE_MIN = Settings.ETL_BATCH_SIZE_MIN
+BATCH_SIZE_MAX = Settings.ETL_BATCH_SIZE_MAX
+BATCH_TARGET_SECONDS = Settings.ETL_BATCH_TARGET_SECONDS
 
 # Configuración de logging
 LOG_LEVEL = Settings.ETL_LOG_LEVEL
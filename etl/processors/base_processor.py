@@ -9,6 +9,7 @@ from config.database import DatabaseConfig
 from etl.utils.excel_reader import ExcelReader
 from etl.utils.data_cleaner import DataCleaner
 from etl.utils.validators import DataValidator
+from etl.sync.change_tracker import ChangeTracker
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +28,7 @@ class BaseProcessor:
         self.excel_reader = ExcelReader()
         self.data_cleaner = DataCleaner()
         self.validator = DataValidator()
+        self.change_tracker = ChangeTracker()
         self.engine = None
     
     def get_connection(self):
@@ -36,6 +38,17 @@ class BaseProcessor:
             self.engine = create_engine(conn_str, connect_args={"client_encoding": "utf8"})
         return self.engine.connect()
     
+    def mark_table_dirty(self, conn, table_name: str) -> None:
+        """
+        Marca la tabla como modificada para que el próximo sync la suba a Supabase.
+        Llamar dentro de la transacción de importación, justo antes del commit.
+        
+        Args:
+            conn: Conexión con la transacción de importación abierta
+            table_name: Nombre de la tabla (sin esquema)
+        """
+        self.change_tracker.mark_dirty(conn, table_name)
+    
     def read_excel(self, file_content: bytes, file_name: str, sheet_name: Optional[str] = None) -> pd.DataFrame:
         """
         Lee un archivo Excel usando el lector robusto
@@ -192,6 +205,7 @@ class BaseProcessor:
         result = conn.execute(text("""
             SELECT column_name FROM information_schema.columns
             WHERE table_schema = :schema AND table_name = :table
+              AND is_generated = 'NEVER'  -- las columnas generadas (*_norm) no se insertan
             ORDER BY ordinal_position
         """), {"schema": schema, "table": table})
         return [row[0] for row in result]
@@ -223,6 +237,7 @@ class BaseProcessor:
                         table, conn, schema=schema,
                         if_exists='append', index=False, method='multi'
                     )
+                    self.mark_table_dirty(conn, table)
                     trans.commit()
                     logger.info(f"Datos insertados en {table_name}: {len(df_insert)} filas")
                     return True
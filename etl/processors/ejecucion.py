@@ -93,6 +93,7 @@ class EjecucionProcessor(BaseProcessor):
                         # if_exists='append' porque ya borramos manualmente arriba
                         df.to_sql('ejecucion', conn, schema='siciap', if_exists='append', index=False)
                         
+                        self.mark_table_dirty(conn, 'ejecucion')
                         trans.commit()
                         logger.info(f"✅ Ejecución importada: {len(df)} registros.")
                         return True
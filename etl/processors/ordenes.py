@@ -178,6 +178,7 @@ class OrdenesProcessor(BaseProcessor):
                     try:
                         conn.execute(text("DELETE FROM siciap.ordenes"))
                         df.to_sql('ordenes', conn, schema='siciap', if_exists='append', index=False)
+                        self.mark_table_dirty(conn, 'ordenes')
                         trans.commit()
                         logger.info(f"✅ Órdenes importadas: {len(df)} registros.")
                         return True
@@ -152,6 +152,7 @@ class PedidosProcessor(BaseProcessor):
                     try:
                         conn.execute(text("DELETE FROM siciap.pedidos"))
                         df.to_sql('pedidos', conn, schema='siciap', if_exists='append', index=False)
+                        self.mark_table_dirty(conn, 'pedidos')
                         trans.commit()
                         logger.info(f"✅ Pedidos importados: {len(df)} registros.")
                         return True
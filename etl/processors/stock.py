@@ -98,6 +98,7 @@ class StockProcessor(BaseProcessor):
                         # 2. Insertar nuevos datos
                         df.to_sql('stock_critico', conn, schema='siciap', if_exists='append', index=False)
                         
+                        self.mark_table_dirty(conn, 'stock_critico')
                         trans.commit()
                         logger.info(f"✅ Stock crítico importado: {len(df)} registros.")
                         return True
@@ -209,6 +209,7 @@ class VencimientosParquesProcessor(BaseProcessor):
                     try:
                         conn.execute(text("DELETE FROM siciap.vencimientos_parques"))
                         df.to_sql('vencimientos_parques', conn, schema='siciap', if_exists='append', index=False)
+                        self.mark_table_dirty(conn, 'vencimientos_parques')
                         trans.commit()
                         logger.info(f"✅ Vencimientos importados: {len(df)} registros.")
                         return True
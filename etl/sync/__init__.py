@@ -2,5 +2,7 @@
 Módulo de sincronización Local → Supabase
 """
 from .sync_manager import SyncManager
+from .batch_tuner import AdaptiveBatchSizer
+from .change_tracker import ChangeTracker
 
-__all__ = ['SyncManager']
+__all__ = ['SyncManager', 'AdaptiveBatchSizer', 'ChangeTracker']
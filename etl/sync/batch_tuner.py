@@ -0,0 +1,83 @@
+"""
+Ajuste adaptativo del tamaño de lote para la sincronización Local → Supabase
+"""
+import logging
+from typing import Optional
+from config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveBatchSizer:
+    """
+    Ajusta el tamaño de lote según la latencia medida de cada inserción (AIMD):
+    crece de forma aditiva mientras el lote tarda menos que el objetivo y se
+    reduce a la mitad cuando lo supera. Siempre dentro de [min_size, max_size].
+    """
+
+    def __init__(self, initial: Optional[int] = None, min_size: Optional[int] = None,
+                 max_size: Optional[int] = None, target_seconds: Optional[float] = None,
+                 increase_step: Optional[int] = None, decrease_factor: float = 0.5):
+        """
+        Inicializa el ajustador
+
+        Args:
+            initial: Tamaño inicial (por defecto ETL_BATCH_SIZE)
+            min_size: Tamaño mínimo (por defecto ETL_BATCH_SIZE_MIN)
+            max_size: Tamaño máximo (por defecto ETL_BATCH_SIZE_MAX)
+            target_seconds: Latencia objetivo por lote (por defecto ETL_BATCH_TARGET_SECONDS)
+            increase_step: Filas que se suman cuando el lote fue rápido (por defecto min_size)
+            decrease_factor: Factor multiplicativo cuando el lote fue lento
+        """
+        self.min_size = max(1, min_size or Settings.ETL_BATCH_SIZE_MIN)
+        self.max_size = max(max_size or Settings.ETL_BATCH_SIZE_MAX, self.min_size)
+        self.target_seconds = target_seconds or Settings.ETL_BATCH_TARGET_SECONDS
+        self.increase_step = increase_step or self.min_size
+        self.decrease_factor = decrease_factor
+        self.size = self._clamp(initial or Settings.ETL_BATCH_SIZE)
+
+        self.total_rows = 0
+        self.total_seconds = 0.0
+        self.batches = 0
+
+    def _clamp(self, size: float) -> int:
+        return int(min(max(size, self.min_size), self.max_size))
+
+    def record(self, rows: int, seconds: float) -> int:
+        """
+        Registra un lote enviado y calcula el tamaño del siguiente
+
+        Args:
+            rows: Filas enviadas en el lote
+            seconds: Tiempo que tardó el lote
+
+        Returns:
+            Tamaño para el próximo lote
+        """
+        self.total_rows += rows
+        self.total_seconds += seconds
+        self.batches += 1
+
+        if seconds > self.target_seconds:
+            self.size = self._clamp(self.size * self.decrease_factor)
+        elif rows >= self.size:
+            # Solo crecer con lotes llenos: el último lote parcial no dice nada del enlace
+            self.size = self._clamp(self.size + self.increase_step)
+        return self.size
+
+    @property
+    def rows_per_second(self) -> float:
+        """Throughput promedio logrado hasta ahora"""
+        if self.total_seconds <= 0:
+            return 0.0
+        return self.total_rows / self.total_seconds
+
+    def summary(self) -> dict:
+        """Resumen de la corrida (para logs y resultados de sincronización)"""
+        return {
+            'rows': self.total_rows,
+            'batches': self.batches,
+            'seconds': round(self.total_seconds, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'final_batch_size': self.size,
+        }
@@ -0,0 +1,131 @@
+"""
+Registro local de tablas modificadas para sincronizar solo lo que cambió
+"""
+import logging
+from typing import Dict, List, Optional
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeTracker:
+    """
+    Mantiene en siciap.sync_estado un contador de generación por tabla.
+
+    Los procesadores incrementan `generacion` dentro de la misma transacción en la
+    que reemplazan los datos; el SyncManager guarda en `generacion_sincronizada`
+    la generación que leyó antes de subir la tabla. Una tabla está sucia mientras
+    generacion > generacion_sincronizada. Las tablas sin registro se consideran
+    sucias (estado desconocido).
+
+    También guarda filas, duración y throughput de la última sincronización exitosa,
+    que el planificador usa para estimar cuánto tardará la próxima.
+    """
+
+    TABLE = 'siciap.sync_estado'
+
+    def ensure_table(self, conn) -> None:
+        """Crea la tabla de metadatos si no existe (no requiere migración manual)"""
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                tabla VARCHAR(100) PRIMARY KEY,
+                generacion BIGINT NOT NULL DEFAULT 0,
+                generacion_sincronizada BIGINT NOT NULL DEFAULT 0,
+                modificado_en TIMESTAMPTZ DEFAULT now(),
+                sincronizado_en TIMESTAMPTZ
+            )
+        """))
+        # Columnas agregadas después de la primera versión de la tabla
+        conn.execute(text(f"""
+            ALTER TABLE {self.TABLE}
+                ADD COLUMN IF NOT EXISTS filas_sincronizadas BIGINT,
+                ADD COLUMN IF NOT EXISTS segundos_sincronizacion DOUBLE PRECISION,
+                ADD COLUMN IF NOT EXISTS filas_por_segundo DOUBLE PRECISION
+        """))
+
+    def mark_dirty(self, conn, table_name: str) -> int:
+        """
+        Marca una tabla como modificada. Debe llamarse antes del commit de la importación.
+
+        Returns:
+            Nueva generación de la tabla
+        """
+        self.ensure_table(conn)
+        result = conn.execute(text(f"""
+            INSERT INTO {self.TABLE} (tabla, generacion, modificado_en)
+            VALUES (:tabla, 1, now())
+            ON CONFLICT (tabla) DO UPDATE
+               SET generacion = {self.TABLE}.generacion + 1,
+                   modificado_en = now()
+            RETURNING generacion
+        """), {"tabla": table_name})
+        generation = result.scalar()
+        logger.info(f"Tabla {table_name} marcada para sincronizar (generación {generation})")
+        return generation
+
+    def get_state(self, conn) -> Dict[str, dict]:
+        """Retorna el estado de todas las tablas registradas"""
+        self.ensure_table(conn)
+        result = conn.execute(text(f"""
+            SELECT tabla, generacion, generacion_sincronizada, modificado_en, sincronizado_en,
+                   filas_sincronizadas, segundos_sincronizacion, filas_por_segundo
+            FROM {self.TABLE}
+        """))
+        return {
+            row[0]: {
+                'generacion': row[1],
+                'generacion_sincronizada': row[2],
+                'modificado_en': row[3],
+                'sincronizado_en': row[4],
+                'dirty': row[1] > row[2],
+                'filas_sincronizadas': row[5],
+                'segundos_sincronizacion': row[6],
+                'filas_por_segundo': row[7],
+            }
+            for row in result
+        }
+
+    def get_generation(self, conn, table_name: str) -> int:
+        """Generación actual de una tabla (0 si nunca fue marcada)"""
+        self.ensure_table(conn)
+        result = conn.execute(
+            text(f"SELECT generacion FROM {self.TABLE} WHERE tabla = :tabla"),
+            {"tabla": table_name}
+        ).scalar()
+        return result or 0
+
+    def get_dirty_tables(self, conn, tables: List[str]) -> List[str]:
+        """Filtra `tables` dejando solo las sucias o sin registro, en el mismo orden"""
+        state = self.get_state(conn)
+        return [t for t in tables if t not in state or state[t]['dirty']]
+
+    def mark_synced(self, conn, table_name: str, generation: Optional[int],
+                    stats: Optional[dict] = None) -> None:
+        """
+        Registra que la generación `generation` ya está en Supabase. Si hubo una
+        importación posterior (generación mayor), la tabla sigue sucia.
+
+        Args:
+            stats: Resumen de AdaptiveBatchSizer (rows, seconds, rows_per_second); si
+                viene vacío se conserva el throughput de la corrida anterior
+        """
+        self.ensure_table(conn)
+        stats = stats or {}
+        conn.execute(text(f"""
+            INSERT INTO {self.TABLE} (tabla, generacion, generacion_sincronizada, sincronizado_en,
+                                      filas_sincronizadas, segundos_sincronizacion, filas_por_segundo)
+            VALUES (:tabla, :gen, :gen, now(), :filas, :segundos, :fps)
+            ON CONFLICT (tabla) DO UPDATE
+               SET generacion_sincronizada = GREATEST({self.TABLE}.generacion_sincronizada, :gen),
+                   sincronizado_en = now(),
+                   filas_sincronizadas = COALESCE(EXCLUDED.filas_sincronizadas, {self.TABLE}.filas_sincronizadas),
+                   segundos_sincronizacion = COALESCE(EXCLUDED.segundos_sincronizacion, {self.TABLE}.segundos_sincronizacion),
+                   filas_por_segundo = COALESCE(EXCLUDED.filas_por_segundo, {self.TABLE}.filas_por_segundo)
+        """), {
+            "tabla": table_name,
+            "gen": generation or 0,
+            "filas": stats.get('rows'),
+            "segundos": stats.get('seconds'),
+            # Un throughput de 0 (tabla vacía) no sirve para estimar
+            "fps": stats.get('rows_per_second') or None,
+        })
@@ -3,11 +3,14 @@ Gestor de sincronización de datos Local → Supabase
 """
 import pandas as pd
 import logging
+import time
 from typing import List, Optional
 from sqlalchemy import create_engine, text
 from config.database import DatabaseConfig
 from config.supabase import SupabaseConfig
 from config.settings import Settings
+from etl.sync.batch_tuner import AdaptiveBatchSizer
+from etl.sync.change_tracker import ChangeTracker
 
 logger = logging.getLogger(__name__)
 
@@ -26,12 +29,32 @@ class SyncManager:
         'vencimientos_parques'
     ]
     
+    # Esquema de Supabase (no expuesto por la API) donde se cargan las tablas sombra
+    STAGING_SCHEMA = 'sync_staging'
+    
+    # Vista materializada del tablero (database/supabase/vista_tablero_materializada.sql)
+    MATERIALIZED_VIEW = 'public.vista_tablero_materializada'
+    
+    # Versiones de datos que leen las páginas para su caché (database/supabase/data_version.sql)
+    DATA_VERSION_FUNCTION = 'public.bump_data_version(text[])'
+    TABLERO_DATASET = 'tablero'
+    # Sube en cada publicación (las ediciones del dashboard no la tocan)
+    SYNC_DATASET = 'sincronizacion'
+    
+    # Throughput supuesto (filas/s) para tablas que nunca se sincronizaron
+    DEFAULT_ROWS_PER_SECOND = 1000.0
+    # Costo fijo aproximado por tabla (conexión, staging, swap, ANALYZE)
+    TABLE_OVERHEAD_SECONDS = 2.0
+    
     def __init__(self):
         """Inicializa el gestor de sincronización"""
         self.local_config = DatabaseConfig()
         self.supabase_config = SupabaseConfig()
+        self.change_tracker = ChangeTracker()
         self.local_engine = None
         self.supabase_engine = None
+        # Estadísticas de throughput de la última sincronización por tabla
+        self.last_stats = {}
     
     def get_local_connection(self):
         """Obtiene conexión a PostgreSQL local"""
@@ -65,18 +88,280 @@ class SyncManager:
         result = conn.execute(text("""
             SELECT column_name FROM information_schema.columns
             WHERE table_schema = 'public' AND table_name = :table
+              AND is_generated = 'NEVER'  -- las columnas generadas (*_norm) no se insertan
             ORDER BY ordinal_position
         """), {"table": table_name})
         return [row[0] for row in result]
     
-    def sync_table(self, table_name: str, schema: str = 'siciap', batch_size: int = 1000) -> bool:
+    def get_dirty_tables(self, tables: Optional[List[str]] = None) -> List[str]:
+        """
+        Tablas modificadas localmente desde la última sincronización
+
+        Args:
+            tables: Tablas a considerar (por defecto TABLES_TO_SYNC)
+
+        Returns:
+            Lista de tablas sucias, en el orden de sincronización. Si no se puede
+            leer el estado, se devuelven todas (mejor subir de más que de menos).
+        """
+        tables = list(tables or self.TABLES_TO_SYNC)
+        try:
+            with self.get_local_connection() as local_conn:
+                trans = local_conn.begin()
+                dirty = self.change_tracker.get_dirty_tables(local_conn, tables)
+                trans.commit()
+            return dirty
+        except Exception as e:
+            logger.warning(f"No se pudo leer el estado de sincronización, se sincroniza todo: {e}")
+            return tables
+    
+    def _mark_synced(self, table_name: str, generation: int, stats: Optional[dict] = None) -> None:
+        """Limpia la marca de tabla sucia tras una sincronización exitosa (no crítico)"""
+        try:
+            with self.get_local_connection() as local_conn:
+                trans = local_conn.begin()
+                self.change_tracker.mark_synced(local_conn, table_name, generation, stats)
+                trans.commit()
+        except Exception as e:
+            logger.warning(f"No se pudo registrar la sincronización de {table_name}: {e}")
+    
+    def plan(self, tables: Optional[List[str]] = None, force: bool = False) -> dict:
+        """
+        Planifica una sincronización sin subir nada (dry-run)
+        
+        Por tabla reúne filas y bytes locales, si cambió desde la última
+        sincronización y el throughput histórico, y estima la duración.
+        El seguimiento de cambios es por tabla: una tabla modificada se sube
+        completa, así que sus filas cambiadas son todas sus filas.
+        
+        Args:
+            tables: Tablas a considerar (por defecto TABLES_TO_SYNC)
+            force: Si es True, todas las tablas se consideran a sincronizar
+        
+        Returns:
+            Diccionario con 'tables' (lista por tabla) y totales de lo que se subiría
+        """
+        tables = [t for t in self.TABLES_TO_SYNC if t in (tables or self.TABLES_TO_SYNC)]
+        dirty = list(tables) if force else self.get_dirty_tables(tables)
+        
+        state = {}
+        try:
+            with self.get_local_connection() as local_conn:
+                trans = local_conn.begin()
+                state = self.change_tracker.get_state(local_conn)
+                trans.commit()
+        except Exception as e:
+            logger.warning(f"No se pudo leer el historial de sincronización: {e}")
+        
+        entries = []
+        with self.get_local_connection() as local_conn:
+            for table in tables:
+                try:
+                    # pg_column_size(t.*) ≈ tamaño de cada fila, cercano a lo que viaja por red
+                    rows, size = local_conn.execute(text(f"""
+                        SELECT COUNT(*), COALESCE(SUM(pg_column_size(t.*)), 0)
+                        FROM siciap.{table} t
+                    """)).one()
+                except Exception as e:
+                    logger.warning(f"No se pudo medir siciap.{table}: {e}")
+                    local_conn.rollback()
+                    rows, size = None, None
+                
+                history = state.get(table, {})
+                rows_per_second = history.get('filas_por_segundo') or self.DEFAULT_ROWS_PER_SECOND
+                will_sync = table in dirty
+                estimated = None
+                if rows is not None:
+                    estimated = round(rows / rows_per_second + self.TABLE_OVERHEAD_SECONDS, 1)
+                
+                entries.append({
+                    'table': table,
+                    'rows': rows,
+                    'bytes': int(size) if size is not None else None,
+                    'dirty': will_sync,
+                    'changed_rows': (rows if will_sync else 0) if rows is not None else None,
+                    'rows_per_second': round(rows_per_second, 1),
+                    'historical': bool(history.get('filas_por_segundo')),
+                    'last_synced_at': history.get('sincronizado_en'),
+                    'estimated_seconds': estimated,
+                })
+        
+        selected = [e for e in entries if e['dirty']]
+        return {
+            'tables': entries,
+            'sync_tables': [e['table'] for e in selected],
+            'total_rows': sum(e['rows'] or 0 for e in selected),
+            'total_bytes': sum(e['bytes'] or 0 for e in selected),
+            'estimated_seconds': round(sum(e['estimated_seconds'] or 0 for e in selected), 1),
+        }
+    
+    def _read_local_table(self, table_name: str, schema: str = 'siciap'):
+        """
+        Lee una tabla local junto con su generación de cambios.
+        La generación se lee ANTES que los datos: si entra una importación en el
+        medio, la tabla queda sucia para el próximo sync.
+        
+        Returns:
+            Tupla (DataFrame, generación)
+        """
+        with self.get_local_connection() as local_conn:
+            trans = local_conn.begin()
+            generation = self.change_tracker.get_generation(local_conn, table_name)
+            trans.commit()
+            query = text(f"SELECT * FROM {schema}.{table_name}")
+            df = pd.read_sql(query, local_conn)
+        return df, generation
+    
+    def _stage_table(self, table_name: str, df: pd.DataFrame, batch_size: Optional[int] = None) -> Optional[List[str]]:
+        """
+        Carga el DataFrame en la tabla sombra sync_staging.<tabla> de Supabase.
+        Los lectores de public.<tabla> no ven esta carga (es la parte lenta: red).
+        
+        Args:
+            table_name: Nombre de la tabla
+            df: Datos leídos de la base local
+            batch_size: Tamaño inicial del lote (se ajusta según la latencia)
+        
+        Returns:
+            Columnas cargadas (para el swap) o None si no se pudo preparar
+        """
+        supabase_conn = self.get_supabase_connection()
+        try:
+            if not self._table_exists_in_supabase(supabase_conn, table_name):
+                logger.warning(f"Tabla {table_name} no existe en Supabase, saltando sincronización")
+                return None
+            
+            # Obtener columnas que existen en Supabase (filtrar antes de insertar)
+            skip_cols = {'id', 'creado_en', 'actualizado_en'}
+            supabase_cols = [c for c in self._get_supabase_table_columns(supabase_conn, table_name) if c not in skip_cols]
+            valid_cols = [c for c in df.columns if c in supabase_cols]
+            
+            if not valid_cols:
+                logger.error(f"Ninguna columna del DataFrame existe en Supabase.{table_name}. Tabla Supabase: {supabase_cols}")
+                return None
+            
+            missing = set(supabase_cols) - set(valid_cols)
+            if missing:
+                logger.info(f"Columnas omitidas (no vienen en local): {missing}")
+            
+            df_filtered = df[valid_cols]
+            logger.info(f"Filtrando a {len(valid_cols)} columnas válidas de {len(df.columns)} originales")
+            
+            staging = f"{self.STAGING_SCHEMA}.{table_name}"
+            column_list = ", ".join(f'"{c}"' for c in valid_cols)
+
+            # Las consultas de metadatos abrieron una transacción implícita
+            # (autobegin de SQLAlchemy 2.x): cerrarla antes del begin() explícito
+            supabase_conn.rollback()
+            trans = supabase_conn.begin()
+            try:
+                # Tabla sombra con los mismos tipos pero sin constraints/defaults/índices:
+                # UNLOGGED y sin índices para que la carga sea lo más rápida posible
+                supabase_conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.STAGING_SCHEMA}"))
+                supabase_conn.execute(text(f"DROP TABLE IF EXISTS {staging}"))
+                supabase_conn.execute(text(
+                    f"CREATE UNLOGGED TABLE {staging} AS "
+                    f"SELECT {column_list} FROM public.{table_name} WITH NO DATA"
+                ))
+                
+                # Insertar datos en lotes de tamaño adaptativo (según latencia medida)
+                sizer = AdaptiveBatchSizer(initial=batch_size)
+                total_rows = len(df_filtered)
+                inserted = 0
+                while inserted < total_rows:
+                    batch = df_filtered.iloc[inserted:inserted + sizer.size]
+                    started = time.perf_counter()
+                    batch.to_sql(
+                        table_name,
+                        supabase_conn,
+                        schema=self.STAGING_SCHEMA,
+                        if_exists='append',
+                        index=False,
+                        method='multi'
+                    )
+                    elapsed = time.perf_counter() - started
+                    inserted += len(batch)
+                    sizer.record(len(batch), elapsed)
+                    logger.info(
+                        f"Insertadas {inserted}/{total_rows} filas en {staging} "
+                        f"(lote de {len(batch)} en {elapsed:.2f}s, próximo lote: {sizer.size})"
+                    )
+                
+                trans.commit()
+            except Exception:
+                trans.rollback()
+                raise
+            
+            self.last_stats[table_name] = sizer.summary()
+            logger.info(
+                f"Tabla {table_name} cargada en staging: "
+                f"{sizer.total_rows} filas en {sizer.total_seconds:.1f}s "
+                f"({sizer.rows_per_second:,.0f} filas/s, {sizer.batches} lotes)"
+            )
+            return valid_cols
+        finally:
+            supabase_conn.close()
+    
+    def _swap_tables(self, staged: dict) -> None:
+        """
+        Reemplaza public.<tabla> por el contenido de sync_staging.<tabla> para todas
+        las tablas de `staged` en UNA transacción corta que corre entera en el
+        servidor (sin viajes de red por fila) e incluye el ANALYZE. Los lectores
+        siguen viendo la versión anterior completa hasta el commit y no esperan:
+        DELETE/INSERT no toman locks que bloqueen SELECT (a diferencia de TRUNCATE).
+        
+        No se usa RENAME: las vistas (vista_tablero_principal) quedan ligadas a la
+        tabla original por OID y seguirían leyendo la tabla vieja.
+        
+        Args:
+            staged: {tabla: columnas cargadas en staging}
+        """
+        if not staged:
+            return
+        supabase_conn = self.get_supabase_connection()
+        try:
+            trans = supabase_conn.begin()
+            try:
+                # No quedarse colgado detrás de un lock ajeno (ej. migración en curso)
+                supabase_conn.execute(text("SET LOCAL lock_timeout = '30s'"))
+                for table_name, columns in staged.items():
+                    column_list = ", ".join(f'"{c}"' for c in columns)
+                    started = time.perf_counter()
+                    supabase_conn.execute(text(f"DELETE FROM public.{table_name}"))
+                    supabase_conn.execute(text(
+                        f"INSERT INTO public.{table_name} ({column_list}) "
+                        f"SELECT {column_list} FROM {self.STAGING_SCHEMA}.{table_name}"
+                    ))
+                    supabase_conn.execute(text(f"ANALYZE public.{table_name}"))
+                    logger.info(f"Swap de {table_name} en {time.perf_counter() - started:.2f}s")
+                trans.commit()
+            except Exception:
+                trans.rollback()
+                raise
+        finally:
+            # Con o sin swap, las tablas sombra ya no sirven (el próximo sync las recrea)
+            self._drop_staging(supabase_conn, staged.keys())
+            supabase_conn.close()
+    
+    def _drop_staging(self, supabase_conn, tables) -> None:
+        """Elimina las tablas sombra (no crítico)"""
+        try:
+            trans = supabase_conn.begin()
+            for table_name in tables:
+                supabase_conn.execute(text(f"DROP TABLE IF EXISTS {self.STAGING_SCHEMA}.{table_name}"))
+            trans.commit()
+        except Exception as e:
+            logger.warning(f"No se pudieron eliminar tablas de staging: {e}")
+    
+    def sync_table(self, table_name: str, schema: str = 'siciap', batch_size: Optional[int] = None) -> bool:
         """
-        Sincroniza una tabla específica
+        Sincroniza una tabla específica: carga en staging y luego swap atómico
         
         Args:
             table_name: Nombre de la tabla
             schema: Esquema de la tabla (local)
-            batch_size: Tamaño del lote para sincronización
+            batch_size: Tamaño inicial del lote (por defecto ETL_BATCH_SIZE); se ajusta
+                según la latencia de cada lote entre ETL_BATCH_SIZE_MIN y ETL_BATCH_SIZE_MAX
         
         Returns:
             True si la sincronización fue exitosa
@@ -85,117 +370,209 @@ class SyncManager:
             logger.info(f"Sincronizando tabla {schema}.{table_name}...")
             
             # Leer datos de PostgreSQL local
-            with self.get_local_connection() as local_conn:
-                query = text(f"SELECT * FROM {schema}.{table_name}")
-                df = pd.read_sql(query, local_conn)
+            df, generation = self._read_local_table(table_name, schema)
             
             if df.empty:
                 logger.warning(f"Tabla {table_name} está vacía, saltando sincronización")
+                self._mark_synced(table_name, generation)
                 return True
             
             logger.info(f"Leídas {len(df)} filas de {schema}.{table_name}")
             
-            # Escribir datos a Supabase
-            supabase_conn = self.get_supabase_connection()
+            columns = self._stage_table(table_name, df, batch_size)
+            if columns is None:
+                return False
+            
+            self._swap_tables({table_name: columns})
+            self._mark_synced(table_name, generation, self.last_stats.get(table_name))
+            logger.info(f"[OK] Tabla {table_name} sincronizada exitosamente")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error en sincronización de {table_name}: {e}", exc_info=True)
+            return False
+    
+    def _sync_tables_atomic(self, tables: List[str]) -> dict:
+        """
+        Carga todas las tablas en staging y las publica juntas en un único swap.
+        Si alguna falla al cargarse, no se publica ninguna.
+        
+        Returns:
+            {tabla: True/False}
+        """
+        staged = {}
+        generations = {}
+        outcome = {}
+        for table in tables:
             try:
-                # Verificar que la tabla existe en Supabase (usar autocommit para evitar transacciones)
-                if not self._table_exists_in_supabase(supabase_conn, table_name):
-                    logger.warning(f"Tabla {table_name} no existe en Supabase, saltando sincronización")
-                    supabase_conn.close()
-                    return False
-                
-                # Obtener columnas que existen en Supabase (filtrar antes de insertar)
-                skip_cols = {'id', 'creado_en', 'actualizado_en'}
-                supabase_cols = [c for c in self._get_supabase_table_columns(supabase_conn, table_name) if c not in skip_cols]
-                valid_cols = [c for c in df.columns if c in supabase_cols]
-                
-                if not valid_cols:
-                    logger.error(f"Ninguna columna del DataFrame existe en Supabase.{table_name}. Tabla Supabase: {supabase_cols}")
-                    supabase_conn.close()
-                    return False
-                
-                missing = set(supabase_cols) - set(valid_cols)
-                if missing:
-                    logger.info(f"Columnas omitidas (no vienen en local): {missing}")
-                
-                df_filtered = df[valid_cols].copy()
-                logger.info(f"Filtrando a {len(valid_cols)} columnas válidas de {len(df.columns)} originales")
-                
-                # Cerrar conexión anterior y crear una nueva para la transacción
-                supabase_conn.close()
+                df, generation = self._read_local_table(table)
+                if df.empty:
+                    logger.warning(f"Tabla {table} está vacía, saltando sincronización")
+                    self._mark_synced(table, generation)
+                    outcome[table] = True
+                    continue
+                columns = self._stage_table(table, df)
+                outcome[table] = columns is not None
+                if columns is not None:
+                    staged[table] = columns
+                    generations[table] = generation
+            except Exception as e:
+                logger.error(f"Error cargando {table} en staging: {e}", exc_info=True)
+                outcome[table] = False
+        
+        if not all(outcome.values()):
+            logger.error("Sincronización atómica abortada: no se publicó ninguna tabla")
+            if staged:
                 supabase_conn = self.get_supabase_connection()
-                
-                # Limpiar tabla en Supabase (usar DELETE en lugar de TRUNCATE para mejor compatibilidad)
-                trans = supabase_conn.begin()
                 try:
-                    supabase_conn.execute(text(f"DELETE FROM public.{table_name}"))
-                    
-                    # Insertar datos en lotes
-                    total_rows = len(df_filtered)
-                    for i in range(0, total_rows, batch_size):
-                        batch = df_filtered.iloc[i:i+batch_size]
-                        batch.to_sql(
-                            table_name,
-                            supabase_conn,
-                            schema='public',
-                            if_exists='append',
-                            index=False,
-                            method='multi'
-                        )
-                        logger.info(f"Insertadas {min(i+batch_size, total_rows)}/{total_rows} filas")
-                    
-                    trans.commit()
-                    logger.info(f"[OK] Tabla {table_name} sincronizada exitosamente")
-                    supabase_conn.close()
-                    return True
-                
-                except Exception as e:
-                    trans.rollback()
-                    logger.error(f"Error sincronizando {table_name}: {e}", exc_info=True)
+                    self._drop_staging(supabase_conn, staged.keys())
+                finally:
                     supabase_conn.close()
-                    return False
-            except Exception as e:
-                logger.error(f"Error obteniendo conexión Supabase: {e}", exc_info=True)
-                if supabase_conn:
-                    supabase_conn.close()
-                return False
+            return {table: False for table in tables}
         
+        try:
+            self._swap_tables(staged)
         except Exception as e:
-            logger.error(f"Error en sincronización de {table_name}: {e}", exc_info=True)
-            return False
+            logger.error(f"Error en el swap conjunto: {e}", exc_info=True)
+            return {table: False for table in tables}
+        
+        for table, generation in generations.items():
+            self._mark_synced(table, generation, self.last_stats.get(table))
+        return outcome
     
-    def sync_all_tables(self) -> dict:
+    def sync_all_tables(self, force: bool = False, atomic: bool = False,
+                        tables: Optional[List[str]] = None) -> dict:
         """
-        Sincroniza todas las tablas configuradas
+        Sincroniza las tablas modificadas desde la última sincronización
+        
+        Args:
+            force: Si es True, sincroniza todas las tablas aunque no tengan cambios
+            tables: Subconjunto elegido a sincronizar; se suben aunque no tengan
+                cambios y el resto se omite
+            atomic: Si es True, publica todas las tablas en un único swap (los
+                lectores nunca ven una tabla nueva junto a otra vieja)
         
         Returns:
-            Diccionario con resultados de sincronización
+            Diccionario con resultados de sincronización (las tablas sin cambios
+            aparecen con 'skipped': True)
         """
         results = {}
         
-        logger.info("Iniciando sincronización completa...")
+        if tables:
+            dirty = [t for t in self.TABLES_TO_SYNC if t in tables]
+            unknown = set(tables) - set(self.TABLES_TO_SYNC)
+            if unknown:
+                logger.warning(f"Tablas desconocidas ignoradas: {sorted(unknown)}")
+            logger.info(f"Iniciando sincronización de tablas elegidas: {dirty}")
+        elif force:
+            logger.info("Iniciando sincronización completa (forzada)...")
+            dirty = list(self.TABLES_TO_SYNC)
+        else:
+            dirty = self.get_dirty_tables()
+            logger.info(f"Iniciando sincronización de tablas modificadas: {dirty or 'ninguna'}")
+        
+        to_sync = [t for t in self.TABLES_TO_SYNC if t in dirty]
+        if atomic:
+            outcome = self._sync_tables_atomic(to_sync)
+        else:
+            outcome = {table: self.sync_table(table) for table in to_sync}
         
         for table in self.TABLES_TO_SYNC:
-            success = self.sync_table(table)
+            if table not in dirty:
+                results[table] = {
+                    'success': True,
+                    'skipped': True,
+                    'synced_at': None,
+                    'stats': None
+                }
+                continue
             results[table] = {
-                'success': success,
-                'synced_at': pd.Timestamp.now().isoformat()
+                'success': outcome[table],
+                'synced_at': pd.Timestamp.now().isoformat(),
+                'stats': self.last_stats.get(table)
             }
         
         # Resumen
-        successful = sum(1 for r in results.values() if r['success'])
-        total = len(results)
+        synced = [r for r in results.values() if not r.get('skipped')]
+        successful = sum(1 for r in synced if r['success'])
+        total = len(synced)
         
-        logger.info(f"Sincronización completada: {successful}/{total} tablas exitosas")
+        logger.info(
+            f"Sincronización completada: {successful}/{total} tablas exitosas, "
+            f"{len(results) - total} sin cambios"
+        )
         
-        # Refrescar vista materializada si existe (opcional, no crítico)
-        # Nota: Esta función solo existe si se creó la vista materializada manualmente en Supabase
-        # Por ahora, simplemente omitimos este paso para evitar errores
-        # Si necesitas la vista materializada, créala manualmente en Supabase con el script correspondiente
-        pass  # Comentado temporalmente hasta que se cree la vista materializada en Supabase
+        # Refrescar vista materializada y avisar a las páginas si se publicó algo
+        # (opcional, no crítico)
+        if successful:
+            self.refresh_materialized_view()
+            published = [t for t, r in results.items() if not r.get('skipped') and r['success']]
+            self.bump_data_version(published + [self.TABLERO_DATASET, self.SYNC_DATASET])
         
         return results
     
+    def refresh_materialized_view(self) -> bool:
+        """
+        Refresca la vista materializada del tablero sin bloquear lecturas
+        (REFRESH ... CONCURRENTLY). Si la vista no existe en Supabase no hace nada.
+        
+        Returns:
+            True si se refrescó
+        """
+        try:
+            supabase_conn = self.get_supabase_connection()
+        except Exception as e:
+            logger.warning(f"No se pudo conectar para refrescar la vista materializada: {e}")
+            return False
+        try:
+            exists = supabase_conn.execute(
+                text("SELECT to_regclass(:name) IS NOT NULL"), {"name": self.MATERIALIZED_VIEW}
+            ).scalar()
+            supabase_conn.rollback()
+            if not exists:
+                logger.info(f"{self.MATERIALIZED_VIEW} no existe en Supabase, se omite el refresco")
+                return False
+            started = time.perf_counter()
+            trans = supabase_conn.begin()
+            supabase_conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {self.MATERIALIZED_VIEW}"))
+            trans.commit()
+            logger.info(f"Vista materializada refrescada en {time.perf_counter() - started:.1f}s")
+            return True
+        except Exception as e:
+            logger.warning(f"No se pudo refrescar {self.MATERIALIZED_VIEW}: {e}")
+            return False
+        finally:
+            supabase_conn.close()
+    
+    def bump_data_version(self, datasets: List[str]) -> bool:
+        """
+        Sube la versión de `datasets` en public.data_version para que las páginas
+        descarten su caché y muestren los datos nuevos. Si la función no existe
+        en Supabase no hace nada.
+        
+        Returns:
+            True si se registraron las versiones
+        """
+        try:
+            with self.get_supabase_connection() as supabase_conn:
+                exists = supabase_conn.execute(
+                    text("SELECT to_regprocedure(:name) IS NOT NULL"), {"name": self.DATA_VERSION_FUNCTION}
+                ).scalar()
+                if not exists:
+                    supabase_conn.rollback()
+                    logger.info("bump_data_version no existe en Supabase, se omiten las versiones")
+                    return False
+                supabase_conn.execute(
+                    text("SELECT public.bump_data_version(CAST(:datasets AS text[]))"),
+                    {"datasets": list(datasets)}
+                )
+                supabase_conn.commit()
+            logger.info(f"Versiones de datos actualizadas: {datasets}")
+            return True
+        except Exception as e:
+            logger.warning(f"No se pudieron actualizar las versiones de datos: {e}")
+            return False
+    
     def sync_table_incremental(self, table_name: str, schema: str = 'siciap', 
                               timestamp_column: str = 'actualizado_en') -> bool:
         """
@@ -245,6 +622,9 @@ class SyncManager:
             with self.get_supabase_connection() as supabase_conn:
                 trans = supabase_conn.begin()
                 try:
+                    # Las columnas generadas (*_norm) las calcula Supabase
+                    insertable = self._get_supabase_table_columns(supabase_conn, table_name)
+                    df = df[[c for c in df.columns if c in insertable]]
                     # Usar upsert si hay clave primaria, sino insertar
                     df.to_sql(
                         table_name,
@@ -310,6 +690,7 @@ class SyncManager:
 def main():
     """Función principal para ejecutar sincronización desde línea de comandos"""
     import sys
+    import argparse
     
     # Configurar logging
     logging.basicConfig(
@@ -321,20 +702,54 @@ def main():
         ]
     )
     
+    parser = argparse.ArgumentParser(description="Sincroniza PostgreSQL local → Supabase")
+    parser.add_argument('tables', nargs='*', metavar='tabla',
+                        help="Tablas específicas (siempre se sincronizan)")
+    parser.add_argument('--force', action='store_true',
+                        help="Sincronizar todas las tablas aunque no tengan cambios")
+    parser.add_argument('--atomico', action='store_true',
+                        help="Publicar todas las tablas juntas en un único swap")
+    parser.add_argument('--plan', action='store_true',
+                        help="Solo mostrar qué se subiría y cuánto tardaría (no sincroniza)")
+    args = parser.parse_args()
+    
     sync_manager = SyncManager()
     
-    if len(sys.argv) > 1:
+    if args.plan:
+        plan = sync_manager.plan(tables=args.tables or None, force=args.force or bool(args.tables))
+        print("\n=== Plan de Sincronización ===")
+        print(f"{'Tabla':<22}{'Filas':>10}{'MB':>9}{'Filas/s':>10}{'Estimado':>10}  Acción")
+        for entry in plan['tables']:
+            rows = f"{entry['rows']:,}" if entry['rows'] is not None else "N/A"
+            size = f"{entry['bytes'] / 1_048_576:.1f}" if entry['bytes'] is not None else "N/A"
+            rate = f"{entry['rows_per_second']:,.0f}" + ("" if entry['historical'] else "*")
+            estimated = f"{entry['estimated_seconds']:.0f}s" if entry['estimated_seconds'] is not None else "N/A"
+            action = "sincronizar" if entry['dirty'] else "sin cambios"
+            print(f"{entry['table']:<22}{rows:>10}{size:>9}{rate:>10}{estimated:>10}  {action}")
+        print(f"\nTotal a subir: {plan['total_rows']:,} filas, "
+              f"{plan['total_bytes'] / 1_048_576:.1f} MB, ~{plan['estimated_seconds']:.0f}s")
+        print("* throughput supuesto (la tabla no tiene sincronizaciones previas)")
+        return
+    
+    if len(args.tables) == 1 and not args.atomico:
         # Sincronizar tabla específica
-        table_name = sys.argv[1]
-        success = sync_manager.sync_table(table_name)
+        success = sync_manager.sync_table(args.tables[0])
+        if success:
+            sync_manager.refresh_materialized_view()
+            sync_manager.bump_data_version([args.tables[0], SyncManager.TABLERO_DATASET,
+                                            SyncManager.SYNC_DATASET])
         sys.exit(0 if success else 1)
     else:
-        # Sincronizar todas las tablas
-        results = sync_manager.sync_all_tables()
+        # Sincronizar tablas elegidas, modificadas (o todas con --force)
+        results = sync_manager.sync_all_tables(force=args.force, atomic=args.atomico,
+                                               tables=args.tables or None)
         
         # Mostrar resumen
         print("\n=== Resumen de Sincronización ===")
         for table, result in results.items():
+            if result.get('skipped'):
+                print(f"[SKIP] {table}: sin cambios desde la última sincronización")
+                continue
             status = "[OK]" if result['success'] else "[ERROR]"
             print(f"{status} {table}: {result.get('synced_at', 'N/A')}")
         
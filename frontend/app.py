@@ -16,6 +16,7 @@ root_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(root_dir))
 
 from frontend.utils.db_connection import test_connection
+from frontend.utils.estado_conexion import get_estado_conexion
 
 st.set_page_config(
     page_title="SICIAP Cloud - Sistema Integrado",
@@ -32,12 +33,15 @@ db_host = os.getenv("DB_HOST", "localhost")
 # SI EL HOST ES 'localhost', ESTAMOS EN TU PC.
 ES_LOCAL = "localhost" in db_host or "127.0.0.1" in db_host
 
-# Verificar conexiones para mostrar estado
-supabase_connected = test_connection(use_supabase=True)
+# Estado de la conexión: último resultado conocido, verificado en segundo plano
+# (la página no espera la red; el indicador se actualiza en la próxima ejecución)
+supabase_connected = get_estado_conexion().consultar()
 local_connected = test_connection(use_supabase=False)
 
 # Indicador de estado
-if supabase_connected:
+if supabase_connected is None:
+    st.markdown('<div style="position: fixed; top: 10px; right: 10px; background-color: #6c757d; color: white; padding: 5px 10px; border-radius: 5px; font-size: 12px; z-index: 1000;">⚪ Verificando conexión</div>', unsafe_allow_html=True)
+elif supabase_connected:
     st.markdown('<div style="position: fixed; top: 10px; right: 10px; background-color: #28a745; color: white; padding: 5px 10px; border-radius: 5px; font-size: 12px; z-index: 1000;">🟢 Supabase Conectado</div>', unsafe_allow_html=True)
 elif local_connected:
     st.markdown('<div style="position: fixed; top: 10px; right: 10px; background-color: #ffc107; color: black; padding: 5px 10px; border-radius: 5px; font-size: 12px; z-index: 1000;">🟡 Modo Local</div>', unsafe_allow_html=True)
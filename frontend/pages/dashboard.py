@@ -7,39 +7,40 @@ UI: semáforos de stock, alertas de vencimientos, formato numérico profesional.
 import streamlit as st
 import pandas as pd
 from st_aggrid import AgGrid, GridOptionsBuilder, JsCode
-from frontend.utils.db_connection import get_supabase_client, fetch_vista_tablero
-from datetime import datetime
+from frontend.utils.db_connection import get_supabase_client, VISTA_TABLERO_LIMIT
+from frontend.utils.data_version import (
+    version_de,
+    publicar_en_segundo_plano,
+    avisar_publicacion_fallida,
+    CACHE_MAX_ENTRIES,
+    DATASET_TABLERO,
+    DATASET_SINCRONIZACION,
+)
+from frontend.utils.cache_registry import invalidar
+from frontend.utils.tablero_cache import get_tablero_cache
+from frontend.utils.tablero_service import obtener_tablero
+from frontend.utils.ediciones import filas_modificadas, upsert_por_lotes, resumen_errores
+from frontend.utils.grid_config import firma_columnas, frame_de_firma, memo_sesion, descartar_memos
+from datetime import datetime, timezone
 
 supabase = get_supabase_client()
 
+# Tablero de la sesión (ver grid_config.memo_sesion)
+MEMO_TABLERO = "dashboard_df"
+
 st.title("Dashboard SICIAP - Vencimientos y Distribución")
+avisar_publicacion_fallida()
 
-@st.cache_data(ttl=300)
 def load_data():
+    """Tablero compartido (tablero_service, el mismo de los otros dashboards)."""
     if not supabase:
         return pd.DataFrame()
-    try:
-        data = fetch_vista_tablero(supabase)
-        if data:
-            return pd.DataFrame(data)
-        return pd.DataFrame()
-    except Exception as e:
-        st.error(f"Error cargando datos de la API: {e}")
-        return pd.DataFrame()
-
-df = load_data()
-
-col1, col2 = st.columns([1, 4])
-with col1:
-    if st.button("🔄 Actualizar datos"):
-        st.cache_data.clear()
-        st.rerun()
+    return obtener_tablero(supabase).head(VISTA_TABLERO_LIMIT)
 
-if df.empty:
-    st.warning("No hay datos disponibles. Ejecuta la sincronización primero o verifica la conexión.")
-else:
-    st.write("### Tabla de Gestión de Pedidos (~3 meses aproximados)")
-    
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def opciones_grilla(firma):
+    """gridOptions de la tabla: se arman una vez por firma de columnas (no en cada re-ejecución)."""
+    df = frame_de_firma(firma)
     gb = GridOptionsBuilder.from_dataframe(df)
     gb.configure_default_column(editable=False, filter=True, sortable=True)
 
@@ -122,7 +123,26 @@ else:
     # Paginación para no congelar el navegador con miles de filas
     gb.configure_pagination(paginationAutoPageSize=False, paginationPageSize=20)
 
-    gridOptions = gb.build()
+    return gb.build()
+
+
+# Sin cambios en los datos, las re-ejecuciones reutilizan el mismo DataFrame (sin copiar)
+df = memo_sesion(MEMO_TABLERO, version_de(DATASET_TABLERO, DATASET_SINCRONIZACION), load_data)
+
+col1, col2 = st.columns([1, 4])
+with col1:
+    if st.button("🔄 Actualizar datos"):
+        descartar_memos(MEMO_TABLERO)
+        get_tablero_cache().limpiar()
+        invalidar(DATASET_TABLERO)
+        st.rerun()
+
+if df.empty:
+    st.warning("No hay datos disponibles. Ejecuta la sincronización primero o verifica la conexión.")
+else:
+    st.write("### Tabla de Gestión de Pedidos (~3 meses aproximados)")
+    
+    gridOptions = opciones_grilla(firma_columnas(df))
 
     grid_response = AgGrid(
         df,
@@ -136,16 +156,16 @@ else:
 
     if st.button("💾 Guardar cambios"):
         df_editado = pd.DataFrame(grid_response['data'])
-        df_cambios = df_editado.compare(df, keep_shape=False, keep_equal=False)
+        # Solo columnas editables, comparadas por clave y de forma vectorial
+        df_cambios = filas_modificadas(df, df_editado, ['id_llamado', 'licitacion', 'codigo', 'item'],
+                                       {'cantidad_solicitada': 'numero', 'ver_en_fecha': 'fecha'})
         
         if df_cambios.empty:
             st.info("No se detectaron cambios para guardar.")
         else:
             registros_a_guardar = []
-            filas_modificadas = df_cambios.index.unique()
             
-            for idx in filas_modificadas:
-                fila_actual = df_editado.loc[idx]
+            for _, fila_actual in df_cambios.iterrows():
                 
                 fecha_emitir = fila_actual.get('ver_en_fecha')
                 if isinstance(fecha_emitir, pd.Timestamp):
@@ -158,14 +178,21 @@ else:
                     "item": str(fila_actual.get('item', '')),
                     "cantidad_solicitada": float(fila_actual['cantidad_solicitada']),
                     "emitir_en": fecha_emitir,
-                    "actualizado_en": datetime.now().isoformat()
+                    "actualizado_en": datetime.now(timezone.utc).isoformat()
                 }
                 registros_a_guardar.append(registro)
 
-            try:
-                resultado = supabase.table("cantidad_solicitada").upsert(registros_a_guardar).execute()
-                st.success(f"¡Se guardaron {len(registros_a_guardar)} registros correctamente!")
-                st.cache_data.clear()
+            guardados, errores = upsert_por_lotes(supabase, "cantidad_solicitada", registros_a_guardar)
+            if not errores:
+                # Actualización optimista; el refresco de la vista corre en segundo plano
+                get_tablero_cache().aplicar_cantidades(registros_a_guardar)
+            if guardados:
+                publicar_en_segundo_plano(supabase, "cantidad_solicitada", DATASET_TABLERO)
+                invalidar("cantidad_solicitada")
+                descartar_memos(MEMO_TABLERO)
+            if errores:
+                st.error(f"Error al guardar los cambios en la API: {resumen_errores(errores)}")
+                st.warning(f"Se guardaron {guardados} de {len(registros_a_guardar)} registros.")
+            else:
+                st.success(f"¡Se guardaron {guardados} registros correctamente!")
                 st.rerun()
-            except Exception as e:
-                st.error(f"Error al guardar los cambios en la API: {e}")
@@ -3,16 +3,37 @@ Dashboard Editable SICIAP Cloud - Dashboard Operativo (Editar y Anexar)
 Permite editar cantidad solicitada y agregar datos de contratos.
 Solo API REST de Supabase (sin SQLAlchemy).
 """
+import numpy as np
 import streamlit as st
 import pandas as pd
-from frontend.utils.db_connection import get_supabase_client, fetch_all_data
-try:
-    from frontend.utils.db_connection import fetch_vista_tablero_todos
-except ImportError:
-    fetch_vista_tablero_todos = None
-from frontend.utils.db_connection import fetch_vista_tablero, VISTA_TABLERO_LIMIT
-from datetime import datetime, date
-import time
+from frontend.utils.db_connection import (
+    get_supabase_client,
+    fetch_vista_tablero_bloque,
+    fetch_tablero_licitaciones,
+    fetch_llamados_contrato,
+)
+from frontend.utils.data_version import (
+    version_de,
+    publicar_en_segundo_plano,
+    avisar_publicacion_fallida,
+    CACHE_MAX_ENTRIES,
+    DATASET_TABLERO,
+    DATASET_SINCRONIZACION,
+)
+from frontend.utils.cache_registry import cache_de, invalidar
+from frontend.utils.tablero_cache import (
+    get_tablero_cache,
+    normalizar_tablero,
+    superponer_cantidades,
+    superponer_datos_contrato,
+    vista_compartida,
+    CLAVE_TABLERO,
+)
+from frontend.utils.tablero_service import obtener_tablero
+from frontend.utils.ediciones import filas_modificadas, upsert_por_lotes, resumen_errores
+from frontend.utils.async_data import fetch_concurrente, consulta_tabla
+from frontend.utils.grid_config import firma_columnas, frame_de_firma, memo_sesion, descartar_memos
+from datetime import datetime, date, timezone
 
 # AgGrid (opcional)
 try:
@@ -22,34 +43,213 @@ except ImportError:
     AGGrid_AVAILABLE = False
     JsCode = None
 
+# Clave y columnas editables de la grilla de pedidos (títulos visibles)
+CLAVE_GRILLA = ["ID Llamado", "Licitación", "Código", "Ítem"]
+EDITABLES_GRILLA = {"Cantidad solicitada": "numero", "Ver en fecha": "fecha"}
+
+# Claves de st.session_state con la grilla ya preparada (ver grid_config.memo_sesion)
+MEMO_GRILLA = "pedidos_df"
+MEMO_GRILLA_RENDIMIENTO = "pedidos_df_rendimiento"
+
+# Guardados que la vista materializada todavía no refleja: clave de st.session_state
+# -> columnas que identifican cada registro (el último guardado gana)
+CLAVES_PENDIENTES = {
+    "pedidos_pendientes": CLAVE_TABLERO,
+    "contrato_pendiente": ["id_llamado"],
+}
+
+# Modos de carga de la grilla de pedidos
+MODO_BLOQUES = "Por bloques (servidor)"
+MODO_COMPLETO = "Tablero completo"
+# Grilla por bloques: orden elegido -> orden en Supabase (None = clave, keyset)
+ORDENES_BLOQUE = {
+    "ID Llamado / Licitación / Código / Ítem": None,
+    "Cobertura (menor primero)": ["cobertura_meses"],
+    "Cantidad solicitada (mayor primero)": ["-cantidad_solicitada"],
+    "Producto (A-Z)": ["producto"],
+}
+NIVELES_STOCK = ["Crítico", "Atención", "Óptimo", "Sin Stock", "Sin DMP"]
+
+# Modo rendimiento: activado por defecto desde esta cantidad de filas
+FILAS_MODO_RENDIMIENTO = 5000
+# Días hacia adelante en que "Ver en fecha" se marca como próxima
+DIAS_ALERTA_FECHA = 15
+# Clases CSS del modo rendimiento (mismos colores que los cellStyle/getRowStyle JsCode)
+CSS_RENDIMIENTO = {
+    ".ag-cell.sem-rojo": {"color": "#900000 !important", "background-color": "#ffcccc !important", "font-weight": "bold"},
+    ".ag-cell.sem-verde": {"color": "#005000 !important", "background-color": "#ccffcc !important"},
+    ".ag-cell.sem-amarillo": {"color": "#856404 !important", "background-color": "#ffffcc !important", "font-weight": "bold"},
+    ".ag-cell.fecha-vacia": {"background-color": "#e6f2ff !important"},
+    ".ag-cell.fecha-vencida": {"color": "#721c24 !important", "background-color": "#ffcccc !important", "font-weight": "bold"},
+    ".ag-cell.fecha-proxima": {"color": "#856404 !important", "background-color": "#fff3cd !important", "font-weight": "bold"},
+    ".ag-cell.fecha-ok": {"color": "#155724 !important", "background-color": "#d4edda !important"},
+    ".ag-row.fila-critica": {"background-color": "#f8d7da !important"},
+}
+# Columnas auxiliares del modo rendimiento (ocultas en la grilla)
+COLUMNAS_CLASES = ["_semaforo_nivel", "_semaforo_parque", "_alerta_fecha", "_fila_critica"]
+
 
-@st.cache_data(ttl=300)
-def load_vista_unificada():
-    """Carga registros de la vista: por lotes si existe fetch_vista_tablero_todos, sino hasta VISTA_TABLERO_LIMIT."""
+@cache_de(DATASET_TABLERO)
+def load_bloque_pedidos(tamano, cursor, inicio, licitacion, nivel_stock, busqueda, orden, version=None):
+    """Un bloque de la grilla con filtros y orden resueltos en Supabase. Retorna (df, total)."""
     try:
-        client = get_supabase_client()
-        if client is None:
-            return pd.DataFrame()
-        if fetch_vista_tablero_todos is not None:
-            data = fetch_vista_tablero_todos(client)
-        else:
-            data = fetch_vista_tablero(client, limit=VISTA_TABLERO_LIMIT)
-        if not data:
-            return pd.DataFrame()
-        df = pd.DataFrame(data)
-        sort_cols = [c for c in ['id_llamado', 'licitacion', 'codigo', 'item'] if c in df.columns]
-        if sort_cols:
-            df = df.sort_values(sort_cols).reset_index(drop=True)
-        return df
+        filas, total = fetch_vista_tablero_bloque(
+            get_supabase_client(), tamano=tamano, cursor=cursor, inicio=inicio,
+            licitacion=licitacion, nivel_stock=nivel_stock, busqueda=busqueda, orden=orden,
+        )
+        # Mismo formato que el tablero compartido, sin reordenar (orden del servidor)
+        return normalizar_tablero(pd.DataFrame(filas), ordenar=False), total
     except Exception as e:
-        st.error(f"Error cargando vista unificada: {e}")
-        return pd.DataFrame()
+        st.error(f"Error cargando el bloque: {e}")
+        return pd.DataFrame(), None
+
+
+@cache_de(DATASET_TABLERO)
+def load_licitaciones_bloque(version=None):
+    """Licitaciones para el filtro de la grilla por bloques ([] si falta la RPC)."""
+    return fetch_tablero_licitaciones(get_supabase_client()) or []
+
+
+def _semaforo(valores: pd.Series) -> np.ndarray:
+    """rojo / verde / amarillo según el texto del estado (mismo orden que estado_jscode)."""
+    texto = valores.fillna("").astype(str)
+    return np.select(
+        [
+            texto.str.contains("Requiere|Crítico|Sin Stock"),
+            texto.str.contains("Adecuado|Normal|Óptimo"),
+            texto.str.contains("Precaución|Atención|Sin DMP"),
+        ],
+        ["rojo", "verde", "amarillo"],
+        default="",
+    )
+
+
+def _precalcular_clases(df_display: pd.DataFrame) -> pd.DataFrame:
+    """
+    Modo rendimiento: lo que la grilla calculaba con JavaScript en cada celda
+    (semáforos, alerta de fecha, fila crítica y cobertura) se calcula una vez en
+    pandas como columnas; la grilla solo asigna clases CSS con
+    cellClassRules / rowClassRules.
+    """
+    if "Nivel stock" in df_display.columns:
+        df_display["_semaforo_nivel"] = _semaforo(df_display["Nivel stock"])
+    if "estado_parque" in df_display.columns:
+        df_display["_semaforo_parque"] = _semaforo(df_display["estado_parque"])
+
+    fecha = pd.to_datetime(df_display["Ver en fecha"], errors="coerce").dt.normalize()
+    dias = (fecha - pd.Timestamp.today().normalize()).dt.days
+    df_display["_alerta_fecha"] = np.select(
+        [fecha.isna(), dias < 0, dias <= DIAS_ALERTA_FECHA],
+        ["vacia", "vencida", "proxima"],
+        default="ok",
+    )
+
+    # Misma cobertura que el valueGetter del modo normal: (stock + cantidad) / DMP
+    if {"Stock actual", "Cantidad solicitada", "DMP"} <= set(df_display.columns):
+        stock = pd.to_numeric(df_display["Stock actual"], errors="coerce").fillna(0)
+        cantidad = pd.to_numeric(df_display["Cantidad solicitada"], errors="coerce").fillna(0)
+        dmp = pd.to_numeric(df_display["DMP"], errors="coerce").fillna(0)
+        cobertura = (stock + cantidad) / dmp.where(dmp != 0)
+        if "Cobertura (meses)" in df_display.columns:
+            df_display["Cobertura (meses)"] = cobertura
+        df_display["_fila_critica"] = (cobertura < 1).to_numpy()
+    return df_display
+
+
+def _recordar_pendientes(clave, registros):
+    """
+    Guarda `registros` en st.session_state[clave] para superponerlos al bloque hasta
+    que la vista se refresque. Si la versión no cambió, se suman a los pendientes
+    anteriores (por clave, el último gana) en lugar de reemplazarlos.
+    """
+    version = version_de(DATASET_TABLERO)
+    columnas = CLAVES_PENDIENTES[clave]
+    pendientes = st.session_state.get(clave)
+    previos = pendientes["registros"] if pendientes and pendientes["version"] == version else []
+    por_clave = {tuple(r.get(c) for c in columnas): r for r in previos}
+    por_clave.update((tuple(r.get(c) for c in columnas), r) for r in registros)
+    st.session_state[clave] = {"version": version, "registros": list(por_clave.values())}
+
+
+def _sello_pendientes(clave):
+    """Cambia con cada guardado pendiente (para la firma de la grilla)."""
+    pendientes = st.session_state.get(clave)
+    if not pendientes:
+        return None
+    return len(pendientes["registros"]), max(r.get("actualizado_en") or "" for r in pendientes["registros"])
+
+
+def _cargar_bloque_pedidos(filas_pagina):
+    """
+    Grilla por bloques: licitación, nivel, búsqueda y orden se aplican en Supabase
+    y al navegador llega solo el bloque visible, así el tiempo de carga y la
+    memoria no crecen con la cantidad de órdenes.
+    Retorna (bloque, clave para memo_sesion).
+    """
+    version = version_de(DATASET_TABLERO)
+    col_lic, col_nivel, col_buscar, col_orden = st.columns(4)
+    licitacion = col_lic.selectbox(
+        "Licitación", ["Todas"] + load_licitaciones_bloque(version=version), key="bloque_licitacion"
+    )
+    nivel = col_nivel.selectbox("Nivel stock", ["Todos"] + NIVELES_STOCK, key="bloque_nivel")
+    busqueda = col_buscar.text_input("Buscar producto o código", key="bloque_busqueda").strip()
+    orden_label = col_orden.selectbox("Ordenar por", list(ORDENES_BLOQUE), key="bloque_orden")
+    orden = ORDENES_BLOQUE[orden_label]
+    licitacion = None if licitacion == "Todas" else licitacion
+    nivel = None if nivel == "Todos" else nivel
+
+    # Otro filtro u orden: volver al primer bloque
+    firma = (licitacion, nivel, busqueda, orden_label, filas_pagina)
+    if st.session_state.get("bloque_firma") != firma:
+        st.session_state["bloque_firma"] = firma
+        st.session_state["bloque_cursores"] = [None]
+        st.session_state["bloque_pagina"] = 0
+    pagina = st.session_state["bloque_pagina"]
+    cursores = st.session_state["bloque_cursores"]
+
+    df, total = load_bloque_pedidos(
+        filas_pagina,
+        cursores[pagina] if orden is None else None,
+        0 if orden is None else pagina * filas_pagina,
+        licitacion, nivel, busqueda or None, orden,
+        version=version,
+    )
+    # Keyset: el bloque siguiente empieza después de la última clave de este
+    if orden is None and len(df) == filas_pagina and len(cursores) == pagina + 1:
+        ultima = df[CLAVE_TABLERO].tail(1).astype(object)
+        cursores.append(ultima.where(ultima.notna(), None).to_dict("records")[0])
+
+    # Guardados que la vista todavía no refleja (refresco en segundo plano)
+    for clave, superponer in (("pedidos_pendientes", superponer_cantidades),
+                              ("contrato_pendiente", superponer_datos_contrato)):
+        pendientes = st.session_state.get(clave)
+        if pendientes and pendientes["version"] == version:
+            df = superponer(df, pendientes["registros"])
+        elif pendientes:
+            st.session_state.pop(clave, None)
+
+    hay_siguiente = len(df) == filas_pagina and (total is None or (pagina + 1) * filas_pagina < total)
+    col_ant, col_sig, col_info = st.columns([1, 1, 4])
+    if col_ant.button("◀ Anterior", disabled=pagina == 0, key="bloque_anterior"):
+        st.session_state["bloque_pagina"] = pagina - 1
+        st.rerun()
+    if col_sig.button("Siguiente ▶", disabled=not hay_siguiente, key="bloque_siguiente"):
+        st.session_state["bloque_pagina"] = pagina + 1
+        st.rerun()
+    if total is not None:
+        paginas = max(1, -(-total // filas_pagina))
+        col_info.caption(f"📊 Bloque **{pagina + 1}** de **{paginas}** · **{total:,}** registros con estos filtros.")
+    else:
+        col_info.caption(f"📊 Bloque **{pagina + 1}**.")
+    return df, ("bloques", firma, pagina, version, _sello_pendientes("pedidos_pendientes"),
+                _sello_pendientes("contrato_pendiente"))
 
 
 def guardar_cantidad_solicitada(filas_a_guardar):
     """
-    Guarda cantidad_solicitada y emitir_en vía API REST (upsert).
-    Retorna (cantidad_guardada, mensaje_error).
+    Guarda cantidad_solicitada y emitir_en vía API REST (upsert por lotes).
+    Retorna (cantidad_guardada, mensaje_error); con error en algunos lotes el resto
+    igual se guarda.
     """
     if not filas_a_guardar:
         return 0, ""
@@ -80,11 +280,18 @@ def guardar_cantidad_solicitada(filas_a_guardar):
                 "item": str(row.get("item", "") or ""),
                 "cantidad_solicitada": float(row["cantidad_solicitada"]),
                 "emitir_en": emitir_en,
-                "actualizado_en": datetime.now().isoformat(),
+                "actualizado_en": datetime.now(timezone.utc).isoformat(),
             })
 
-        client.table("cantidad_solicitada").upsert(registros).execute()
-        return len(registros), ""
+        guardados, errores = upsert_por_lotes(client, "cantidad_solicitada", registros)
+        if not errores:
+            # Se ve al instante en la copia del tablero; la vista se pone al día sola
+            get_tablero_cache().aplicar_cantidades(registros)
+            _recordar_pendientes("pedidos_pendientes", registros)
+        if guardados:
+            # La vista materializada no ve el upsert hasta refrescarla (en segundo plano)
+            publicar_en_segundo_plano(client, "cantidad_solicitada", DATASET_TABLERO)
+        return guardados, resumen_errores(errores) or ""
     except Exception as e:
         return 0, str(e)
 
@@ -103,51 +310,26 @@ def guardar_datosejecucion(id_llamado, licitacion, vigente, dirigido_a, lugares,
             "dirigido_a": dirigido_a or "",
             "lugares": lugares or "",
             "observaciones_generales": observaciones or "",
-            "actualizado_en": datetime.now().isoformat(),
+            "actualizado_en": datetime.now(timezone.utc).isoformat(),
         }
         client.table("datosejecucion").upsert([registro]).execute()
+        # Se ve al instante en la copia del tablero; la vista se pone al día sola
+        get_tablero_cache().aplicar_datos_contrato([registro])
+        _recordar_pendientes("contrato_pendiente", [registro])
+        publicar_en_segundo_plano(client, "datosejecucion", DATASET_TABLERO)
         return True, ""
     except Exception as e:
         return False, str(e)
 
 
-def _render_gestion_pedidos():
-    """Pestaña 1: Gestión de Pedidos (Grilla editable)"""
-    st.markdown("### 📋 Gestión de Pedidos")
-    st.caption("Editá **Cantidad solicitada** y **Ver en fecha** en la grilla. Las filas con cobertura < 1 mes se muestran en ROJO.")
-
-    if not AGGrid_AVAILABLE:
-        st.error("Para usar la grilla editable necesitás **streamlit-aggrid**. Instalalo con: `pip install streamlit-aggrid`")
-        return
-
-    if st.button("🔄 Cargar / Actualizar datos", key="pedidos_cargar"):
-        st.session_state.pop("pedidos_df", None)
-        st.cache_data.clear()
-        st.rerun()
-
-    with st.spinner("Cargando todos los registros (por lotes)..."):
-        df = load_vista_unificada()
-
-    if df.empty:
-        st.info("No hay datos disponibles. Sincronizá primero desde Importar Excel.")
-        return
-
-    # Normalizar nombres de columnas
-    df.columns = [c.lower() if isinstance(c, str) else c for c in df.columns]
-
-    # Eliminar duplicados
-    if not df.empty:
-        key_cols = ['id_llamado', 'licitacion', 'codigo', 'item']
-        key_cols = [c for c in key_cols if c in df.columns]
-        if key_cols:
-            df['_completitud'] = df.notna().sum(axis=1)
-            df = df.sort_values('_completitud', ascending=False).drop_duplicates(
-                subset=key_cols,
-                keep='first'
-            ).drop(columns=['_completitud'], errors='ignore')
-
+def _preparar_display(df):
+    """
+    Tablero (ya normalizado por tablero_service) con los títulos de la grilla.
+    rename comparte los datos con el tablero del servidor (copy-on-write): la
+    sesión no guarda una copia propia.
+    """
     # Títulos profesionales para la grilla (no snake_case ni MAYÚSCULAS sueltas)
-    df_display = df.copy()
+    df_display = df
     rename_map = {
         'id_llamado': 'ID Llamado',
         'licitacion': 'Licitación',
@@ -177,20 +359,17 @@ def _render_gestion_pedidos():
 
     if 'Ver en fecha' not in df_display.columns:
         df_display['Ver en fecha'] = pd.NaT
+    return df_display
 
-    # Sin tope de órdenes: se cargan todas (por lotes). Espacio adaptable.
-    total_reg = len(df_display)
-    st.caption(f"📊 **{total_reg:,}** registros cargados (sin límite; crece con tus datos).")
-
-    filas_pagina = st.selectbox(
-        "Filas por página",
-        options=[50, 100, 200, 500],
-        index=1,
-        key="pedidos_filas_pagina",
-        help="Aumentá cuando tengas más órdenes para ver más filas a la vez.",
-    )
 
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _opciones_grilla(firma, por_bloques, filas_pagina, liviano):
+    """
+    gridOptions de la grilla de pedidos. Dependen solo de las columnas (firma) y
+    de los modos elegidos: se arman una vez y las re-ejecuciones las reutilizan.
+    """
     # Configurar AgGrid: columnas legibles, filtros tipo Excel (simples: una condición, sin AND/OR).
+    df_display = frame_de_firma(firma)
     gb = GridOptionsBuilder.from_dataframe(df_display)
     # Filtro de texto por defecto: solo "Contiene" (una condición), sin AND/OR.
     filter_params_texto = {"suppressAndOrCondition": True, "defaultOption": "contains"}
@@ -202,8 +381,9 @@ def _render_gestion_pedidos():
         min_column_width=150,
         wrapHeaderText=True,
         autoHeaderHeight=True,
-        wrapText=True,
-        autoHeight=True,
+        # Alto de fila variable: caro con muchas filas (modo rendimiento lo desactiva)
+        wrapText=not liviano,
+        autoHeight=not liviano,
         filter="agTextColumnFilter",
         filterParams=filter_params_texto,
     )
@@ -294,10 +474,16 @@ def _render_gestion_pedidos():
             return null;
         }
         """)
-        if "estado_parque" in df_display.columns:
-            gb.configure_column("estado_parque", cellStyle=estado_jscode)
-        if "Nivel stock" in df_display.columns:
-            gb.configure_column("Nivel stock", cellStyle=estado_jscode)
+        semaforos = {"estado_parque": "_semaforo_parque", "Nivel stock": "_semaforo_nivel"}
+        for col, clase in semaforos.items():
+            if col not in df_display.columns:
+                continue
+            if liviano:
+                gb.configure_column(col, cellClassRules={
+                    f"sem-{color}": f"data.{clase} == '{color}'" for color in ("rojo", "verde", "amarillo")
+                })
+            else:
+                gb.configure_column(col, cellStyle=estado_jscode)
 
         # --- Columna DMP: resaltar como indicador clave ---
         if "DMP" in df_display.columns:
@@ -322,13 +508,20 @@ def _render_gestion_pedidos():
             return { backgroundColor: '#d4edda', color: '#155724' };
         }
         """)
+        if liviano:
+            estilo_fecha = {"cellClassRules": {
+                f"fecha-{alerta}": f"data._alerta_fecha == '{alerta}'"
+                for alerta in ("vacia", "vencida", "proxima", "ok")
+            }}
+        else:
+            estilo_fecha = {"cellStyle": fecha_alerta_jscode}
         gb.configure_column(
             "Ver en fecha",
             editable=True,
             cellEditor="agDateCellEditor",
             filter="agDateColumnFilter",
             filterParams={"suppressAndOrCondition": True},
-            cellStyle=fecha_alerta_jscode,
+            **estilo_fecha,
         )
 
     # --- Columna editable Cantidad solicitada: fondo azulado ---
@@ -336,10 +529,24 @@ def _render_gestion_pedidos():
         gb.configure_column("Cantidad solicitada", editable=True, cellStyle={'backgroundColor': '#e6f2ff'})
 
     # --- Cobertura (meses) = (Stock actual + Cantidad solicitada) / DMP; se recalcula al editar cantidad ---
+    # (modo rendimiento: ya viene calculada en la columna y la fila crítica como clase)
     if JsCode is not None and "Cobertura (meses)" in df_display.columns:
-        gb.configure_column(
-            "Cobertura (meses)",
-            valueGetter=JsCode("""
+        formato_cobertura = JsCode("""
+            function(params) {
+                if (params.value == null || params.value === '') return '';
+                var n = Number(params.value);
+                if (isNaN(n)) return params.value;
+                return n.toLocaleString('es-AR', { minimumFractionDigits: 1, maximumFractionDigits: 1 });
+            }
+            """)
+        if liviano:
+            gb.configure_column("Cobertura (meses)", valueFormatter=formato_cobertura)
+            if "_fila_critica" in df_display.columns:
+                gb.configure_grid_options(rowClassRules={"fila-critica": "data._fila_critica"})
+        else:
+            gb.configure_column(
+                "Cobertura (meses)",
+                valueGetter=JsCode("""
             function(params) {
                 var stock = params.data && params.data["Stock actual"];
                 var cant = params.data && params.data["Cantidad solicitada"];
@@ -351,17 +558,10 @@ def _render_gestion_pedidos():
                 return (s + c) / d;
             }
             """),
-            valueFormatter=JsCode("""
-            function(params) {
-                if (params.value == null || params.value === '') return '';
-                var n = Number(params.value);
-                if (isNaN(n)) return params.value;
-                return n.toLocaleString('es-AR', { minimumFractionDigits: 1, maximumFractionDigits: 1 });
-            }
-            """),
-        )
-        gb.configure_grid_options(
-            getRowStyle=JsCode("""
+                valueFormatter=formato_cobertura,
+            )
+            gb.configure_grid_options(
+                getRowStyle=JsCode("""
 function(params) {
   var d = params.data;
   if (!d) return null;
@@ -374,13 +574,97 @@ function(params) {
   return null;
 }
 """)
-        )
+            )
+
+    # Columnas auxiliares del modo rendimiento: solo para las reglas de clases
+    for col in COLUMNAS_CLASES:
+        if col in df_display.columns:
+            gb.configure_column(col, hide=True, suppressColumnsToolPanel=True, filter=False)
 
     # Paginación: filas por página elegidas por el usuario; sin tope total de registros.
-    gb.configure_pagination(enabled=True, paginationAutoPageSize=False, paginationPageSize=filas_pagina)
+    # Por bloques la grilla ya recibe una sola página
+    gb.configure_pagination(enabled=not por_bloques, paginationAutoPageSize=False, paginationPageSize=filas_pagina)
     gb.configure_side_bar(filters_panel=True, columns_panel=True)
 
-    grid_options = gb.build()
+    return gb.build()
+
+
+def _render_gestion_pedidos():
+    """Pestaña 1: Gestión de Pedidos (Grilla editable)"""
+    st.markdown("### 📋 Gestión de Pedidos")
+    st.caption("Editá **Cantidad solicitada** y **Ver en fecha** en la grilla. Las filas con cobertura < 1 mes se muestran en ROJO.")
+
+    if not AGGrid_AVAILABLE:
+        st.error("Para usar la grilla editable necesitás **streamlit-aggrid**. Instalalo con: `pip install streamlit-aggrid`")
+        return
+
+    if st.button("🔄 Cargar / Actualizar datos", key="pedidos_cargar"):
+        descartar_memos(MEMO_GRILLA, MEMO_GRILLA_RENDIMIENTO)
+        # Recarga completa pedida a mano (después de guardar alcanza con el delta)
+        get_tablero_cache().limpiar()
+        invalidar(DATASET_TABLERO)
+        st.rerun()
+
+    col_modo, col_filas = st.columns([3, 1])
+    modo = col_modo.radio(
+        "Carga de la grilla",
+        [MODO_BLOQUES, MODO_COMPLETO],
+        horizontal=True,
+        key="pedidos_modo",
+        help="Por bloques: filtros y orden en el servidor, el navegador recibe solo las filas visibles. "
+             "Tablero completo: todas las filas en la grilla (filtros de la grilla sobre todo el tablero).",
+    )
+    por_bloques = modo == MODO_BLOQUES
+    filas_pagina = col_filas.selectbox(
+        "Filas por bloque" if por_bloques else "Filas por página",
+        options=[50, 100, 200, 500],
+        index=1,
+        key="pedidos_filas_pagina",
+        help="Aumentá cuando tengas más órdenes para ver más filas a la vez.",
+    )
+
+    if por_bloques:
+        df_bloque, clave = _cargar_bloque_pedidos(filas_pagina)
+
+        def cargar():
+            return _preparar_display(df_bloque)
+    else:
+        # Copia local con la versión de los datos: sin cambios no se vuelve a copiar ni renombrar
+        clave = ("completo", version_de(DATASET_TABLERO, DATASET_SINCRONIZACION))
+
+        def cargar():
+            with st.spinner("Cargando todos los registros (por lotes)..."):
+                return _preparar_display(obtener_tablero())
+    df_display = memo_sesion(MEMO_GRILLA, clave, cargar)
+
+    if df_display.empty:
+        if por_bloques and st.session_state.get("bloque_firma", (None,) * 3)[:3] != (None, None, ""):
+            st.info("No hay registros con estos filtros.")
+        else:
+            st.info("No hay datos disponibles. Sincronizá primero desde Importar Excel.")
+        return
+
+    liviano = st.checkbox(
+        "⚡ Modo rendimiento",
+        value=len(df_display) >= FILAS_MODO_RENDIMIENTO,
+        key="pedidos_modo_rendimiento",
+        help="Alto de fila fijo y colores precalculados: la grilla se desplaza fluida con muchas filas. "
+             "Los colores de cobertura y fecha se actualizan al guardar, no mientras editás.",
+    )
+    if liviano:
+        df_display = memo_sesion(
+            MEMO_GRILLA_RENDIMIENTO, (clave, date.today()),
+            lambda: _precalcular_clases(vista_compartida(df_display)),
+        )
+
+    if por_bloques:
+        st.caption("Los filtros y el orden de las columnas de la grilla actúan solo sobre el bloque visible.")
+    else:
+        # Sin tope de órdenes: se cargan todas (por lotes). Espacio adaptable.
+        total_reg = len(df_display)
+        st.caption(f"📊 **{total_reg:,}** registros cargados (sin límite; crece con tus datos).")
+
+    grid_options = _opciones_grilla(firma_columnas(df_display), por_bloques, filas_pagina, liviano)
 
     # Grilla: letra 12px, bordes finos negros y texto negro.
     custom_css = {
@@ -391,6 +675,8 @@ function(params) {
         ".ag-theme-alpine .ag-cell": {"font-size": "12px !important", "border": "1px solid #000 !important", "color": "#000 !important"},
         ".ag-theme-alpine .ag-header-cell": {"font-size": "12px !important", "border": "1px solid #000 !important", "color": "#000 !important"},
     }
+    if liviano:
+        custom_css.update(CSS_RENDIMIENTO)
 
     grid_response = AgGrid(
         df_display,
@@ -414,8 +700,10 @@ function(params) {
 
     with col_save:
         if st.button("💾 Guardar cambios", type="primary", key="btn_guardar_pedidos"):
+            # Solo las filas con Cantidad solicitada / Ver en fecha distintas a las cargadas
+            cambiadas = filas_modificadas(df_display, edited_df, CLAVE_GRILLA, EDITABLES_GRILLA)
             to_save = []
-            for _, row in edited_df.iterrows():
+            for _, row in cambiadas.iterrows():
                 try:
                     id_ll = row.get("ID Llamado")
                     lic = row.get("Licitación")
@@ -454,22 +742,79 @@ function(params) {
                 n, err = guardar_cantidad_solicitada(to_save)
                 if err:
                     st.error(f"Error al guardar: {err}")
+                    if n:
+                        st.warning(f"Se guardaron {n} de {len(to_save)} registros; reintentá los que fallaron.")
                 else:
                     st.success(f"✅ Guardados {n} registros correctamente.")
-                    st.session_state.pop("pedidos_df", None)
-                    st.cache_data.clear()
-                    time.sleep(1)
+                    descartar_memos(MEMO_GRILLA, MEMO_GRILLA_RENDIMIENTO)
+                    invalidar("cantidad_solicitada")
+                    # La copia ya tiene los cambios: la re-ejecución no descarga nada
                     st.rerun()
             else:
                 st.warning("No hay cambios para guardar.")
 
     with col_refresh:
         if st.button("🔄 Actualizar datos"):
-            st.session_state.pop("pedidos_df", None)
-            st.cache_data.clear()
+            descartar_memos(MEMO_GRILLA, MEMO_GRILLA_RENDIMIENTO)
+            # Recarga completa pedida a mano (después de guardar alcanza con el delta)
+            get_tablero_cache().limpiar()
+            invalidar(DATASET_TABLERO)
             st.rerun()
 
 
+# Datos de contrato que muestra/edita la pestaña (columnas de datosejecucion)
+COLUMNAS_CONTRATO = ["vigente", "dirigido_a", "lugares", "observaciones_generales"]
+
+
+def _llamados_desde_tablas() -> pd.DataFrame:
+    """
+    Alternativa sin la RPC llamados_contrato: descarga id_llamado/licitación de
+    ejecución y datosejecucion a la vez y los une acá.
+    """
+    r = fetch_concurrente({
+        "ejecucion": consulta_tabla("ejecucion", columns=["id_llamado", "licitacion"],
+                                    order=["id_llamado", "id"]),
+        "datos": consulta_tabla("datosejecucion"),
+    })
+    llamados = pd.DataFrame(r["ejecucion"])
+    if llamados.empty or "id_llamado" not in llamados.columns:
+        return pd.DataFrame()
+    if "licitacion" not in llamados.columns:
+        llamados["licitacion"] = None
+    llamados = llamados[["id_llamado", "licitacion"]].dropna(subset=["id_llamado"]).drop_duplicates()
+    datos = pd.DataFrame(r["datos"])
+    if datos.empty or "id_llamado" not in datos.columns:
+        datos = pd.DataFrame(columns=["id_llamado"])
+    datos = datos[["id_llamado"] + [c for c in COLUMNAS_CONTRATO if c in datos.columns]].drop_duplicates("id_llamado")
+    datos["tiene_datos"] = True
+    llamados = llamados.merge(datos, on="id_llamado", how="left")
+    llamados["tiene_datos"] = llamados["tiene_datos"].eq(True)
+    return llamados.sort_values(["id_llamado", "licitacion"], ascending=[False, True])
+
+
+@cache_de("ejecucion", "datosejecucion")
+def load_datos_contrato(version=None):
+    """
+    Un llamado por fila (id_llamado, licitación) con sus datos de contrato ya
+    cargados y el texto del selector, ordenado por id_llamado descendente. Sale
+    de la RPC llamados_contrato (unos cientos de filas); al cambiar de llamado
+    en el selector no hace falta otra consulta.
+    """
+    data = fetch_llamados_contrato(get_supabase_client())
+    llamados = pd.DataFrame(data) if data is not None else _llamados_desde_tablas()
+    if llamados.empty:
+        return llamados
+    for col in COLUMNAS_CONTRATO:
+        if col not in llamados.columns:
+            llamados[col] = None
+    llamados["id_llamado"] = llamados["id_llamado"].astype("int64")
+    llamados["display"] = (
+        llamados["id_llamado"].astype(str) + " - " + llamados["licitacion"].astype(str)
+        + np.where(llamados["tiene_datos"], " ✅", "")
+    )
+    return llamados.reset_index(drop=True)
+
+
 def _render_datos_contrato():
     """Pestaña 2: Datos del Contrato (Anexar cosas) - Solo API REST."""
     st.markdown("### 📝 Datos del Contrato")
@@ -481,43 +826,36 @@ def _render_datos_contrato():
             st.error("No se pudo conectar a la base de datos.")
             return
 
-        # Lista de id_llamado y licitación desde API (todos los registros, luego deduplicar)
-        all_ejecucion = fetch_all_data("ejecucion", client)
-        if not all_ejecucion:
+        # Llamados distintos con sus datos de contrato (✅ = ya tiene datos cargados)
+        llamados = load_datos_contrato(version=version_de('ejecucion', 'datosejecucion'))
+        if llamados.empty:
             st.info("No hay llamados disponibles. Cargá datos de ejecución primero.")
             return
 
-        ids_df = pd.DataFrame(all_ejecucion)
-        cols = [c for c in ["id_llamado", "licitacion"] if c in ids_df.columns]
-        if not cols:
-            st.info("No hay columnas id_llamado/licitacion en ejecución.")
-            return
-        ids_df = ids_df[cols].drop_duplicates().sort_values("id_llamado", ascending=False)
-        ids_df['display'] = ids_df['id_llamado'].astype(str) + " - " + ids_df['licitacion'].astype(str)
-        opciones = ["Seleccionar..."] + ids_df['display'].tolist()
-
-        seleccion = st.selectbox("Seleccionar ID Llamado / Licitación", opciones, key="datos_contrato_select")
+        # Opciones por clave (id_llamado, licitación): la selección se mantiene
+        # aunque cambie el texto (✅ al guardar) o la posición en la lista
+        claves = list(zip(llamados["id_llamado"].tolist(), llamados["licitacion"].tolist()))
+        posiciones = {clave: i for i, clave in enumerate(claves)}
+        seleccion = st.selectbox(
+            "Seleccionar ID Llamado / Licitación", [None] + claves, key="datos_contrato_select",
+            format_func=lambda c: "Seleccionar..." if c is None else llamados["display"].iat[posiciones[c]],
+        )
 
-        if seleccion == "Seleccionar...":
+        if seleccion is None:
             st.info("Seleccioná un llamado para ver o editar sus datos.")
             return
 
-        id_llamado = int(seleccion.split(" - ")[0])
-        licitacion = " - ".join(seleccion.split(" - ")[1:])
+        fila = llamados.iloc[posiciones[seleccion]]
+        id_llamado = int(fila["id_llamado"])
+        licitacion = fila["licitacion"]
 
-        # Cargar datos existentes de datosejecucion vía API
-        r_existente = (
-            client.table("datosejecucion")
-            .select("*")
-            .eq("id_llamado", id_llamado)
-            .execute()
-        )
-        datos_existente = pd.DataFrame(r_existente.data) if r_existente.data else pd.DataFrame()
+        def _valor(col, defecto):
+            return fila[col] if fila["tiene_datos"] and pd.notna(fila[col]) else defecto
 
-        vigente_actual = datos_existente['vigente'].iloc[0] if not datos_existente.empty and 'vigente' in datos_existente.columns else "SI"
-        dirigido_actual = datos_existente['dirigido_a'].iloc[0] if not datos_existente.empty and 'dirigido_a' in datos_existente.columns else ""
-        lugares_actual = datos_existente['lugares'].iloc[0] if not datos_existente.empty and 'lugares' in datos_existente.columns else ""
-        observaciones_actual = datos_existente['observaciones_generales'].iloc[0] if not datos_existente.empty and 'observaciones_generales' in datos_existente.columns else ""
+        vigente_actual = _valor("vigente", "SI")
+        dirigido_actual = _valor("dirigido_a", "")
+        lugares_actual = _valor("lugares", "")
+        observaciones_actual = _valor("observaciones_generales", "")
 
         st.markdown(f"#### Datos para ID Llamado: {id_llamado}")
         st.caption(f"Licitación: {licitacion}")
@@ -570,14 +908,15 @@ def _render_datos_contrato():
                 )
                 if success:
                     st.success("✅ Datos guardados correctamente.")
-                    st.cache_data.clear()
-                    time.sleep(1)
+                    invalidar("datosejecucion")
+                    # La grilla de pedidos vuelve a armarse desde la copia ya actualizada
+                    descartar_memos(MEMO_GRILLA, MEMO_GRILLA_RENDIMIENTO)
                     st.rerun()
                 else:
                     st.error(f"❌ Error al guardar: {error}")
         with col_cancel:
             if st.button("🔄 Recargar datos"):
-                st.cache_data.clear()
+                invalidar("ejecucion", "datosejecucion")
                 st.rerun()
 
     except Exception as e:
@@ -594,6 +933,7 @@ def show():
         <p style="margin:8px 0 0 0; opacity:0.9;">Editar pedidos y anexar datos de contratos</p>
     </div>
     """, unsafe_allow_html=True)
+    avisar_publicacion_fallida()
 
     tab_pedidos, tab_contrato = st.tabs([
         "📋 Gestión de Pedidos",
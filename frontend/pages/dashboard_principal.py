@@ -6,27 +6,94 @@ Solo API REST de Supabase (sin SQLAlchemy).
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from frontend.utils.db_connection import get_supabase_client, fetch_vista_tablero, VISTA_TABLERO_LIMIT
-
-
-@st.cache_data(ttl=300)
-def load_vista_tablero(limite=15000):
-    """Carga la vista tablero en una sola petición (vista pesada; paginación provoca timeout)."""
-    try:
-        client = get_supabase_client()
-        if client is None:
-            return pd.DataFrame()
-        data = fetch_vista_tablero(client, limit=limite)
-        if not data:
-            return pd.DataFrame()
-        df = pd.DataFrame(data)
-        sort_cols = [c for c in ['id_llamado', 'licitacion', 'codigo', 'item'] if c in df.columns]
-        if sort_cols:
-            df = df.sort_values(sort_cols).reset_index(drop=True)
+from frontend.utils.db_connection import (
+    get_supabase_client,
+    fetch_vista_tablero_detalle,
+    filtros_detalle,
+    VISTA_TABLERO_MATERIALIZADA,
+)
+from frontend.utils.data_version import version_de, DATASET_TABLERO
+from frontend.utils.cache_registry import cache_de, invalidar
+from frontend.utils.async_data import fetch_concurrente, consulta_tabla, consulta_rpc
+from frontend.utils.tablero_service import (
+    obtener_tablero,
+    filtrar_tablero,
+    licitaciones_tablero,
+    kpis_tablero,
+    NIVELES_CRITICOS,
+)
+
+COLUMNAS_RESUMEN = [
+    'licitacion', 'codigo', 'producto', 'cantidad_maxima',
+    'cantidad_emitida', 'saldo_contrato', 'stock_actual',
+    'dmp_actual', 'nivel_stock', 'cantidad_solicitada', 'cobertura_meses'
+]
+# Columnas para ordenar el detalle en el servidor (van en el select)
+COLUMNAS_CLAVE = ['id_llamado', 'item']
+
+
+@cache_de(DATASET_TABLERO)
+def load_inicio(version=None):
+    """
+    KPIs totales y opciones del filtro Licitación, pedidos a la vez.
+    KPIs None = la RPC tablero_kpis no existe (modo local).
+    """
+    r = fetch_concurrente({
+        'kpis': consulta_rpc('tablero_kpis', {'p_licitacion': None, 'p_nivel_stock': None}),
+        'licitaciones': consulta_rpc('tablero_licitaciones'),
+    })
+    kpis = r['kpis'] if isinstance(r['kpis'], dict) else None
+    licitaciones = [x['licitacion'] for x in (r['licitaciones'] or []) if x.get('licitacion')]
+    return kpis, licitaciones
+
+
+@cache_de(DATASET_TABLERO)
+def load_panel(licitacion=None, nivel_stock=None, version=None):
+    """
+    KPIs filtrados y las tres tablas de detalle (críticos, cobertura baja, resumen),
+    pedidos a la vez: la carga tarda lo que la consulta más lenta.
+    """
+    niveles = [nivel_stock] if nivel_stock else None
+    niveles_criticos = [n for n in NIVELES_CRITICOS if nivel_stock in (None, n)]
+    columnas = COLUMNAS_RESUMEN + COLUMNAS_CLAVE
+
+    def _detalle(niveles_filtro, cobertura_menor_a=None):
+        return consulta_tabla(VISTA_TABLERO_MATERIALIZADA, columnas,
+                              filtros_detalle(licitacion, niveles_filtro, cobertura_menor_a),
+                              limit=1000)
+
+    consultas = {
+        'kpis': consulta_rpc('tablero_kpis', {'p_licitacion': licitacion, 'p_nivel_stock': nivel_stock}),
+        'cobertura_baja': _detalle(niveles, cobertura_menor_a=1),
+        'resumen': _detalle(niveles),
+    }
+    if niveles_criticos:
+        consultas['criticos'] = _detalle(niveles_criticos)
+    r = fetch_concurrente(consultas)
+
+    def _df(nombre):
+        df = pd.DataFrame(r.get(nombre) or [])
+        return df.drop(columns=[c for c in COLUMNAS_CLAVE if c in df.columns])
+
+    kpis = r['kpis'] if isinstance(r['kpis'], dict) else None
+    return kpis, _df('criticos'), _df('cobertura_baja'), _df('resumen')
+
+
+@cache_de(DATASET_TABLERO)
+def load_detalle(licitacion=None, niveles=None, cobertura_menor_a=None, limite=1000, columnas=None, version=None):
+    """Filas filtradas en el servidor para tablas de detalle (hasta `limite`)."""
+    data = fetch_vista_tablero_detalle(
+        get_supabase_client(),
+        list(columnas) if columnas else COLUMNAS_RESUMEN + COLUMNAS_CLAVE,
+        licitacion=licitacion,
+        niveles=list(niveles) if niveles else None,
+        cobertura_menor_a=cobertura_menor_a,
+        limit=limite,
+    )
+    df = pd.DataFrame(data)
+    if columnas:
         return df
-    except Exception as e:
-        st.error(f"Error cargando vista: {e}")
-        return pd.DataFrame()
+    return df.drop(columns=[c for c in COLUMNAS_CLAVE if c in df.columns])
 
 
 def show():
@@ -40,41 +107,32 @@ def show():
 
     # Filtros en sidebar
     st.sidebar.markdown("### 🔍 Filtros")
-    limite_registros = st.sidebar.number_input(
-        "Máx. registros",
-        min_value=1000,
-        max_value=VISTA_TABLERO_LIMIT,
-        value=min(10000, VISTA_TABLERO_LIMIT),
-        step=1000,
-        key="dashboard_limite",
-        help=f"La vista tiene un tope de {VISTA_TABLERO_LIMIT:,} registros por petición para evitar timeout.",
-    )
-
-    # Cargar datos
-    with st.spinner(f"Cargando hasta {limite_registros:,} registros..."):
-        df_vista = load_vista_tablero(limite=limite_registros)
-
-    if df_vista.empty:
-        st.warning("No hay datos disponibles. Sincronizá primero desde Importar Excel.")
-        return
-
-    # Normalizar nombres de columnas a minúsculas
-    df_vista.columns = [c.lower() if isinstance(c, str) else c for c in df_vista.columns]
 
-    # Eliminar duplicados: mantener solo un registro por (id_llamado, licitacion, codigo, item)
-    if not df_vista.empty:
-        key_cols = ['id_llamado', 'licitacion', 'codigo', 'item']
-        key_cols = [c for c in key_cols if c in df_vista.columns]
-
-        if key_cols:
-            df_vista['_completitud'] = df_vista.notna().sum(axis=1)
-            df_vista = df_vista.sort_values('_completitud', ascending=False).drop_duplicates(
-                subset=key_cols,
-                keep='first'
-            ).drop(columns=['_completitud'], errors='ignore')
+    # Versión del tablero: clave de caché de los loaders (ver data_version)
+    version = version_de(DATASET_TABLERO)
+
+    # Con la RPC tablero_kpis los KPIs llegan agregados (una respuesta chica).
+    # Sin ella, se calculan sobre el tablero compartido (tablero_service).
+    with st.spinner("Cargando indicadores..."):
+        kpis_totales, licitaciones_servidor = load_inicio(version=version)
+    modo_servidor = kpis_totales is not None
+
+    df_vista = pd.DataFrame()
+    if modo_servidor:
+        if not kpis_totales.get('total_items'):
+            st.warning("No hay datos disponibles. Sincronizá primero desde Importar Excel.")
+            return
+        licitaciones_disponibles = licitaciones_servidor
+    else:
+        with st.spinner("Cargando el tablero..."):
+            df_vista = obtener_tablero()
+        if df_vista.empty:
+            st.warning("No hay datos disponibles. Sincronizá primero desde Importar Excel.")
+            return
+        licitaciones_disponibles = licitaciones_tablero(df_vista)
 
     # Filtros adicionales
-    licitaciones = ["Todas"] + sorted(df_vista['licitacion'].dropna().unique().tolist())[:100]
+    licitaciones = ["Todas"] + licitaciones_disponibles[:100]
     licitacion_seleccionada = st.sidebar.selectbox("Licitación", licitaciones, key="dashboard_licitacion")
 
     niveles_stock = ["Todos", "Crítico", "Atención", "Óptimo", "Sin DMP", "Sin Stock"]
@@ -82,15 +140,28 @@ def show():
 
     # Botón Refrescar (visible en la interfaz)
     if st.sidebar.button("🔄 Refrescar", key="dashboard_principal_refrescar"):
-        st.cache_data.clear()
+        invalidar(DATASET_TABLERO)
         st.rerun()
 
+    licitacion = None if licitacion_seleccionada == "Todas" else licitacion_seleccionada
+    nivel = None if nivel_seleccionado == "Todos" else nivel_seleccionado
+
     # Aplicar filtros
-    df_filtrado = df_vista.copy()
-    if licitacion_seleccionada != "Todas":
-        df_filtrado = df_filtrado[df_filtrado['licitacion'] == licitacion_seleccionada]
-    if nivel_seleccionado != "Todos":
-        df_filtrado = df_filtrado[df_filtrado['nivel_stock'] == nivel_seleccionado]
+    if modo_servidor:
+        with st.spinner("Cargando indicadores y detalles..."):
+            kpis, df_criticos, df_cobertura_baja, df_resumen = load_panel(licitacion, nivel, version=version)
+        if kpis is None:
+            st.error("No se pudieron cargar los indicadores.")
+            return
+    else:
+        df_filtrado = filtrar_tablero(df_vista, licitacion, nivel)
+        kpis = kpis_tablero(df_filtrado)
+        df_criticos = df_filtrado[df_filtrado['nivel_stock'].isin(NIVELES_CRITICOS)] if 'nivel_stock' in df_filtrado.columns else pd.DataFrame()
+        if 'cobertura_meses' in df_filtrado.columns:
+            df_cobertura_baja = df_filtrado[df_filtrado['cobertura_meses'].fillna(999) < 1]
+        else:
+            df_cobertura_baja = pd.DataFrame()
+        df_resumen = df_filtrado.head(1000)
 
     # KPIs Superiores
     st.markdown("---")
@@ -99,28 +170,27 @@ def show():
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        total_items = len(df_filtrado)
+        total_items = int(kpis.get('total_items') or 0)
         st.metric("Total Ítems", f"{total_items:,}")
 
     with col2:
-        items_criticos = len(df_filtrado[df_filtrado['nivel_stock'].isin(['Crítico', 'Sin Stock'])])
+        items_criticos = int(kpis.get('items_criticos') or 0)
         delta_pct = f"{items_criticos/total_items*100:.1f}%" if total_items > 0 else "0%"
         st.metric("Ítems Críticos", f"{items_criticos:,}", delta=delta_pct)
 
     with col3:
-        precio_promedio = df_filtrado['precio_unitario'].fillna(0).mean()
-        cantidad_total = df_filtrado['cantidad_maxima'].sum()
+        precio_promedio = float(kpis.get('precio_promedio') or 0)
+        cantidad_total = float(kpis.get('cantidad_maxima') or 0)
         monto_total = cantidad_total * precio_promedio if precio_promedio > 0 else 0
         st.metric("Monto Total Estimado", f"${monto_total:,.0f}" if monto_total > 0 else "$0")
 
     with col4:
-        cantidad_solicitada_total = df_filtrado['cantidad_solicitada'].sum()
+        cantidad_solicitada_total = float(kpis.get('cantidad_solicitada') or 0)
         st.metric("Cantidad Solicitada", f"{cantidad_solicitada_total:,.0f}")
 
     # Drill-down: desplegables para explorar métricas
     col_exp1, col_exp2 = st.columns(2)
     with col_exp1:
-        df_criticos = df_filtrado[df_filtrado['nivel_stock'].isin(['Crítico', 'Sin Stock'])] if 'nivel_stock' in df_filtrado.columns else pd.DataFrame()
         with st.expander("🔽 Ver detalle de ítems críticos (stock)"):
             if df_criticos.empty:
                 st.caption("No hay ítems en nivel crítico o sin stock.")
@@ -128,10 +198,6 @@ def show():
                 cols_show = [c for c in ['licitacion', 'codigo', 'producto', 'nivel_stock', 'stock_actual', 'cantidad_solicitada'] if c in df_criticos.columns]
                 st.dataframe(df_criticos[cols_show] if cols_show else df_criticos, use_container_width=True, hide_index=True)
     with col_exp2:
-        if 'cobertura_meses' in df_filtrado.columns:
-            df_cobertura_baja = df_filtrado[df_filtrado['cobertura_meses'].fillna(999) < 1]
-        else:
-            df_cobertura_baja = pd.DataFrame()
         with st.expander("🔽 Ver detalle de ítems con cobertura baja (< 1 mes)"):
             if df_cobertura_baja.empty:
                 st.caption("No hay ítems con cobertura menor a 1 mes.")
@@ -139,6 +205,14 @@ def show():
                 cols_show = [c for c in ['licitacion', 'codigo', 'producto', 'cobertura_meses', 'nivel_stock', 'cantidad_solicitada'] if c in df_cobertura_baja.columns]
                 st.dataframe(df_cobertura_baja[cols_show] if cols_show else df_cobertura_baja, use_container_width=True, hide_index=True)
 
+    if kpis.get('por_proveedor'):
+        with st.expander("🔽 Ver proveedores con más ítems"):
+            df_prov = pd.DataFrame(kpis['por_proveedor']).rename(columns={
+                'proveedor': 'Proveedor', 'items': 'Ítems',
+                'items_criticos': 'Ítems críticos', 'cantidad_maxima': 'Cantidad máxima',
+            })
+            st.dataframe(df_prov, use_container_width=True, hide_index=True)
+
     st.markdown("---")
 
     # Gráficos
@@ -146,11 +220,7 @@ def show():
 
     with col_chart1:
         st.markdown("#### 📊 Consumo por Licitación")
-        consumo_por_lic = df_filtrado.groupby('licitacion').agg({
-            'cantidad_maxima': 'sum',
-            'cantidad_emitida': 'sum'
-        }).reset_index()
-        consumo_por_lic = consumo_por_lic.sort_values('cantidad_maxima', ascending=False).head(10)
+        consumo_por_lic = pd.DataFrame(kpis.get('por_licitacion') or [])
 
         if not consumo_por_lic.empty:
             fig_bar = px.bar(
@@ -174,12 +244,12 @@ def show():
 
     with col_chart2:
         st.markdown("#### 🥧 Distribución de Nivel de Stock")
-        distribucion_stock = df_filtrado['nivel_stock'].value_counts()
+        distribucion_stock = pd.DataFrame(kpis.get('por_nivel') or [])
 
         if not distribucion_stock.empty:
             fig_pie = px.pie(
-                values=distribucion_stock.values,
-                names=distribucion_stock.index,
+                values=distribucion_stock['items'],
+                names=distribucion_stock['nivel_stock'],
                 title="Nivel de Stock",
                 color_discrete_map={
                     'Crítico': 'red',
@@ -203,24 +273,23 @@ def show():
 
     # Tabla resumen
     st.markdown("### 📋 Resumen de Datos")
-    st.caption(f"Mostrando {len(df_filtrado):,} registros de {len(df_vista):,} totales")
+    st.caption(f"Mostrando {len(df_resumen):,} registros de {total_items:,} filtrados")
 
-    columnas_mostrar = [
-        'licitacion', 'codigo', 'producto', 'cantidad_maxima',
-        'cantidad_emitida', 'saldo_contrato', 'stock_actual',
-        'dmp_actual', 'nivel_stock', 'cantidad_solicitada', 'cobertura_meses'
-    ]
-    columnas_mostrar = [c for c in columnas_mostrar if c in df_filtrado.columns]
+    columnas_mostrar = [c for c in COLUMNAS_RESUMEN if c in df_resumen.columns]
 
     st.dataframe(
-        df_filtrado[columnas_mostrar].head(1000),
+        df_resumen[columnas_mostrar] if columnas_mostrar else df_resumen,
         use_container_width=True,
         hide_index=True,
         height=400
     )
 
     with st.expander("📊 Ver tabla completa (máx. 1000 registros)"):
-        st.dataframe(df_filtrado.head(1000), use_container_width=True, hide_index=True)
+        if modo_servidor:
+            df_completa = load_detalle(licitacion, (nivel,) if nivel else None, columnas=("*",), version=version)
+        else:
+            df_completa = df_resumen
+        st.dataframe(df_completa, use_container_width=True, hide_index=True)
 
 
 show()
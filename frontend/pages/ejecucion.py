@@ -4,50 +4,69 @@ Solo API REST de Supabase (sin SQLAlchemy).
 """
 import streamlit as st
 import pandas as pd
-from frontend.utils.db_connection import get_supabase_client, fetch_all_data
+from frontend.utils.db_connection import get_supabase_client, fetch_all_data, fetch_distinct_values
+from frontend.utils.data_version import version_de
+from frontend.utils.cache_registry import cache_de, invalidar
 
+# Columnas que muestra la página (el resto no se descarga)
+COLUMNAS = [
+    'id_llamado', 'licitacion', 'proveedor', 'codigo', 'medicamento', 'item',
+    'cantidad_maxima', 'cantidad_emitida', 'cantidad_recepcionada', 'saldo',
+    'porcentaje_emitido', 'cantidad_ejecutada', 'precio_unitario', 'monto_total',
+    'estado_contrato', 'fecha_ejecucion',
+]
 
-@st.cache_data(ttl=300)
-def load_ejecucion():
-    """Carga todos los datos de ejecución (paginación interna) y ordena por fecha."""
+
+@cache_de('ejecucion')
+def load_ejecucion(licitacion=None, version=None):
+    """Carga la ejecución filtrada en Supabase (paginación interna), ordenada por fecha."""
     try:
         client = get_supabase_client()
         if client is None:
             return pd.DataFrame()
-        data = fetch_all_data("ejecucion", client)
+        data = fetch_all_data(
+            "ejecucion", client,
+            columns=COLUMNAS,
+            filters={"licitacion": licitacion},
+            order=["-fecha_ejecucion", "id"],
+        )
         if not data:
             return pd.DataFrame()
-        df = pd.DataFrame(data)
-        if "fecha_ejecucion" in df.columns:
-            df = df.sort_values("fecha_ejecucion", ascending=False).reset_index(drop=True)
-        return df
+        return pd.DataFrame(data)
     except Exception as e:
         st.error(f"Error cargando ejecución: {e}")
         return pd.DataFrame()
 
 
+@cache_de('ejecucion')
+def load_licitaciones(version=None):
+    """Licitaciones distintas para el filtro."""
+    return fetch_distinct_values("ejecucion", "licitacion", get_supabase_client())
+
+
 def show():
     """Muestra la página de ejecución"""
     st.title("✅ Ejecución de Contratos")
     st.markdown("---")
     
+    # Versión de los datos: clave de caché de los loaders (ver data_version)
+    version = version_de('ejecucion')
+
+    # Filtros (se aplican en Supabase)
+    col1, col2 = st.columns(2)
+    with col1:
+        licitaciones = ['Todas'] + load_licitaciones(version=version)
+        licitacion_selected = st.selectbox("Filtrar por Licitación", licitaciones)
+    
     # Cargar datos
     with st.spinner("Cargando datos de ejecución..."):
-        df = load_ejecucion()
+        df = load_ejecucion(licitacion=None if licitacion_selected == "Todas" else licitacion_selected,
+                            version=version)
     
     if df.empty:
         st.warning("No hay datos de ejecución disponibles.")
         return
     
-    # Filtros
-    col1, col2 = st.columns(2)
-    with col1:
-        if 'licitacion' in df.columns:
-            licitaciones = ['Todas'] + list(df['licitacion'].unique())
-            licitacion_selected = st.selectbox("Filtrar por Licitación", licitaciones)
-            if licitacion_selected != "Todas":
-                df = df[df['licitacion'] == licitacion_selected]
-    
     # Métricas
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -71,7 +90,7 @@ def show():
     st.dataframe(df, width='stretch', hide_index=True)
     
     if st.button("🔄 Refrescar"):
-        st.cache_data.clear()
+        invalidar('ejecucion')
         st.rerun()
 
 
@@ -19,6 +19,7 @@ from etl.processors import (
 )
 from etl.sync.sync_manager import SyncManager
 from config.supabase import SupabaseConfig
+from frontend.utils.cache_registry import invalidar
 
 # Orden: 1 Órdenes, 2 Ejecución, 3 Stock, 4 Pedidos, 5 Vencimientos
 CARGA = [
@@ -68,7 +69,9 @@ def show():
                             contenido = archivo.getvalue()
                             proc = ProcessorClass()
                             if proc.process_file(contenido, archivo.name):
-                                st.cache_data.clear()
+                                # Solo cambió la base local: las páginas leen Supabase y se
+                                # actualizan al sincronizar. La estimación previa quedó vieja.
+                                st.session_state.pop("sync_plan", None)
                                 st.success(f"Listo: {archivo.name} cargado en la base local. Podés ir al Dashboard para ver los datos.")
                             else:
                                 st.error(f"No se pudo procesar {archivo.name}. Revisá columnas y formato.")
@@ -102,9 +105,50 @@ def show():
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            st.info("💡 **Consejo:** Cargá primero todos los archivos Excel localmente, y luego sincronizá todo de una vez.")
+            st.info("💡 **Consejo:** Cargá primero todos los archivos Excel localmente, y luego sincronizá todo de una vez. Solo se suben las tablas que cambiaron desde la última sincronización.")
+            
+            plan = st.session_state.get("sync_plan")
+            if plan:
+                st.markdown(
+                    f"**Estimación:** {len(plan['sync_tables'])} tablas, "
+                    f"{plan['total_rows']:,} filas, {plan['total_bytes'] / 1_048_576:.1f} MB, "
+                    f"~{plan['estimated_seconds']:.0f} s"
+                )
+                df_plan = pd.DataFrame([
+                    {
+                        "Tabla": e['table'],
+                        "Acción": "Sincronizar" if e['dirty'] else "Sin cambios",
+                        "Filas": e['rows'],
+                        "MB": round(e['bytes'] / 1_048_576, 2) if e['bytes'] is not None else None,
+                        "Filas/s": e['rows_per_second'],
+                        "Histórico": "Sí" if e['historical'] else "Supuesto",
+                        "Estimado (s)": e['estimated_seconds'] if e['dirty'] else 0,
+                    }
+                    for e in plan['tables']
+                ])
+                st.dataframe(df_plan, width='stretch', hide_index=True)
         
         with col2:
+            forzar = st.checkbox(
+                "Forzar sincronización completa",
+                value=False,
+                key="sync_forzar",
+                help="Sube las 7 tablas aunque no hayan cambiado (ej. si se modificó Supabase a mano).",
+            )
+            elegidas = st.multiselect(
+                "Tablas a sincronizar",
+                options=SyncManager.TABLES_TO_SYNC,
+                default=[],
+                key="sync_tablas",
+                help="Vacío = las tablas modificadas (o todas si se fuerza). Las elegidas se suben aunque no tengan cambios.",
+            )
+            if st.button("📋 Estimar duración"):
+                try:
+                    with st.spinner("Midiendo tablas locales..."):
+                        plan = SyncManager().plan(tables=elegidas or None, force=forzar or bool(elegidas))
+                    st.session_state["sync_plan"] = plan
+                except Exception as e:
+                    st.error(f"No se pudo estimar: {e}")
             if st.button("🔄 Sincronizar todo a Supabase", type="primary"):
                 sync_manager = SyncManager()
                 
@@ -116,7 +160,13 @@ def show():
                         
                         # Sincronizar todas las tablas
                         status_text.info("🔄 Iniciando sincronización...")
-                        results = sync_manager.sync_all_tables()
+                        results = sync_manager.sync_all_tables(force=forzar, tables=elegidas or None)
+                        # La estimación previa ya no describe el estado actual
+                        st.session_state.pop("sync_plan", None)
+                        # Limpiar solo la caché de lo publicado (y lo que depende de ello)
+                        publicadas = [t for t, r in results.items() if not r.get('skipped') and r['success']]
+                        if publicadas:
+                            invalidar(*publicadas)
                         
                         # Mostrar resultados
                         status_text.empty()
@@ -127,6 +177,13 @@ def show():
                         st.markdown("#### Resumen de sincronización:")
                         summary_data = []
                         for table, result in results.items():
+                            if result.get('skipped'):
+                                summary_data.append({
+                                    "Tabla": table,
+                                    "Estado": "⏭️",
+                                    "Sincronizado": "Sin cambios"
+                                })
+                                continue
                             status = "✅" if result['success'] else "❌"
                             summary_data.append({
                                 "Tabla": table,
@@ -4,57 +4,75 @@ Solo API REST de Supabase (sin SQLAlchemy).
 """
 import streamlit as st
 import pandas as pd
-from frontend.utils.db_connection import get_supabase_client, fetch_all_data
+from frontend.utils.db_connection import get_supabase_client, fetch_all_data, fetch_distinct_values
+from frontend.utils.data_version import version_de
+from frontend.utils.cache_registry import cache_de, invalidar
 
+# Columnas que muestra la página (el resto no se descarga)
+COLUMNAS = [
+    'id_llamado', 'llamado', 'oc', 'item', 'codigo', 'producto', 'proveedor', 'estado',
+    'cant_oc', 'cant_recep', 'saldo', 'monto_oc', 'monto_saldo', 'dias_de_atraso',
+    'fecha_oc', 'fecha_orden', 'lugar_entrega_oc',
+]
 
-@st.cache_data(ttl=300)
-def load_ordenes():
-    """Carga todos los datos de órdenes (paginación interna) y ordena por fecha."""
+
+@cache_de('ordenes')
+def load_ordenes(estado=None, proveedor=None, version=None):
+    """Carga las órdenes filtradas en Supabase (paginación interna), ordenadas por fecha."""
     try:
         client = get_supabase_client()
         if client is None:
             return pd.DataFrame()
-        data = fetch_all_data("ordenes", client)
+        data = fetch_all_data(
+            "ordenes", client,
+            columns=COLUMNAS,
+            filters={"estado": estado, "proveedor": proveedor},
+            order=["-fecha_orden", "id"],
+        )
         if not data:
             return pd.DataFrame()
-        df = pd.DataFrame(data)
-        if "fecha_orden" in df.columns:
-            df = df.sort_values("fecha_orden", ascending=False).reset_index(drop=True)
-        return df
+        return pd.DataFrame(data)
     except Exception as e:
         st.error(f"Error cargando órdenes: {e}")
         return pd.DataFrame()
 
 
+@cache_de('ordenes')
+def load_opciones(columna, version=None):
+    """Valores distintos de `columna` para los filtros."""
+    return fetch_distinct_values("ordenes", columna, get_supabase_client())
+
+
 def show():
     """Muestra la página de órdenes"""
     st.title("📋 Órdenes de Compra")
     st.markdown("---")
     
+    # Versión de los datos: clave de caché de los loaders (ver data_version)
+    version = version_de('ordenes')
+
+    # Filtros (se aplican en Supabase, no sobre todas las órdenes descargadas)
+    col1, col2 = st.columns(2)
+    with col1:
+        estados = ['Todos'] + load_opciones('estado', version=version)
+        estado_selected = st.selectbox("Filtrar por Estado", estados)
+    
+    with col2:
+        proveedores = ['Todos'] + load_opciones('proveedor', version=version)
+        proveedor_selected = st.selectbox("Filtrar por Proveedor", proveedores)
+    
     # Cargar datos
     with st.spinner("Cargando órdenes..."):
-        df = load_ordenes()
+        df = load_ordenes(
+            estado=None if estado_selected == "Todos" else estado_selected,
+            proveedor=None if proveedor_selected == "Todos" else proveedor_selected,
+            version=version,
+        )
     
     if df.empty:
         st.warning("No hay órdenes disponibles.")
         return
     
-    # Filtros
-    col1, col2 = st.columns(2)
-    with col1:
-        if 'estado' in df.columns:
-            estados = ['Todos'] + list(df['estado'].unique())
-            estado_selected = st.selectbox("Filtrar por Estado", estados)
-            if estado_selected != "Todos":
-                df = df[df['estado'] == estado_selected]
-    
-    with col2:
-        if 'proveedor' in df.columns:
-            proveedores = ['Todos'] + list(df['proveedor'].dropna().unique())
-            proveedor_selected = st.selectbox("Filtrar por Proveedor", proveedores)
-            if proveedor_selected != "Todos":
-                df = df[df['proveedor'] == proveedor_selected]
-    
     # Métricas
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -81,7 +99,7 @@ def show():
     st.dataframe(df, width='stretch', hide_index=True)
     
     if st.button("🔄 Refrescar"):
-        st.cache_data.clear()
+        invalidar('ordenes')
         st.rerun()
 
 
@@ -4,50 +4,68 @@ Solo API REST de Supabase (sin SQLAlchemy).
 """
 import streamlit as st
 import pandas as pd
-from frontend.utils.db_connection import get_supabase_client, fetch_all_data
+from frontend.utils.db_connection import get_supabase_client, fetch_all_data, fetch_distinct_values
+from frontend.utils.data_version import version_de
+from frontend.utils.cache_registry import cache_de, invalidar
 
+# Columnas que muestra la página (el resto no se descarga)
+COLUMNAS = [
+    'nro_pedido', 'simese', 'fecha_pedido', 'codigo', 'medicamento', 'stock', 'dmp',
+    'cantidad', 'meses_cantidad', 'dias_transcurridos', 'estado', 'prioridad',
+    'nro_oc', 'fecha_oc', 'id_llamado', 'item', 'cantidad_solicitada',
+    'cantidad_pendiente', 'fecha_solicitud',
+]
 
-@st.cache_data(ttl=300)
-def load_pedidos():
-    """Carga todos los datos de pedidos (paginación interna) y ordena por fecha."""
+
+@cache_de('pedidos')
+def load_pedidos(estado=None, version=None):
+    """Carga los pedidos filtrados en Supabase (paginación interna), ordenados por fecha."""
     try:
         client = get_supabase_client()
         if client is None:
             return pd.DataFrame()
-        data = fetch_all_data("pedidos", client)
+        data = fetch_all_data(
+            "pedidos", client,
+            columns=COLUMNAS,
+            filters={"estado": estado},
+            order=["-fecha_solicitud", "id"],
+        )
         if not data:
             return pd.DataFrame()
-        df = pd.DataFrame(data)
-        if "fecha_solicitud" in df.columns:
-            df = df.sort_values("fecha_solicitud", ascending=False).reset_index(drop=True)
-        return df
+        return pd.DataFrame(data)
     except Exception as e:
         st.error(f"Error cargando pedidos: {e}")
         return pd.DataFrame()
 
 
+@cache_de('pedidos')
+def load_estados(version=None):
+    """Estados distintos para el filtro."""
+    return fetch_distinct_values("pedidos", "estado", get_supabase_client())
+
+
 def show():
     """Muestra la página de pedidos"""
     st.title("🛒 Pedidos")
     st.markdown("---")
     
+    # Versión de los datos: clave de caché de los loaders (ver data_version)
+    version = version_de('pedidos')
+
+    # Filtros (se aplican en Supabase)
+    col1, col2 = st.columns(2)
+    with col1:
+        estados = ['Todos'] + load_estados(version=version)
+        estado_selected = st.selectbox("Filtrar por Estado", estados)
+    
     # Cargar datos
     with st.spinner("Cargando pedidos..."):
-        df = load_pedidos()
+        df = load_pedidos(estado=None if estado_selected == "Todos" else estado_selected, version=version)
     
     if df.empty:
         st.warning("No hay pedidos disponibles.")
         return
     
-    # Filtros
-    col1, col2 = st.columns(2)
-    with col1:
-        if 'estado' in df.columns:
-            estados = ['Todos'] + list(df['estado'].unique())
-            estado_selected = st.selectbox("Filtrar por Estado", estados)
-            if estado_selected != "Todos":
-                df = df[df['estado'] == estado_selected]
-    
     # Métricas
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -74,7 +92,7 @@ def show():
     st.dataframe(df, width='stretch', hide_index=True)
     
     if st.button("🔄 Refrescar"):
-        st.cache_data.clear()
+        invalidar('pedidos')
         st.rerun()
 
 
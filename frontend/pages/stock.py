@@ -5,48 +5,65 @@ Solo API REST de Supabase (sin SQLAlchemy).
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from frontend.utils.db_connection import get_supabase_client, fetch_all_data
+from frontend.utils.db_connection import get_supabase_client, fetch_all_data, fetch_distinct_values
+from frontend.utils.data_version import version_de
+from frontend.utils.cache_registry import cache_de, invalidar
 
+# Columnas que muestra la página (el resto no se descarga)
+COLUMNAS = [
+    'codigo', 'producto', 'concentracion', 'forma_farmaceutica', 'presentacion',
+    'clasificacion', 'stock_actual', 'stock_reservado', 'stock_disponible', 'dmp',
+    'meses_en_movimiento', 'estado', 'estado_stock',
+]
 
-@st.cache_data(ttl=300)
-def load_stock():
-    """Carga todos los datos de stock (paginación interna) y ordena por stock_disponible."""
+
+@cache_de('stock_critico')
+def load_stock(estado=None, version=None):
+    """Carga el stock filtrado en Supabase (paginación interna), ordenado por stock_disponible."""
     try:
         client = get_supabase_client()
         if client is None:
             return pd.DataFrame()
-        data = fetch_all_data("stock_critico", client)
+        data = fetch_all_data(
+            "stock_critico", client,
+            columns=COLUMNAS,
+            filters={"estado": estado},
+            order=["stock_disponible", "codigo"],
+        )
         if not data:
             return pd.DataFrame()
-        df = pd.DataFrame(data)
-        if "stock_disponible" in df.columns:
-            df = df.sort_values("stock_disponible").reset_index(drop=True)
-        return df
+        return pd.DataFrame(data)
     except Exception as e:
         st.error(f"Error cargando stock: {e}")
         return pd.DataFrame()
 
 
+@cache_de('stock_critico')
+def load_estados(version=None):
+    """Estados distintos para el filtro."""
+    return fetch_distinct_values("stock_critico", "estado", get_supabase_client())
+
+
 def show():
     """Muestra la página de stock"""
     st.title("📦 Stock Crítico")
     st.markdown("---")
     
+    # Versión de los datos: clave de caché de los loaders (ver data_version)
+    version = version_de('stock_critico')
+
+    # Filtros (se aplican en Supabase)
+    estados = ['Todos'] + load_estados(version=version)
+    estado_selected = st.selectbox("Filtrar por Estado", estados)
+    
     # Cargar datos
     with st.spinner("Cargando datos de stock..."):
-        df = load_stock()
+        df = load_stock(estado=None if estado_selected == "Todos" else estado_selected, version=version)
     
     if df.empty:
         st.warning("No hay datos de stock disponibles.")
         return
     
-    # Filtros
-    if 'estado' in df.columns:
-        estados = ['Todos'] + list(df['estado'].unique())
-        estado_selected = st.selectbox("Filtrar por Estado", estados)
-        if estado_selected != "Todos":
-            df = df[df['estado'] == estado_selected]
-    
     # Métricas
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -92,7 +109,7 @@ def show():
     st.dataframe(df, width='stretch', hide_index=True)
     
     if st.button("🔄 Refrescar"):
-        st.cache_data.clear()
+        invalidar('stock_critico')
         st.rerun()
 
 
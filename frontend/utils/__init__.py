@@ -1,8 +1,23 @@
 """
 Utilidades para el frontend Streamlit
+Los nombres se importan al primer uso: importar un submódulo (ej.
+frontend.utils.db_connection) no carga los demás.
 """
-from .db_connection import get_supabase_client, get_supabase_connection, test_connection
-from .formatters import format_numeric, format_date, format_currency
+from importlib import import_module
 
-__all__ = ['get_supabase_client', 'get_supabase_connection', 'test_connection',
-           'format_numeric', 'format_date', 'format_currency']
+_EXPORTS = {
+    'get_supabase_client': 'db_connection',
+    'get_supabase_connection': 'db_connection',
+    'test_connection': 'db_connection',
+    'format_numeric': 'formatters',
+    'format_date': 'formatters',
+    'format_currency': 'formatters',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(import_module(f'.{_EXPORTS[name]}', __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,199 @@
+"""
+Acceso a datos asíncrono para las páginas (cliente async de supabase / postgrest).
+Las consultas independientes de una página se lanzan a la vez: la página tarda lo
+que la consulta más lenta, no la suma de todas.
+Streamlit ejecuta las páginas de forma síncrona: usar fetch_concurrente().
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, List, Any, Dict
+
+import streamlit as st
+
+from frontend.utils.db_connection import (
+    apply_filters,
+    build_query,
+    fetch_all_data,
+    get_supabase_client,
+    get_supabase_credentials,
+    orden_estable,
+    FETCH_MAX_WORKERS,
+    FETCH_RETRIES,
+    FETCH_RETRY_BACKOFF,
+)
+
+
+@lru_cache(maxsize=1)
+def _acreate_client():
+    """
+    acreate_client de supabase (versiones con cliente async) o None: sin él las
+    consultas se hacen una tras otra con el cliente síncrono. Se importa al
+    primer uso, no al cargar el módulo.
+    """
+    try:
+        from supabase import acreate_client
+    except ImportError:
+        return None
+    return acreate_client
+
+
+def consulta_tabla(tabla: str, columns: Optional[List[str]] = None, filters=None, order=None,
+                   limit: Optional[int] = None, page_size: int = 1000) -> dict:
+    """Consulta paginada de una tabla o vista (mismos parámetros que fetch_all_data)."""
+    return {"tabla": tabla, "columns": columns, "filters": filters, "order": order,
+            "limit": limit, "page_size": page_size}
+
+
+def consulta_rpc(funcion: str, params: Optional[dict] = None) -> dict:
+    """Llamada a una función RPC de Supabase."""
+    return {"rpc": funcion, "params": params or {}}
+
+
+async def _with_retry(fn, sem: asyncio.Semaphore):
+    """Await de `fn()` con reintentos; el semáforo acota las peticiones en vuelo."""
+    for attempt in range(FETCH_RETRIES + 1):
+        try:
+            async with sem:
+                return await fn()
+        except Exception:
+            if attempt == FETCH_RETRIES:
+                raise
+            await asyncio.sleep(FETCH_RETRY_BACKOFF * (2 ** attempt))
+
+
+async def _fetch_tabla(client, consulta: dict, sem: asyncio.Semaphore) -> List[Any]:
+    """Versión async de fetch_all_data: cuenta filas y pide todas las páginas a la vez."""
+    tabla, columns, filters = consulta["tabla"], consulta["columns"], consulta["filters"]
+    limit, page_size = consulta["limit"], consulta["page_size"]
+    order = orden_estable(tabla, consulta["order"])
+
+    async def _page(start: int, end: int) -> List[Any]:
+        query = build_query(client, tabla, columns, filters, order).range(start, end)
+        response = await _with_retry(query.execute, sem)
+        return getattr(response, "data", []) or []
+
+    async def _sequential(start: int) -> List[Any]:
+        data = []
+        while True:
+            size = page_size if limit is None else min(page_size, limit - start)
+            if size <= 0:
+                break
+            page = await _page(start, start + size - 1)
+            data.extend(page)
+            if len(page) < size:
+                break
+            start += size
+        return data
+
+    try:
+        count_query = apply_filters(client.table(tabla).select("*", count="exact", head=True), filters)
+        total = getattr(await _with_retry(count_query.execute, sem), "count", None)
+    except Exception:
+        total = None
+    if total is None:
+        return await _sequential(0)
+    if limit is not None:
+        total = min(total, limit)
+    if total <= 0:
+        return []
+
+    ranges = [(start, min(start + page_size, total) - 1) for start in range(0, total, page_size)]
+    # gather conserva el orden de las páginas
+    pages = await asyncio.gather(*(_page(start, end) for start, end in ranges))
+    data = [row for page in pages for row in page]
+
+    # Filas agregadas entre el conteo y la descarga
+    last_start, last_end = ranges[-1]
+    if len(pages[-1]) == last_end - last_start + 1 and (limit is None or total < limit):
+        data.extend(await _sequential(total))
+    return data
+
+
+async def _fetch_rpc(client, consulta: dict, sem: asyncio.Semaphore) -> Any:
+    response = await _with_retry(client.rpc(consulta["rpc"], consulta["params"]).execute, sem)
+    return getattr(response, "data", None)
+
+
+async def _fetch_todas(url: str, key: str, consultas: Dict[str, dict],
+                       max_workers: int) -> Dict[str, Any]:
+    """Ejecuta todas las consultas en un mismo loop; los errores se devuelven como valor."""
+    # El cliente async queda atado al loop que lo crea: uno por ejecución
+    client = await _acreate_client()(url, key)
+    sem = asyncio.Semaphore(max_workers)
+    try:
+        tareas = [
+            _fetch_rpc(client, c, sem) if "rpc" in c else _fetch_tabla(client, c, sem)
+            for c in consultas.values()
+        ]
+        resultados = await asyncio.gather(*tareas, return_exceptions=True)
+    finally:
+        aclose = getattr(client.postgrest, "aclose", None)
+        if aclose is not None:
+            await aclose()
+    return dict(zip(consultas.keys(), resultados))
+
+
+def _run(coro):
+    """asyncio.run desde código síncrono, aunque el hilo actual ya tenga un loop corriendo."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+def _fetch_secuencial(consultas: Dict[str, dict]) -> Dict[str, Any]:
+    """Sin cliente async: las mismas consultas con el cliente síncrono, una tras otra."""
+    client = get_supabase_client()
+    resultados = {}
+    for nombre, c in consultas.items():
+        try:
+            if "rpc" in c:
+                response = client.rpc(c["rpc"], c["params"]).execute()
+                resultados[nombre] = getattr(response, "data", None)
+            else:
+                resultados[nombre] = fetch_all_data(
+                    c["tabla"], client, page_size=c["page_size"], columns=c["columns"],
+                    filters=c["filters"], order=c["order"], limit=c["limit"],
+                )
+        except Exception as e:
+            resultados[nombre] = e
+    return resultados
+
+
+def fetch_concurrente(consultas: Dict[str, dict],
+                      max_workers: int = FETCH_MAX_WORKERS) -> Dict[str, Any]:
+    """
+    Ejecuta a la vez consultas independientes y devuelve {nombre: datos}.
+
+    `consultas` mapea un nombre a consulta_tabla(...) o consulta_rpc(...). Las
+    tablas devuelven la lista de filas ([] si fallan, con st.error como
+    fetch_all_data); las RPC devuelven su `data` o None si fallan (por ejemplo,
+    si la función no existe), para que el llamador use su alternativa.
+    `max_workers` acota las peticiones simultáneas entre todas las consultas.
+    """
+    if not consultas:
+        return {}
+    resultados = None
+    if _acreate_client() is not None:
+        try:
+            url, key = get_supabase_credentials()
+            resultados = _run(_fetch_todas(url, key, consultas, max_workers))
+        except Exception:
+            resultados = None
+    if resultados is None:
+        resultados = _fetch_secuencial(consultas)
+
+    salida = {}
+    for nombre, valor in resultados.items():
+        if isinstance(valor, Exception):
+            if "rpc" in consultas[nombre]:
+                salida[nombre] = None
+            else:
+                st.error(f"Error cargando {consultas[nombre]['tabla']}: {valor}")
+                salida[nombre] = []
+        else:
+            salida[nombre] = valor
+    return salida
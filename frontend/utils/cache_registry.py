@@ -0,0 +1,75 @@
+"""
+Cachés de las páginas registradas por conjunto de datos (tablero, ejecucion,
+ordenes, stock_critico, pedidos...).
+En lugar de st.cache_data.clear(), que borra todo lo cacheado para todos los
+usuarios, se invalida solo lo que depende de los datos que cambiaron:
+guardar una cantidad solicitada limpia lo derivado del tablero, no las órdenes.
+"""
+from typing import Callable, Dict, Set
+
+import streamlit as st
+
+from frontend.utils.data_version import CACHE_MAX_ENTRIES, DATASET_TABLERO, refrescar_versiones
+
+# Conjuntos derivados de cada tabla: la vista del tablero se arma con estas tablas
+# (ver vista_tablero_principal en database/supabase/migracion_definitiva.sql)
+DEPENDENCIAS = {
+    "ordenes": (DATASET_TABLERO,),
+    "ejecucion": (DATASET_TABLERO,),
+    "datosejecucion": (DATASET_TABLERO,),
+    "stock_critico": (DATASET_TABLERO,),
+    "cantidad_solicitada": (DATASET_TABLERO,),
+    "vencimientos_parques": (DATASET_TABLERO,),
+    "pedidos": (),
+    DATASET_TABLERO: (),
+}
+
+# {dataset: {clave de la función: función cacheada}}
+_REGISTRO: Dict[str, Dict[str, Callable]] = {}
+
+
+def cache_de(*datasets: str, max_entries: int = CACHE_MAX_ENTRIES):
+    """
+    Decorador: st.cache_data(max_entries=...) y registro del loader bajo
+    `datasets` (los datos de los que depende), para invalidar() por conjunto.
+    """
+    def decorar(fn):
+        cacheada = st.cache_data(max_entries=max_entries)(fn)
+        # Las páginas se re-ejecutan en cada interacción: la clave (archivo + nombre)
+        # reemplaza la función anterior en vez de acumular copias
+        clave = f"{fn.__code__.co_filename}:{fn.__qualname__}"
+        for dataset in datasets:
+            _REGISTRO.setdefault(dataset, {})[clave] = cacheada
+        return cacheada
+    return decorar
+
+
+def afectados(*datasets: str) -> Set[str]:
+    """`datasets` más todo lo que depende de ellos (transitivo)."""
+    resultado: Set[str] = set()
+    pendientes = list(datasets)
+    while pendientes:
+        dataset = pendientes.pop()
+        if dataset in resultado:
+            continue
+        resultado.add(dataset)
+        pendientes.extend(DEPENDENCIAS.get(dataset, ()))
+    return resultado
+
+
+def invalidar(*datasets: str) -> int:
+    """
+    Limpia la caché de los loaders que dependen de `datasets` (y de sus derivados)
+    y vuelve a leer las versiones de datos. Los loaders de páginas que todavía no
+    se ejecutaron en este proceso no tienen caché que limpiar.
+
+    Returns:
+        Cantidad de loaders limpiados
+    """
+    limpiadas = {}
+    for dataset in afectados(*datasets):
+        limpiadas.update(_REGISTRO.get(dataset, {}))
+    for cacheada in limpiadas.values():
+        cacheada.clear()
+    refrescar_versiones()
+    return len(limpiadas)
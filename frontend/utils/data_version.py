@@ -0,0 +1,133 @@
+"""
+Versiones de datos para la caché de las páginas (tabla public.data_version,
+ver database/supabase/data_version.sql).
+Los loaders reciben `version=version_de(...)` como argumento: la caché de
+Streamlit se indexa por esa versión, así que mientras no cambie no se vuelve a
+descargar nada y, cuando el sync o una edición la sube, la próxima carga trae
+los datos nuevos sin esperar a que venza un ttl.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+import streamlit as st
+
+from frontend.utils.db_connection import get_supabase_client, refrescar_vista_tablero
+
+# Cada cuánto se vuelve a consultar data_version (una petición chica para todo el servidor)
+VERSION_PROBE_TTL = 10
+# Sin tabla data_version (script no ejecutado): la versión cambia cada este intervalo,
+# igual que el ttl=300 anterior
+VERSION_FALLBACK_TTL = 300
+# bump_data_version() sube cada conjunto como mucho una vez cada 5 s por la API:
+# si omitió alguno, otro intento pasado ese intervalo alcanza (la versión que
+# subió otra sesión en el medio ya es posterior a este cambio)
+VERSION_INTENTOS = 2
+VERSION_ESPERA_S = 5
+# Entradas por loader: versiones viejas y combinaciones de filtros salen por LRU
+CACHE_MAX_ENTRIES = 32
+
+# Última publicación en segundo plano de la sesión (ver avisar_publicacion_fallida)
+CLAVE_PUBLICACION = "publicacion_segundo_plano"
+
+logger = logging.getLogger(__name__)
+
+# Conjunto de datos de la vista del tablero (además de las tablas sincronizadas)
+DATASET_TABLERO = "tablero"
+# Sube solo con el sync (no con las ediciones del dashboard)
+DATASET_SINCRONIZACION = "sincronizacion"
+
+
+@st.cache_data(ttl=VERSION_PROBE_TTL, show_spinner=False)
+def _leer_versiones() -> Optional[dict]:
+    """{dataset: versión} desde Supabase; None si la tabla no existe o falla la consulta."""
+    client = get_supabase_client()
+    if client is None:
+        return None
+    try:
+        response = client.table("data_version").select("dataset,version").execute()
+        return {r["dataset"]: r["version"] for r in (getattr(response, "data", []) or [])}
+    except Exception:
+        return None
+
+
+def version_de(*datasets: str) -> tuple:
+    """
+    Clave de caché para datos que dependen de `datasets`. Pasarla como argumento
+    `version` del loader cacheado.
+    """
+    versiones = _leer_versiones()
+    if versiones is None:
+        return ("ttl", int(time.time() // VERSION_FALLBACK_TTL))
+    return tuple(versiones.get(d, 0) for d in datasets)
+
+
+def marcar_cambio(client, *datasets: str) -> bool:
+    """
+    Sube la versión de `datasets` después de escribir en Supabase (RPC
+    bump_data_version) y descarta la versión leída, para que esta sesión vea el
+    cambio en la próxima carga. Retorna False si la función no existe.
+    Desde la API la función sube cada conjunto como mucho una vez cada
+    VERSION_ESPERA_S segundos y devuelve FALSE si omitió alguno: se reintenta
+    pasado el intervalo (puede esperar; se llama desde publicar_en_segundo_plano).
+    """
+    ok = False
+    if client is not None and datasets:
+        for intento in range(VERSION_INTENTOS):
+            if intento:
+                time.sleep(VERSION_ESPERA_S)
+            try:
+                response = client.rpc("bump_data_version", {"p_datasets": list(datasets)}).execute()
+            except Exception:
+                ok = False
+                break
+            # Versiones anteriores de la función devuelven void (data None)
+            ok = getattr(response, "data", None) is not False
+            if ok:
+                break
+    refrescar_versiones()
+    return ok
+
+
+def publicar_en_segundo_plano(client, *datasets: str) -> threading.Thread:
+    """
+    Después de guardar: refresca la vista materializada y sube la versión de
+    `datasets` en un hilo aparte, sin hacer esperar al usuario. Mientras tanto
+    las páginas muestran la actualización optimista; la versión nueva hace que la
+    próxima carga traiga los valores del servidor.
+    El hilo queda en la sesión: si el refresco falla, avisar_publicacion_fallida()
+    lo informa en la próxima ejecución de la página.
+    """
+    def _publicar():
+        hilo.refrescado = refrescar_vista_tablero(client)
+        if hilo.refrescado is False:
+            logger.warning("No se pudo refrescar la vista del tablero después de guardar (%s)",
+                           ", ".join(datasets))
+        marcar_cambio(client, *datasets)
+
+    hilo = threading.Thread(target=_publicar, name="publicar-cambio", daemon=True)
+    hilo.refrescado = None
+    hilo.start()
+    st.session_state[CLAVE_PUBLICACION] = hilo
+    return hilo
+
+
+def avisar_publicacion_fallida() -> None:
+    """
+    Si la última publicación en segundo plano de la sesión terminó sin poder
+    refrescar la vista, muestra un aviso (una sola vez).
+    """
+    hilo = st.session_state.get(CLAVE_PUBLICACION)
+    if hilo is None or hilo.is_alive():
+        return
+    st.session_state.pop(CLAVE_PUBLICACION, None)
+    if hilo.refrescado is False:
+        st.warning("⚠️ Los últimos cambios se guardaron, pero no se pudo refrescar el tablero: "
+                   "el tablero puede mostrar los valores anteriores hasta el próximo "
+                   "guardado o sincronización.")
+
+
+def refrescar_versiones() -> None:
+    """Descarta las versiones leídas: la próxima consulta a version_de() va a Supabase."""
+    _leer_versiones.clear()
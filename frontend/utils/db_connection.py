@@ -2,41 +2,270 @@
 Conexión a Supabase exclusivamente vía API REST (HTTPS 443).
 Cero SQLAlchemy, psycopg2 o puerto 5432.
 Credenciales en .streamlit/secrets.toml: SUPABASE_URL y SUPABASE_KEY.
+La librería supabase se importa recién al crear el cliente (arranque más rápido).
 """
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
-from supabase import create_client, Client
-from typing import Optional, List, Any
+from typing import Optional, List, Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+
+# Operadores de filtro que se empujan a PostgREST: (columna, operador, valor)
+FILTER_OPS = ("eq", "neq", "gt", "gte", "lt", "lte", "in", "contains", "is")
+
+
+def apply_filters(query, filters):
+    """
+    Agrega filtros a una consulta PostgREST (se resuelven en el servidor).
+
+    `filters` acepta:
+      - dict {columna: valor}  → igualdad
+      - lista de tuplas (columna, operador, valor) con operador en FILTER_OPS:
+        eq/neq/gt/gte/lt/lte (comparación), in (lista de valores),
+        contains (texto que contiene, sin distinguir mayúsculas), is (null/true/false)
+    Los filtros con valor None se omiten (ej. "Todos" en un selectbox).
+    """
+    if not filters:
+        return query
+    items = filters.items() if isinstance(filters, dict) else filters
+    for item in items:
+        if len(item) == 2:
+            column, op, value = item[0], "eq", item[1]
+        else:
+            column, op, value = item
+        if value is None and op != "is":
+            continue
+        if op not in FILTER_OPS:
+            raise ValueError(f"Operador de filtro no soportado: {op}")
+        if op == "in":
+            query = query.in_(column, list(value))
+        elif op == "contains":
+            query = query.ilike(column, f"%{value}%")
+        elif op == "is":
+            query = query.is_(column, "null" if value is None else str(value).lower())
+        else:
+            query = getattr(query, op)(column, value)
+    return query
+
+
+def apply_order(query, order):
+    """
+    Agrega el orden a una consulta PostgREST. `order` es una columna o lista de
+    columnas; prefijo "-" = descendente (ej. ["-fecha_orden", "id"]).
+    """
+    if not order:
+        return query
+    for column in ([order] if isinstance(order, str) else order):
+        if column.startswith("-"):
+            query = query.order(column[1:], desc=True)
+        else:
+            query = query.order(column)
+    return query
+
+
+def build_query(supabase_client: Client, table_name: str, columns: Optional[List[str]] = None,
+                filters=None, order=None):
+    """Consulta con proyección (`columns`), filtros y orden ya aplicados en la petición."""
+    query = supabase_client.table(table_name).select(",".join(columns) if columns else "*")
+    query = apply_filters(query, filters)
+    return apply_order(query, order)
+
+
+# Páginas pedidas en paralelo por fetch_all_data (acotado: no saturar la API)
+FETCH_MAX_WORKERS = 6
+# Reintentos por petición (cada página se reintenta sola) y espera base entre intentos
+FETCH_RETRIES = 2
+FETCH_RETRY_BACKOFF = 0.5
+# Clave única por tabla para que el orden sea total y las páginas no se solapen.
+# Tablas no listadas: "id".
+ORDEN_ESTABLE = {
+    "datosejecucion": ["id_llamado"],
+    "cantidad_solicitada": ["id_llamado", "licitacion", "codigo", "item"],
+    "vista_tablero_materializada": ["id_llamado", "licitacion", "codigo", "item"],
+    "vista_tablero_principal": ["id_llamado", "licitacion", "codigo", "item"],
+}
+
 
+def _with_retry(fn):
+    """Ejecuta `fn` reintentando ante errores de red/API con espera exponencial."""
+    for attempt in range(FETCH_RETRIES + 1):
+        try:
+            return fn()
+        except Exception:
+            if attempt == FETCH_RETRIES:
+                raise
+            time.sleep(FETCH_RETRY_BACKOFF * (2 ** attempt))
 
-def fetch_all_data(table_name: str, supabase_client: Optional[Client], page_size: int = 1000) -> List[Any]:
+
+def orden_estable(table_name: str, order) -> List[str]:
+    """Completa `order` con la clave única de la tabla (desempate estable entre páginas)."""
+    order = [order] if isinstance(order, str) else list(order or [])
+    presentes = {c.lstrip("-") for c in order}
+    return order + [k for k in ORDEN_ESTABLE.get(table_name, ["id"]) if k not in presentes]
+
+
+def count_rows(table_name: str, supabase_client: Client, filters=None) -> Optional[int]:
+    """Cantidad de filas (con filtros) sin traer datos: petición HEAD con count='exact'."""
+    def _count():
+        query = supabase_client.table(table_name).select("*", count="exact", head=True)
+        return apply_filters(query, filters).execute()
+    response = _with_retry(_count)
+    return getattr(response, "count", None)
+
+
+def _fetch_page(supabase_client: Client, table_name: str, columns, filters, order,
+                start: int, end: int) -> List[Any]:
+    """Una página [start, end] (range inclusivo de PostgREST), con reintentos."""
+    def _page():
+        query = build_query(supabase_client, table_name, columns, filters, order)
+        return getattr(query.range(start, end).execute(), "data", []) or []
+    return _with_retry(_page)
+
+
+def _fetch_sequential(supabase_client: Client, table_name: str, page_size: int, columns,
+                      filters, order, limit: Optional[int], start: int = 0) -> List[Any]:
+    """Páginas una tras otra desde `start` hasta una página incompleta."""
+    all_data = []
+    while True:
+        size = page_size if limit is None else min(page_size, limit - start)
+        if size <= 0:
+            break
+        data = _fetch_page(supabase_client, table_name, columns, filters, order, start, start + size - 1)
+        if not data:
+            break
+        all_data.extend(data)
+        if len(data) < size:
+            break
+        start += size
+    return all_data
+
+
+def fetch_filas(table_name: str, supabase_client: Client, *, columns: Optional[List[str]] = None,
+                filters=None, order=None, page_size: int = 1000,
+                limit: Optional[int] = None) -> List[Any]:
+    """
+    Como fetch_all_data pero página por página y SIN atrapar errores: el que llama
+    decide qué hacer si falla (ej. caer a una carga completa). El orden se completa
+    con la clave de la tabla (orden_estable).
+    """
+    return _fetch_sequential(supabase_client, table_name, page_size, columns, filters,
+                             orden_estable(table_name, order), limit)
+
+
+def fetch_all_data(table_name: str, supabase_client: Optional[Client], page_size: int = 1000,
+                   columns: Optional[List[str]] = None, filters=None, order=None,
+                   limit: Optional[int] = None, max_workers: int = FETCH_MAX_WORKERS) -> List[Any]:
     """
     Trae todos los registros de una **tabla** usando paginación interna (.range).
-    No usar para vistas pesadas (ej. vista_tablero_principal): usar fetch_vista_tablero().
+    Columnas, filtros y orden se resuelven en Supabase (ver build_query/apply_filters);
+    `limit` corta el total de filas.
+    Primero cuenta las filas (HEAD count='exact') y luego pide las páginas en paralelo
+    (hasta `max_workers` a la vez), devolviéndolas en orden. El orden se completa con
+    la clave de la tabla para que las páginas no se solapen. `page_size` no debe superar
+    el máximo de filas por respuesta configurado en Supabase (1000 por defecto).
+    No usar para la vista del tablero: usar fetch_vista_tablero() / fetch_vista_tablero_todos().
     """
     if supabase_client is None:
         return []
-    all_data = []
-    start = 0
+    order = orden_estable(table_name, order)
     try:
-        while True:
-            end = start + page_size - 1  # PostgREST: range inclusivo
-            response = supabase_client.table(table_name).select("*").range(start, end).execute()
-            data = getattr(response, "data", []) or []
-            if not data:
-                break
-            all_data.extend(data)
-            if len(data) < page_size:
-                break
-            start += page_size
+        try:
+            total = count_rows(table_name, supabase_client, filters)
+        except Exception:
+            total = None
+        if total is None:
+            # Sin conteo: paginación secuencial (comportamiento anterior)
+            return _fetch_sequential(supabase_client, table_name, page_size, columns, filters, order, limit)
+        if limit is not None:
+            total = min(total, limit)
+        if total <= 0:
+            return []
+
+        ranges = [(start, min(start + page_size, total) - 1) for start in range(0, total, page_size)]
+        workers = max(1, min(max_workers, len(ranges)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map conserva el orden de las páginas aunque terminen en otro orden
+            pages = list(pool.map(
+                lambda r: _fetch_page(supabase_client, table_name, columns, filters, order, r[0], r[1]),
+                ranges,
+            ))
+        all_data = [row for page in pages for row in page]
+
+        # Filas agregadas entre el conteo y la descarga: seguir secuencialmente
+        last_start, last_end = ranges[-1]
+        if len(pages[-1]) == last_end - last_start + 1 and (limit is None or total < limit):
+            all_data.extend(_fetch_sequential(
+                supabase_client, table_name, page_size, columns, filters, order, limit, start=total
+            ))
+        return all_data
     except Exception as e:
+        # Solo desde el hilo principal: los hilos del pool no pueden usar st.*
         st.error(f"Error paginando {table_name}: {e}")
+        return []
+
+
+def fetch_rpc_paginado(supabase_client: Client, funcion: str, params: Optional[dict] = None,
+                       page_size: int = 1000) -> List[Any]:
+    """
+    Todas las filas de una RPC que devuelve una tabla, paginadas con .range():
+    PostgREST recorta también las respuestas de las RPC a su máximo de filas.
+    La función debe tener un orden total (ORDER BY por una clave única) para que
+    las páginas no se solapen. Se corta con una página vacía y se avanza por las
+    filas recibidas (el servidor puede devolver menos que `page_size`).
+    Los errores se propagan (ej. la función no existe).
+    """
+    all_data: List[Any] = []
+    start = 0
+    while True:
+        response = _with_retry(
+            lambda: supabase_client.rpc(funcion, params or {}).range(start, start + page_size - 1).execute()
+        )
+        data = getattr(response, "data", []) or []
+        if not data:
+            break
+        all_data.extend(data)
+        start += len(data)
     return all_data
 
 
+def fetch_distinct_values(table_name: str, column: str, supabase_client: Optional[Client]) -> List[Any]:
+    """
+    Valores distintos de una columna (para opciones de filtros). Los calcula
+    Supabase (RPC valores_distintos, ver database/supabase/valores_distintos.sql);
+    si la función no existe, trae solo esa columna y deduplica acá.
+    """
+    if supabase_client is None:
+        return []
+    try:
+        data = fetch_rpc_paginado(supabase_client, "valores_distintos",
+                                  {"p_tabla": table_name, "p_columna": column})
+        return [r["valor"] for r in data if r.get("valor") is not None]
+    except Exception:
+        pass
+    data = fetch_all_data(table_name, supabase_client, columns=[column], order=[column])
+    values = {row.get(column) for row in data if row.get(column) is not None}
+    return sorted(values, key=str)
+
+
 # Tamaño de cada petición al cargar la vista (solo para no hacer timeout). NO hay tope total.
 CHUNK_SIZE_VISTA = 8000
+# Página de la RPC tablero_pagina: igual al máximo de filas por respuesta de
+# Supabase (1000 por defecto). Pedir más solo hace que el servidor lea filas que
+# después recorta.
+CHUNK_SIZE_RPC = 1000
 # Límite para una sola petición (solo dashboard_principal/dashboard que no usan lotes).
 VISTA_TABLERO_LIMIT = 15000
+# Orígenes del tablero en orden de preferencia: la vista materializada (filas ya
+# calculadas, ver database/supabase/vista_tablero_materializada.sql) y, si todavía
+# no se creó en Supabase, la vista normal.
+VISTA_TABLERO_MATERIALIZADA = "vista_tablero_materializada"
+VISTA_TABLERO = "vista_tablero_principal"
+VISTA_TABLERO_ORIGENES = (VISTA_TABLERO_MATERIALIZADA, VISTA_TABLERO)
 
 
 def fetch_vista_tablero(supabase_client: Optional[Client], limit: Optional[int] = None) -> List[Any]:
@@ -47,72 +276,297 @@ def fetch_vista_tablero(supabase_client: Optional[Client], limit: Optional[int]
     if supabase_client is None:
         return []
     cap = min(limit or VISTA_TABLERO_LIMIT, VISTA_TABLERO_LIMIT)
-    try:
-        response = supabase_client.table("vista_tablero_principal").select("*").limit(cap).execute()
-        return getattr(response, "data", []) or []
-    except Exception as e:
-        st.error(f"Error cargando vista tablero: {e}")
-        return []
+    error = None
+    for origen in VISTA_TABLERO_ORIGENES:
+        try:
+            response = supabase_client.table(origen).select("*").limit(cap).execute()
+            return getattr(response, "data", []) or []
+        except Exception as e:
+            error = e
+    st.error(f"Error cargando vista tablero: {error}")
+    return []
+
+
+def _fetch_vista_por_clave(supabase_client: Client) -> List[Any]:
+    """
+    Pagina la vista materializada con la RPC tablero_pagina (keyset): cada página
+    pide las filas posteriores a la última clave recibida, así el costo por página
+    es constante. Se corta con una página vacía (no con una página corta), porque
+    el servidor puede recortar las respuestas a su propio máximo de filas.
+    """
+    all_data: List[Any] = []
+    params = {"p_limite": CHUNK_SIZE_RPC}
+    while True:
+        response = supabase_client.rpc("tablero_pagina", params).execute()
+        data = getattr(response, "data", []) or []
+        if not data:
+            break
+        all_data.extend(data)
+        params = {**_clave_cursor(data[-1]), "p_limite": CHUNK_SIZE_RPC}
+    return all_data
+
+
+def _fetch_vista_por_rango(supabase_client: Client, origen: str) -> List[Any]:
+    """Pagina `origen` con .range() (OFFSET). Solo si la RPC tablero_pagina no existe."""
+    all_data: List[Any] = []
+    start = 0
+    while True:
+        end = start + CHUNK_SIZE_VISTA - 1  # PostgREST: range inclusivo
+        response = (
+            supabase_client.table(origen)
+            .select("*")
+            .order("id_llamado")
+            .order("licitacion")
+            .order("codigo")
+            .order("item")
+            .range(start, end)
+            .execute()
+        )
+        data = getattr(response, "data", []) or []
+        if not data:
+            break
+        all_data.extend(data)
+        if len(data) < CHUNK_SIZE_VISTA:
+            break
+        start += CHUNK_SIZE_VISTA
+    return all_data
 
 
 def fetch_vista_tablero_todos(supabase_client: Optional[Client]) -> List[Any]:
     """
     Carga TODOS los registros de la vista por lotes. Sin límite total: crece con tus datos
     (40k, 100k, 200k...). Solo se limita el tamaño de cada petición (CHUNK_SIZE_VISTA).
+    Usa la RPC tablero_pagina (keyset) y, si todavía no se creó en Supabase, .range().
     """
     if supabase_client is None:
         return []
-    all_data: List[Any] = []
-    start = 0
     try:
-        while True:
-            end = start + CHUNK_SIZE_VISTA - 1  # PostgREST: range inclusivo
-            response = (
-                supabase_client.table("vista_tablero_principal")
-                .select("*")
-                .order("id_llamado")
-                .order("licitacion")
-                .order("codigo")
-                .order("item")
-                .range(start, end)
-                .execute()
-            )
-            data = getattr(response, "data", []) or []
-            if not data:
-                break
-            all_data.extend(data)
-            if len(data) < CHUNK_SIZE_VISTA:
-                break
-            start += CHUNK_SIZE_VISTA
-    except Exception as e:
-        st.error(f"Error cargando vista tablero por lotes: {e}")
-    return all_data
+        return _fetch_vista_por_clave(supabase_client)
+    except Exception:
+        pass
+    error = None
+    for origen in VISTA_TABLERO_ORIGENES:
+        try:
+            return _fetch_vista_por_rango(supabase_client, origen)
+        except Exception as e:
+            error = e
+    st.error(f"Error cargando vista tablero por lotes: {error}")
+    return []
+
+
+def fetch_tablero_kpis(supabase_client: Optional[Client], licitacion: Optional[str] = None,
+                       nivel_stock: Optional[str] = None) -> Optional[dict]:
+    """
+    KPIs y desgloses del tablero ya agregados en Supabase (RPC tablero_kpis).
+    Retorna None si la función no existe (el llamador puede calcularlos con las filas).
+    """
+    if supabase_client is None:
+        return None
+    try:
+        response = supabase_client.rpc(
+            "tablero_kpis", {"p_licitacion": licitacion, "p_nivel_stock": nivel_stock}
+        ).execute()
+        data = getattr(response, "data", None)
+        return data if isinstance(data, dict) else None
+    except Exception:
+        return None
+
+
+def fetch_tablero_licitaciones(supabase_client: Optional[Client]) -> Optional[List[str]]:
+    """Licitaciones distintas del tablero (RPC tablero_licitaciones). None si no existe."""
+    if supabase_client is None:
+        return None
+    try:
+        response = supabase_client.rpc("tablero_licitaciones").execute()
+        data = getattr(response, "data", []) or []
+        return [r["licitacion"] for r in data if r.get("licitacion")]
+    except Exception:
+        return None
+
+
+def fetch_llamados_contrato(supabase_client: Optional[Client],
+                            page_size: int = 1000) -> Optional[List[dict]]:
+    """
+    Llamados distintos de ejecución con sus datos de contrato (RPC
+    llamados_contrato, una fila por id_llamado/licitación, paginada con
+    fetch_rpc_paginado). None si no existe.
+    """
+    if supabase_client is None:
+        return None
+    try:
+        return fetch_rpc_paginado(supabase_client, "llamados_contrato", page_size=page_size)
+    except Exception:
+        return None
+
+
+# Bloques de la grilla editable (ver fetch_vista_tablero_bloque)
+BLOQUE_TAMANO_MAX = 5000
+
+
+def _clave_cursor(fila: dict) -> dict:
+    """Parámetros keyset de tablero_pagina/tablero_bloque a partir de la última fila recibida."""
+    return {
+        "p_id_llamado": fila.get("id_llamado"),
+        "p_licitacion": fila.get("licitacion"),
+        "p_codigo": fila.get("codigo"),
+        "p_item": fila.get("item"),
+    }
+
+
+def fetch_vista_tablero_bloque(supabase_client: Optional[Client], tamano: int = 500,
+                               cursor: Optional[dict] = None, inicio: int = 0,
+                               licitacion: Optional[str] = None, nivel_stock: Optional[str] = None,
+                               busqueda: Optional[str] = None, orden=None):
+    """
+    Un bloque del tablero con filtros y orden resueltos en Supabase (para la grilla
+    por bloques: el navegador recibe solo las filas visibles).
+
+    Con el orden por clave (`orden` None) usa la RPC tablero_bloque (keyset): `cursor`
+    es la última fila del bloque anterior (None = primer bloque) y cada bloque es una
+    búsqueda en el índice. Con otro orden (ej. ["cobertura_meses"]) pagina la vista
+    con .range(inicio, ...).
+
+    Returns:
+        (filas, total de filas con los filtros o None si no se pudo contar)
+    """
+    if supabase_client is None:
+        return [], None
+    tamano = max(1, min(tamano, BLOQUE_TAMANO_MAX))
+    busqueda = (busqueda or "").strip() or None
+    if orden is None:
+        params = {
+            "p_filtro_licitacion": licitacion or None,
+            "p_nivel_stock": nivel_stock or None,
+            "p_busqueda": busqueda,
+        }
+        bloque = {**params, **(_clave_cursor(cursor) if cursor else {}), "p_limite": tamano}
+        filas = getattr(supabase_client.rpc("tablero_bloque", bloque).execute(), "data", []) or []
+        try:
+            total = supabase_client.rpc("tablero_bloque_total", params).execute().data
+        except Exception:
+            total = None
+        return filas, total
+
+    query = supabase_client.table(VISTA_TABLERO_MATERIALIZADA).select("*", count="exact")
+    query = apply_filters(query, {"licitacion": licitacion or None, "nivel_stock": nivel_stock or None})
+    if busqueda:
+        # Sintaxis or= de PostgREST: comas y paréntesis no pueden ir en el valor
+        texto = "".join(c for c in busqueda if c not in ",()")
+        query = query.or_(f"producto.ilike.*{texto}*,codigo.ilike.*{texto}*")
+    query = apply_order(query, orden_estable(VISTA_TABLERO_MATERIALIZADA, orden))
+    response = query.range(inicio, inicio + tamano - 1).execute()
+    return getattr(response, "data", []) or [], getattr(response, "count", None)
+
+
+def filtros_detalle(licitacion: Optional[str] = None, niveles: Optional[List[str]] = None,
+                    cobertura_menor_a: Optional[float] = None) -> list:
+    """Filtros del detalle del tablero en formato apply_filters (None = sin filtro)."""
+    return [
+        ("licitacion", "eq", licitacion or None),
+        ("nivel_stock", "in", niveles or None),
+        ("cobertura_meses", "lt", cobertura_menor_a),
+    ]
+
+
+def fetch_vista_tablero_detalle(supabase_client: Optional[Client], columnas: List[str],
+                                licitacion: Optional[str] = None, niveles: Optional[List[str]] = None,
+                                cobertura_menor_a: Optional[float] = None,
+                                limit: int = 1000) -> List[Any]:
+    """
+    Filas del tablero filtradas en el servidor (solo `columnas`, hasta `limit`).
+    Para detalles/drill-down: no descarga el tablero completo.
+    """
+    if supabase_client is None:
+        return []
+    error = None
+    for origen in VISTA_TABLERO_ORIGENES:
+        try:
+            query = build_query(supabase_client, origen, columnas,
+                                filtros_detalle(licitacion, niveles, cobertura_menor_a),
+                                ["id_llamado", "licitacion", "codigo", "item"])
+            response = query.limit(limit).execute()
+            return getattr(response, "data", []) or []
+        except Exception as e:
+            error = e
+    st.error(f"Error cargando detalle del tablero: {error}")
+    return []
+
+
+# refrescar_vista_tablero() admite un refresco cada 10 s: si lo omite, reintentar
+# pasado ese intervalo (hasta REFRESCO_INTENTOS llamadas en total)
+REFRESCO_INTENTOS = 3
+REFRESCO_ESPERA_S = 10
+
+
+def refrescar_vista_tablero(supabase_client: Optional[Client]) -> Optional[bool]:
+    """
+    Refresca la vista materializada del tablero (RPC refrescar_vista_tablero) para que
+    los cambios guardados se vean al recargar. Si la función no existe, no hace nada
+    y retorna None (sin vista materializada no hay nada que refrescar).
+    La función limita la frecuencia de los refrescos y devuelve FALSE cuando omite
+    uno: se reintenta después del intervalo, así que puede tardar; llamarla desde
+    un hilo aparte (ver publicar_en_segundo_plano).
+    """
+    if supabase_client is None:
+        return False
+    for intento in range(REFRESCO_INTENTOS):
+        if intento:
+            time.sleep(REFRESCO_ESPERA_S)
+        try:
+            response = supabase_client.rpc("refrescar_vista_tablero").execute()
+        except Exception as e:
+            # PGRST202: PostgREST no encuentra la función
+            return None if getattr(e, "code", None) == "PGRST202" else False
+        # Versiones anteriores de la función devuelven void (data None)
+        if getattr(response, "data", None) is not False:
+            return True
+    return False
+
+
+def get_supabase_credentials():
+    """(url, key) de Supabase desde st.secrets (también los usa el cliente async)."""
+    return st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"]
 
 
 @st.cache_resource
 def get_supabase_client() -> Client:
     try:
-        url = st.secrets["SUPABASE_URL"]
-        key = st.secrets["SUPABASE_KEY"]
+        from supabase import create_client
+        url, key = get_supabase_credentials()
         return create_client(url, key)
     except Exception as e:
         st.error(f"Error al configurar cliente Supabase: {e}")
         return None
 
 
-def test_connection(use_supabase: bool = True) -> bool:
-    """Prueba la conexión vía API REST. Compatible con app.py."""
-    if not use_supabase:
+# Tabla chica para verificar la conexión (ver database/supabase/data_version.sql)
+TABLA_SONDEO = "data_version"
+
+
+def sondear_conexion(supabase_client: Optional[Client]) -> bool:
+    """
+    Verificación liviana de la API: una fila de data_version (no la vista del
+    tablero). Un error de PostgREST (ej. la tabla no existe) también prueba que
+    el servidor respondió.
+    """
+    if supabase_client is None:
         return False
     try:
-        client = get_supabase_client()
-        if client is None:
-            return False
-        # Prueba mínima: listar una fila de una tabla existente
-        r = client.table("vista_tablero_principal").select("id_llamado").limit(1).execute()
+        supabase_client.table(TABLA_SONDEO).select("dataset").limit(1).execute()
         return True
-    except Exception:
+    except Exception as e:
+        try:
+            from postgrest.exceptions import APIError
+        except ImportError:
+            return False
+        return isinstance(e, APIError)
+
+
+def test_connection(use_supabase: bool = True) -> bool:
+    """Prueba la conexión vía API REST (bloqueante; app.py usa estado_conexion)."""
+    if not use_supabase:
         return False
+    return sondear_conexion(get_supabase_client())
 
 
 # Alias para compatibilidad: el resto del proyecto puede seguir importando este nombre.
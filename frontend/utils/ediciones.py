@@ -0,0 +1,92 @@
+"""
+Guardado de ediciones de grillas: detectar solo las filas cambiadas (comparación
+vectorial contra los valores originales) y enviarlas a Supabase por lotes.
+Así un guardado cuesta lo que la cantidad de ediciones, no el tamaño de la tabla.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+# Registros por upsert (una petición a la API cada uno)
+UPSERT_LOTE = 500
+
+
+def _clave_normalizada(df: pd.DataFrame, clave: Sequence[str]) -> pd.MultiIndex:
+    """Clave como texto comparable (la grilla puede devolver 123.0 donde había 123)."""
+    partes = [
+        df[col].fillna("").astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+        for col in clave
+    ]
+    return pd.MultiIndex.from_arrays(partes, names=list(clave))
+
+
+def _distintos(original: pd.Series, editado: pd.Series, tipo: str) -> pd.Series:
+    """True donde el valor cambió (NaN/NaT en ambos lados = igual)."""
+    if tipo == "numero":
+        a = pd.to_numeric(original, errors="coerce").fillna(0).round(6)
+        b = pd.to_numeric(editado, errors="coerce").fillna(0).round(6)
+        return a != b
+    if tipo == "fecha":
+        a = pd.to_datetime(original, errors="coerce").dt.normalize()
+        b = pd.to_datetime(editado, errors="coerce").dt.normalize()
+    else:
+        a = original.fillna("").astype(str).str.strip()
+        b = editado.fillna("").astype(str).str.strip()
+    return (a != b) & ~(a.isna() & b.isna())
+
+
+def filas_modificadas(original: pd.DataFrame, editado: pd.DataFrame, clave: Sequence[str],
+                      editables: dict) -> pd.DataFrame:
+    """
+    Filas de `editado` cuyas columnas editables difieren de `original`.
+
+    Args:
+        original: Datos con los que se cargó la grilla
+        editado: Datos devueltos por la grilla (mismas columnas)
+        clave: Columnas que identifican la fila (se alinean por clave, no por posición)
+        editables: {columna: "numero" | "fecha" | "texto"}
+
+    Returns:
+        Subconjunto de `editado` (vacío si no hubo cambios)
+    """
+    if editado is None or editado.empty:
+        return pd.DataFrame(columns=editado.columns if editado is not None else None)
+    columnas = [c for c in editables if c in editado.columns and c in original.columns]
+    indice_editado = _clave_normalizada(editado, clave)
+    orig = original[columnas].set_axis(_clave_normalizada(original, clave))
+    orig = orig[~orig.index.duplicated(keep="first")]
+    # Filas que no estaban en el original: se guardan
+    cambio = pd.Series(~indice_editado.isin(orig.index), index=indice_editado)
+    orig = orig.reindex(indice_editado)
+    for col in columnas:
+        cambio |= _distintos(orig[col], editado[col].set_axis(indice_editado), editables[col])
+    return editado[cambio.to_numpy()]
+
+
+def upsert_por_lotes(client, tabla: str, registros: List[dict],
+                     lote: int = UPSERT_LOTE) -> Tuple[int, List[str]]:
+    """
+    Upsert de `registros` en lotes de `lote`. Un lote que falla no frena a los demás.
+
+    Returns:
+        (registros guardados, errores por lote: "filas 501-1000: <error>")
+    """
+    guardados, errores = 0, []
+    for inicio in range(0, len(registros), lote):
+        parte = registros[inicio:inicio + lote]
+        try:
+            client.table(tabla).upsert(parte).execute()
+            guardados += len(parte)
+        except Exception as e:
+            errores.append(f"filas {inicio + 1}-{inicio + len(parte)}: {e}")
+    return guardados, errores
+
+
+def resumen_errores(errores: List[str], maximo: int = 5) -> Optional[str]:
+    """Texto para st.error con los primeros `maximo` errores por lote (None si no hay)."""
+    if not errores:
+        return None
+    texto = "; ".join(errores[:maximo])
+    if len(errores) > maximo:
+        texto += f" (y {len(errores) - maximo} lotes más)"
+    return texto
@@ -0,0 +1,55 @@
+"""
+Estado de la conexión a Supabase para el indicador de app.py.
+La verificación corre en un hilo aparte y su resultado se guarda para todo el
+servidor: las páginas leen el último estado conocido y nunca esperan la red.
+"""
+import threading
+import time
+from typing import Optional
+
+import streamlit as st
+
+from frontend.utils.db_connection import get_supabase_client, sondear_conexion
+
+# Segundos durante los que el último resultado se considera vigente
+ESTADO_TTL = 30
+
+
+class EstadoConexion:
+    """Último resultado de sondear_conexion() y hora en que se obtuvo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.conectado: Optional[bool] = None
+        self.actualizado: float = 0.0
+        self._hilo: Optional[threading.Thread] = None
+
+    def _verificar(self) -> None:
+        # El cliente se crea acá y no en la ejecución de la página: importar
+        # supabase y crear el cliente también es parte de la espera. cache_resource
+        # funciona sin contexto de Streamlit (el hilo no lo tiene).
+        conectado = sondear_conexion(get_supabase_client())
+        with self._lock:
+            self.conectado = conectado
+            self.actualizado = time.monotonic()
+
+    def consultar(self) -> Optional[bool]:
+        """
+        Último estado conocido (None = todavía sin verificar). Si venció, lanza
+        una verificación en segundo plano y devuelve igual el valor anterior.
+        """
+        with self._lock:
+            vencido = time.monotonic() - self.actualizado > ESTADO_TTL
+            en_curso = self._hilo is not None and self._hilo.is_alive()
+            if vencido and not en_curso:
+                self._hilo = threading.Thread(
+                    target=self._verificar, name="estado-conexion", daemon=True,
+                )
+                self._hilo.start()
+            return self.conectado
+
+
+@st.cache_resource
+def get_estado_conexion() -> EstadoConexion:
+    """Estado de la conexión del proceso (uno para todas las sesiones)."""
+    return EstadoConexion()
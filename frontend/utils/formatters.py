@@ -1,11 +1,17 @@
 """
 Utilidades de formateo para el frontend
 """
-import pandas as pd
 from datetime import datetime
-from etl.utils.data_cleaner import DataCleaner
+from functools import lru_cache
+
+import pandas as pd
+
 
-cleaner = DataCleaner()
+@lru_cache(maxsize=1)
+def _cleaner():
+    """DataCleaner del ETL, importado al primer formateo (no al cargar la app)."""
+    from etl.utils.data_cleaner import DataCleaner
+    return DataCleaner()
 
 
 def format_numeric(value, is_percentage: bool = False, use_currency: bool = False) -> str:
@@ -20,7 +26,7 @@ def format_numeric(value, is_percentage: bool = False, use_currency: bool = Fals
     Returns:
         String formateado
     """
-    return cleaner.format_numeric_value(value, is_percentage, use_currency)
+    return _cleaner().format_numeric_value(value, is_percentage, use_currency)
 
 
 def format_date(date_value, format_str: str = "%d/%m/%Y") -> str:
@@ -39,7 +45,7 @@ def format_date(date_value, format_str: str = "%d/%m/%Y") -> str:
     
     try:
         if isinstance(date_value, str):
-            date_value = cleaner.safe_date_conversion(date_value)
+            date_value = _cleaner().safe_date_conversion(date_value)
         
         if isinstance(date_value, pd.Timestamp):
             return date_value.strftime(format_str)
@@ -0,0 +1,48 @@
+"""
+Memoización de la grilla AgGrid entre re-ejecuciones de Streamlit.
+Cada tecla o cambio de un selectbox vuelve a ejecutar la página: las opciones de
+la grilla (GridOptionsBuilder + JsCode) se arman una vez por firma de columnas y
+el DataFrame que se muestra (renombrado, sin duplicados) se guarda en la sesión
+mientras no cambie la versión de los datos.
+"""
+from typing import Callable, Hashable, Tuple
+
+import pandas as pd
+import streamlit as st
+
+
+def firma_columnas(df: pd.DataFrame) -> Tuple[Tuple[str, str], ...]:
+    """(columna, dtype) de `df`: clave de caché de las opciones de la grilla."""
+    return tuple((str(col), str(dtype)) for col, dtype in df.dtypes.items())
+
+
+def frame_de_firma(firma: Tuple[Tuple[str, str], ...]) -> pd.DataFrame:
+    """
+    DataFrame vacío con las columnas y tipos de `firma`: alcanza para
+    GridOptionsBuilder.from_dataframe, que solo mira los tipos.
+    """
+    columnas = {}
+    for col, dtype in firma:
+        try:
+            columnas[col] = pd.Series(dtype=dtype)
+        except TypeError:
+            columnas[col] = pd.Series(dtype="object")
+    return pd.DataFrame(columnas)
+
+
+def memo_sesion(nombre: str, clave: Hashable, construir: Callable[[], object]):
+    """
+    Valor de `construir()` guardado en st.session_state[nombre] mientras `clave`
+    no cambie (ej. la versión de los datos). Se devuelve el mismo objeto, sin copiar.
+    """
+    memo = st.session_state.get(nombre)
+    if memo is None or memo["clave"] != clave:
+        memo = {"clave": clave, "valor": construir()}
+        st.session_state[nombre] = memo
+    return memo["valor"]
+
+
+def descartar_memos(*nombres: str) -> None:
+    """Descarta los valores memoizados (después de guardar o de recargar a mano)."""
+    for nombre in nombres:
+        st.session_state.pop(nombre, None)
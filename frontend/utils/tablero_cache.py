@@ -0,0 +1,326 @@
+"""
+Copia del tablero en memoria del servidor con refresco por delta.
+Después de una edición en el dashboard (cantidad solicitada, datos del contrato)
+solo se descargan las filas de la vista con actualizado_en posterior a la copia
+y se reemplazan por clave; una sincronización (tablas nuevas) recarga todo.
+Las sesiones leen una instantánea compartida de solo lectura (copy-on-write de
+pandas): no copian el tablero, así la memoria no crece con los usuarios.
+"""
+import threading
+from datetime import timedelta
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from frontend.utils.db_connection import (
+    fetch_filas,
+    fetch_vista_tablero_todos,
+    VISTA_TABLERO_MATERIALIZADA,
+)
+from frontend.utils.data_version import version_de, DATASET_TABLERO, DATASET_SINCRONIZACION
+
+# Copy-on-write (pandas >= 2.0, opción del proceso): las copias superficiales y
+# las vistas derivadas (rename, head, columnas) comparten los datos hasta que
+# alguien escribe, y solo entonces se copia la parte modificada.
+try:
+    pd.set_option("mode.copy_on_write", True)
+    COPY_ON_WRITE = True
+except Exception:
+    COPY_ON_WRITE = False
+
+CLAVE_TABLERO = ["id_llamado", "licitacion", "codigo", "item"]
+COLUMNA_ACTUALIZADO = "actualizado_en"
+# Margen hacia atrás al pedir el delta: transacciones confirmadas tarde y relojes
+# de clientes desfasados (traer filas de más no cambia el resultado)
+DELTA_MARGEN = timedelta(minutes=10)
+# Columnas numéricas de la vista: tipadas una vez al cargar (la API las puede
+# devolver como texto o con nulos)
+COLUMNAS_NUMERICAS = [
+    "cantidad_maxima", "cantidad_emitida", "saldo_contrato", "porcentaje_emitido",
+    "precio_unitario", "pendiente_entrega", "stock_actual", "dmp_actual",
+    "cantidad_solicitada", "cobertura_meses",
+]
+
+
+def _ordenar(df: pd.DataFrame) -> pd.DataFrame:
+    columnas = [c for c in CLAVE_TABLERO if c in df.columns]
+    return df.sort_values(columnas, kind="stable") if columnas else df
+
+
+def normalizar_tablero(df: pd.DataFrame, ordenar: bool = True) -> pd.DataFrame:
+    """
+    Forma única del tablero para todas las páginas: columnas en minúscula,
+    numéricas tipadas, una fila por (id_llamado, licitacion, codigo, item) (la
+    más completa) y, con `ordenar`, orden por esa clave. Las fechas quedan como
+    texto ISO, como las recibe la grilla.
+    """
+    if df.empty:
+        return df
+    df.columns = [c.lower() if isinstance(c, str) else c for c in df.columns]
+    for col in COLUMNAS_NUMERICAS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    if set(CLAVE_TABLERO) <= set(df.columns):
+        # La fila más completa primero; misma clave que el índice (item NULL = '')
+        df = df.iloc[np.argsort(-df.notna().sum(axis=1).to_numpy(), kind="stable")]
+        df = df[~_claves_texto(df).duplicated(keep="first").to_numpy()]
+    if ordenar:
+        df = _ordenar(df)
+    return df.reset_index(drop=True)
+
+
+def recalcular_metricas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    cobertura_meses y nivel_stock con la misma fórmula que vista_tablero_principal
+    (database/supabase/migracion_definitiva.sql):
+    cobertura = ROUND((stock + saldo contrato + cantidad solicitada) / DMP, 1) si DMP > 0.
+    """
+    stock = pd.to_numeric(df["stock_actual"], errors="coerce").fillna(0)
+    saldo = pd.to_numeric(df["saldo_contrato"], errors="coerce").fillna(0)
+    cantidad = pd.to_numeric(df["cantidad_solicitada"], errors="coerce").fillna(0)
+    dmp = pd.to_numeric(df["dmp_actual"], errors="coerce").fillna(0)
+    cobertura = ((stock + saldo + cantidad) / dmp.where(dmp > 0)).round(1)
+    df = df.copy()
+    df["cobertura_meses"] = cobertura
+    # CASE de la vista, en el mismo orden (cobertura NULL cae en 'Óptimo')
+    df["nivel_stock"] = np.select(
+        [dmp == 0, stock == 0, cobertura < 1, cobertura.between(1, 3)],
+        ["Sin DMP", "Sin Stock", "Crítico", "Atención"],
+        default="Óptimo",
+    )
+    return df
+
+
+def _indexar(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Índice por la clave natural (item NULL = '', como el índice único de la vista).
+    Como texto: la misma clave llega como 123 o 123.0 según la columna tenga nulos.
+    """
+    df.index = pd.MultiIndex.from_frame(_claves_texto(df))
+    return df
+
+
+def _claves_texto(df: pd.DataFrame) -> pd.DataFrame:
+    claves = df[CLAVE_TABLERO].fillna("").astype(str)
+    return claves.apply(lambda col: col.str.strip().str.replace(r"\.0$", "", regex=True))
+
+
+def _aplicar_cantidades(df: pd.DataFrame, registros: List[dict]) -> int:
+    """
+    Escribe cantidad_solicitada / ver_en_fecha (upsert en cantidad_solicitada) en
+    `df` (indexado con _indexar) y recalcula cobertura y nivel de esas filas.
+    Retorna las filas actualizadas.
+    """
+    metricas = ["stock_actual", "saldo_contrato", "cantidad_solicitada", "dmp_actual"]
+    if not registros or not df.index.is_unique or not set(metricas) <= set(df.columns):
+        return 0
+    cambios = _indexar(pd.DataFrame(registros))
+    cambios = cambios[~cambios.index.duplicated(keep="last")]
+    filas = cambios.index.intersection(df.index)
+    if not len(filas):
+        return 0
+    df.loc[filas, "cantidad_solicitada"] = cambios.loc[filas, "cantidad_solicitada"]
+    if "ver_en_fecha" in df.columns and "emitir_en" in cambios.columns:
+        df.loc[filas, "ver_en_fecha"] = cambios.loc[filas, "emitir_en"]
+    recalculadas = recalcular_metricas(df.loc[filas])
+    df.loc[filas, ["cobertura_meses", "nivel_stock"]] = recalculadas[["cobertura_meses", "nivel_stock"]]
+    return len(filas)
+
+
+# Columnas del tablero que salen de datosejecucion: {columna de la vista: campo guardado}
+COLUMNAS_DATOS_CONTRATO = {"vigente": "vigente", "dirigido_a": "dirigido_a", "lugar": "lugares"}
+
+
+def _aplicar_datos_contrato(df: pd.DataFrame, registros: List[dict]) -> int:
+    """
+    Escribe vigente / dirigido_a / lugar (upsert en datosejecucion) en todas las
+    filas de cada llamado de `df` (indexado con _indexar). Retorna las filas
+    actualizadas.
+    """
+    if not registros or "id_llamado" not in df.index.names:
+        return 0
+    llamados = df.index.get_level_values("id_llamado")
+    total = 0
+    for registro in registros:
+        filas = llamados == str(int(registro["id_llamado"]))
+        if not filas.any():
+            continue
+        for col, campo in COLUMNAS_DATOS_CONTRATO.items():
+            if col in df.columns and campo in registro:
+                # Como la vista: COALESCE(..., '')
+                df.loc[filas, col] = registro[campo] or ""
+        total += int(filas.sum())
+    return total
+
+
+def superponer_cantidades(df: pd.DataFrame, registros: List[dict]) -> pd.DataFrame:
+    """
+    Copia de `df` (filas de la vista, ej. un bloque de la grilla) con los
+    registros guardados aplicados: lo que la vista todavía no refleja porque el
+    refresco corre en segundo plano.
+    """
+    if df.empty or not registros:
+        return df
+    df = _indexar(df.copy())
+    _aplicar_cantidades(df, registros)
+    return df.reset_index(drop=True)
+
+
+def superponer_datos_contrato(df: pd.DataFrame, registros: List[dict]) -> pd.DataFrame:
+    """Como superponer_cantidades, para los datos de contrato guardados (datosejecucion)."""
+    if df.empty or not registros:
+        return df
+    df = _indexar(df.copy())
+    _aplicar_datos_contrato(df, registros)
+    return df.reset_index(drop=True)
+
+
+def vista_compartida(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Objeto propio sobre los datos de `df` sin copiarlos (copy-on-write): escribir
+    en él copia solo lo modificado y no toca el original. Sin copy-on-write,
+    copia completa.
+    """
+    return df.copy(deep=not COPY_ON_WRITE)
+
+
+def _max_actualizado(df: pd.DataFrame) -> Optional[pd.Timestamp]:
+    if COLUMNA_ACTUALIZADO not in df.columns:
+        return None
+    maximo = pd.to_datetime(df[COLUMNA_ACTUALIZADO], utc=True, errors="coerce").max()
+    return None if pd.isna(maximo) else maximo
+
+
+class TableroCache:
+    """
+    Tablero indexado por (id_llamado, licitacion, codigo, item), compartido por
+    todas las sesiones del servidor.
+
+    `versiones` guarda las versiones de 'tablero' y 'sincronizacion' con las que
+    se armó la copia: si cambió solo 'tablero' (una edición), se pide el delta;
+    si cambió 'sincronizacion', se recarga todo.
+
+    `df` (indexado) solo se modifica con el lock tomado; después de cada cambio
+    se publica `_instantanea` (mismos datos, índice simple), que es lo que
+    reciben las sesiones. Una sesión que guarda una instantánea vieja sigue
+    viendo esos datos: los cambios posteriores copian solo las columnas tocadas.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.df: Optional[pd.DataFrame] = None
+        self._instantanea: Optional[pd.DataFrame] = None
+        self.versiones = None
+        # Mayor actualizado_en de la copia; None = sin delta posible (vista sin la
+        # columna o claves repetidas)
+        self.watermark: Optional[pd.Timestamp] = None
+        # Última carga: {"tipo": "completa" | "delta", "filas": n}
+        self.ultima_carga: Optional[dict] = None
+
+    def limpiar(self) -> None:
+        """Descarta la copia: la próxima lectura recarga todo."""
+        with self._lock:
+            self.df = None
+            self._instantanea = None
+            self.versiones = None
+            self.watermark = None
+
+    def _publicar(self) -> None:
+        self._instantanea = self.df.reset_index(drop=True) if self.df is not None else None
+
+    def _carga_completa(self, client) -> None:
+        df = normalizar_tablero(pd.DataFrame(fetch_vista_tablero_todos(client)))
+        if df.empty or not set(CLAVE_TABLERO) <= set(df.columns):
+            self.df, self.watermark = df, None
+        else:
+            self.df = _indexar(df)
+            self.watermark = _max_actualizado(df) if self.df.index.is_unique else None
+        self.ultima_carga = {"tipo": "completa", "filas": len(df)}
+
+    def _carga_delta(self, client) -> bool:
+        """Trae las filas editadas después del watermark y las aplica. False si no se pudo."""
+        desde = (self.watermark - DELTA_MARGEN).isoformat()
+        try:
+            filas = fetch_filas(
+                VISTA_TABLERO_MATERIALIZADA, client,
+                filters=[(COLUMNA_ACTUALIZADO, "gt", desde)],
+            )
+            delta = normalizar_tablero(pd.DataFrame(filas), ordenar=False)
+            if not delta.empty:
+                delta = _indexar(delta).reindex(columns=self.df.columns)
+                comunes = delta.index.intersection(self.df.index)
+                self.df.loc[comunes] = delta.loc[comunes]
+                nuevos = delta.index.difference(self.df.index)
+                if len(nuevos):
+                    # Las claves del índice son texto: se ordena por las columnas
+                    # (mismo orden que la carga completa) y se vuelve a indexar
+                    unidos = pd.concat([self.df, delta.loc[nuevos]]).reset_index(drop=True)
+                    self.df = _indexar(_ordenar(unidos))
+                maximo = _max_actualizado(delta)
+                if maximo is not None:
+                    self.watermark = max(self.watermark, maximo)
+        except Exception:
+            # La copia pudo quedar a medio actualizar: obtener() recarga todo
+            return False
+        self.ultima_carga = {"tipo": "delta", "filas": len(delta)}
+        return True
+
+    def aplicar_cantidades(self, registros: List[dict]) -> int:
+        """
+        Actualización optimista después de guardar en cantidad_solicitada: escribe
+        cantidad_solicitada / ver_en_fecha en la copia y recalcula cobertura y
+        nivel de esas filas, sin esperar el refresco de la vista. Las versiones no
+        cambian: cuando el refresco en segundo plano sube la versión, el delta
+        trae los valores del servidor.
+
+        Returns:
+            Filas actualizadas
+        """
+        return self._aplicar(_aplicar_cantidades, registros)
+
+    def aplicar_datos_contrato(self, registros: List[dict]) -> int:
+        """
+        Actualización optimista después de guardar en datosejecucion: escribe
+        vigente / dirigido_a / lugar en las filas de cada llamado, igual que
+        aplicar_cantidades.
+
+        Returns:
+            Filas actualizadas
+        """
+        return self._aplicar(_aplicar_datos_contrato, registros)
+
+    def _aplicar(self, aplicar, registros: List[dict]) -> int:
+        with self._lock:
+            if self.df is None:
+                return 0
+            filas = aplicar(self.df, registros)
+            if filas:
+                self._publicar()
+            return filas
+
+    def obtener(self, client) -> pd.DataFrame:
+        """
+        Tablero actualizado a la versión actual de los datos. Comparte los datos
+        con la instantánea del servidor (vista_compartida): el llamador puede
+        filtrar, renombrar o agregar columnas sin copiar el tablero ni afectar a
+        las otras sesiones.
+        """
+        versiones = version_de(DATASET_TABLERO, DATASET_SINCRONIZACION)
+        with self._lock:
+            if self.df is None or self.versiones is None or versiones[-1] != self.versiones[-1]:
+                self._carga_completa(client)
+            elif versiones != self.versiones:
+                if self.watermark is None or not self._carga_delta(client):
+                    self._carga_completa(client)
+            if self.versiones != versiones or self._instantanea is None:
+                self._publicar()
+            self.versiones = versiones
+            return vista_compartida(self._instantanea)
+
+
+@st.cache_resource
+def get_tablero_cache() -> TableroCache:
+    """Copia del tablero del proceso (una para todas las sesiones)."""
+    return TableroCache()
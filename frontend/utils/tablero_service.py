@@ -0,0 +1,78 @@
+"""
+Servicio del tablero para todas las páginas (dashboard, dashboard gerencial y
+dashboard editable). El tablero se carga una vez por versión de datos en la
+copia del servidor (TableroCache), ya normalizado: columnas en minúscula,
+numéricas tipadas, sin claves repetidas y ordenado por clave. Las páginas
+derivan de él sus vistas (filtros, KPIs, listas) sin volver a la API ni repetir
+la deduplicación.
+"""
+from typing import List, Optional
+
+import pandas as pd
+import streamlit as st
+
+from frontend.utils.db_connection import get_supabase_client
+from frontend.utils.tablero_cache import get_tablero_cache
+
+NIVELES_CRITICOS = ["Crítico", "Sin Stock"]
+
+
+def obtener_tablero(client=None) -> pd.DataFrame:
+    """Tablero completo a la versión actual de los datos (vacío si no hay conexión o falla)."""
+    client = client or get_supabase_client()
+    if client is None:
+        return pd.DataFrame()
+    try:
+        return get_tablero_cache().obtener(client)
+    except Exception as e:
+        st.error(f"Error cargando el tablero: {e}")
+        return pd.DataFrame()
+
+
+def filtrar_tablero(df: pd.DataFrame, licitacion: Optional[str] = None,
+                    nivel_stock: Optional[str] = None) -> pd.DataFrame:
+    """Filas de una licitación y/o nivel de stock (None = sin filtro)."""
+    if df.empty:
+        return df
+    mascara = pd.Series(True, index=df.index)
+    if licitacion and "licitacion" in df.columns:
+        mascara &= df["licitacion"] == licitacion
+    if nivel_stock and "nivel_stock" in df.columns:
+        mascara &= df["nivel_stock"] == nivel_stock
+    return df if mascara.all() else df[mascara]
+
+
+def licitaciones_tablero(df: pd.DataFrame) -> List[str]:
+    """Licitaciones distintas, ordenadas (como la RPC tablero_licitaciones)."""
+    if df.empty or "licitacion" not in df.columns:
+        return []
+    return sorted(df["licitacion"].dropna().unique().tolist())
+
+
+def kpis_tablero(df: pd.DataFrame) -> dict:
+    """Mismos KPIs que la RPC tablero_kpis, calculados sobre el tablero dado."""
+    por_lic = df.groupby("licitacion").agg(
+        items=("licitacion", "size"),
+        cantidad_maxima=("cantidad_maxima", "sum"),
+        cantidad_emitida=("cantidad_emitida", "sum"),
+    ).reset_index().sort_values("cantidad_maxima", ascending=False).head(10)
+    criticos = df["nivel_stock"].isin(NIVELES_CRITICOS)
+    por_prov = df.assign(critico=criticos).groupby("proveedor", dropna=False).agg(
+        items=("critico", "size"),
+        items_criticos=("critico", "sum"),
+        cantidad_maxima=("cantidad_maxima", "sum"),
+    ).reset_index().sort_values("items", ascending=False).head(10)
+    # Como jsonb en la RPC: proveedor faltante -> None, sumas en tipos nativos
+    por_prov["proveedor"] = por_prov["proveedor"].astype(object).where(por_prov["proveedor"].notna(), None)
+    por_nivel = df["nivel_stock"].value_counts()
+    return {
+        "total_items": len(df),
+        "items_criticos": int(criticos.sum()),
+        "cantidad_maxima": float(df["cantidad_maxima"].sum()),
+        "cantidad_emitida": float(df["cantidad_emitida"].sum()),
+        "cantidad_solicitada": float(df["cantidad_solicitada"].sum()),
+        "precio_promedio": float(df["precio_unitario"].fillna(0).mean()) if len(df) else 0.0,
+        "por_nivel": [{"nivel_stock": k, "items": int(v)} for k, v in por_nivel.items()],
+        "por_licitacion": por_lic.to_dict("records"),
+        "por_proveedor": por_prov.to_dict("records"),
+    }
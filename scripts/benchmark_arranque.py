@@ -0,0 +1,184 @@
+"""
+Benchmark de arranque en frío del frontend (tiempo de imports)
+Cada medición corre en un proceso nuevo de Python: mide lo que tarda importar los
+módulos que carga app.py antes de mostrar la primera página, y verifica que no
+arrastren librerías pesadas (plotly, st_aggrid, supabase, ETL...), que solo deben
+importarse en las páginas o funciones que las usan.
+También ejecuta app.py completo una vez (streamlit.testing AppTest): lo que la
+primera ejecución hace en el hilo de la página (ej. crear el cliente de Supabase)
+no aparece en el tiempo de imports.
+
+Uso:
+    python scripts/benchmark_arranque.py
+    python scripts/benchmark_arranque.py --repeticiones 7 --objetivo 1.5 --detalle
+
+Sale con código 1 si el arranque supera el objetivo o carga un módulo prohibido
+(sirve como control antes de publicar).
+"""
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+# Agregar raíz al path
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+# Módulos que importa app.py (el resto se importa al abrir cada página)
+MODULOS_ARRANQUE = [
+    'streamlit',
+    'frontend.utils.db_connection',
+    'frontend.utils.estado_conexion',
+]
+# Referencia: módulos de las páginas y de configuración (se informan, sin objetivo)
+MODULOS_REFERENCIA = {
+    'config': ['config.settings', 'config.database', 'config.supabase'],
+    'tablero': ['frontend.utils.tablero_service', 'frontend.utils.async_data'],
+    'grilla': ['st_aggrid'],
+}
+# No deben cargarse durante el arranque
+PROHIBIDOS_ARRANQUE = ['plotly', 'st_aggrid', 'supabase', 'postgrest', 'etl', 'sqlalchemy', 'psycopg2']
+# Objetivo de arranque en frío (segundos, mediana)
+OBJETIVO_ARRANQUE_S = 2.0
+# Primera ejecución de app.py (incluye importar streamlit y los módulos de arriba)
+APP = root_dir / 'frontend' / 'app.py'
+OBJETIVO_PRIMERA_EJECUCION_S = 3.0
+
+_MEDIR = """
+import importlib, json, sys, time
+sys.path.insert(0, {raiz!r})
+inicio = time.perf_counter()
+for nombre in {modulos!r}:
+    importlib.import_module(nombre)
+segundos = time.perf_counter() - inicio
+cargados = sorted({{m.split('.')[0] for m in sys.modules}})
+print(json.dumps({{"segundos": segundos, "cargados": cargados}}))
+"""
+
+_EJECUTAR_APP = """
+import json, sys, time
+sys.path.insert(0, {raiz!r})
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+prueba = AppTest.from_file({app!r}, default_timeout=60)
+prueba.run()
+segundos = time.perf_counter() - inicio
+print(json.dumps({{"segundos": segundos, "errores": [e.message for e in prueba.exception]}}))
+"""
+
+
+def _importar(modulos, importtime=False):
+    """Importa `modulos` en un proceso nuevo. Retorna (resultado dict, stderr) o (None, error)."""
+    comando = [sys.executable]
+    if importtime:
+        comando += ['-X', 'importtime']
+    comando += ['-c', _MEDIR.format(raiz=str(root_dir), modulos=list(modulos))]
+    proceso = subprocess.run(comando, capture_output=True, text=True, cwd=str(root_dir))
+    if proceso.returncode != 0:
+        ultima = (proceso.stderr.strip().splitlines() or ['error desconocido'])[-1]
+        return None, ultima
+    return json.loads(proceso.stdout.strip().splitlines()[-1]), proceso.stderr
+
+
+def _medir(modulos, repeticiones):
+    """Mediana (s) de `repeticiones` arranques y módulos cargados; (None, error) si falla"""
+    tiempos, cargados = [], []
+    for _ in range(repeticiones):
+        resultado, error = _importar(modulos)
+        if resultado is None:
+            return None, error
+        tiempos.append(resultado['segundos'])
+        cargados = resultado['cargados']
+    return statistics.median(tiempos), cargados
+
+
+def _primera_ejecucion(repeticiones):
+    """
+    Mediana (s) de la primera ejecución de app.py en un proceso nuevo y errores de
+    la página; (None, error) si no se pudo ejecutar.
+    """
+    tiempos, errores = [], []
+    for _ in range(repeticiones):
+        proceso = subprocess.run(
+            [sys.executable, '-c', _EJECUTAR_APP.format(raiz=str(root_dir), app=str(APP))],
+            capture_output=True, text=True, cwd=str(root_dir),
+        )
+        if proceso.returncode != 0:
+            return None, (proceso.stderr.strip().splitlines() or ['error desconocido'])[-1]
+        resultado = json.loads(proceso.stdout.strip().splitlines()[-1])
+        tiempos.append(resultado['segundos'])
+        errores = resultado['errores']
+    return statistics.median(tiempos), errores
+
+
+def _detalle_importtime(modulos, top=15):
+    """Imports más costosos (acumulado, -X importtime) de un arranque"""
+    resultado, stderr = _importar(modulos, importtime=True)
+    if resultado is None:
+        print(f"  [ERROR] {stderr}")
+        return
+    filas = []
+    for linea in stderr.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        _propio, acumulado, nombre = linea.split(':', 1)[1].split('|')
+        filas.append((int(acumulado), nombre.strip()))
+    print(f"  {'Acumulado (ms)':>15}  Módulo")
+    for acumulado, nombre in sorted(filas, reverse=True)[:top]:
+        print(f"  {acumulado / 1000:>15.1f}  {nombre}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque en frío del frontend")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--objetivo', type=float, default=OBJETIVO_ARRANQUE_S,
+                        help="Segundos máximos (mediana) para los imports de app.py")
+    parser.add_argument('--objetivo-app', type=float, default=OBJETIVO_PRIMERA_EJECUCION_S,
+                        help="Segundos máximos (mediana) para la primera ejecución de app.py")
+    parser.add_argument('--detalle', action='store_true', help="Mostrar los imports más costosos")
+    args = parser.parse_args()
+
+    print(f"{'Conjunto':<12}{'Mediana (s)':>13}  Módulos")
+    mediana, cargados = _medir(MODULOS_ARRANQUE, args.repeticiones)
+    if mediana is None:
+        print(f"[ERROR] No se pudo importar el arranque: {cargados}")
+        sys.exit(1)
+    print(f"{'arranque':<12}{mediana:>13.2f}  {', '.join(MODULOS_ARRANQUE)}")
+    for nombre, modulos in MODULOS_REFERENCIA.items():
+        tiempo, error = _medir(modulos, args.repeticiones)
+        texto = f"{tiempo:>13.2f}" if tiempo is not None else f"{'-':>13}"
+        print(f"{nombre:<12}{texto}  {', '.join(modulos)}" + ("" if tiempo is not None else f"  [{error}]"))
+
+    primera, errores_app = _primera_ejecucion(args.repeticiones)
+    if primera is None:
+        print(f"{'app.py':<12}{'-':>13}  primera ejecución  [{errores_app}]")
+    else:
+        print(f"{'app.py':<12}{primera:>13.2f}  primera ejecución (AppTest)")
+
+    if args.detalle:
+        print("\nImports más costosos del arranque:")
+        _detalle_importtime(MODULOS_ARRANQUE)
+
+    fallas = []
+    if mediana > args.objetivo:
+        fallas.append(f"arranque {mediana:.2f}s > objetivo {args.objetivo:.2f}s")
+    if primera is None:
+        fallas.append(f"no se pudo ejecutar app.py: {errores_app}")
+    elif primera > args.objetivo_app:
+        fallas.append(f"primera ejecución {primera:.2f}s > objetivo {args.objetivo_app:.2f}s")
+    if primera is not None and errores_app:
+        fallas.append(f"app.py terminó con errores: {'; '.join(errores_app)}")
+    prohibidos = [m for m in PROHIBIDOS_ARRANQUE if m in cargados]
+    if prohibidos:
+        fallas.append(f"el arranque importa {', '.join(prohibidos)}")
+    if fallas:
+        print(f"\n[FALLA] {'; '.join(fallas)}")
+        sys.exit(1)
+    print(f"\n[OK] Arranque dentro del objetivo ({args.objetivo:.2f}s), primera ejecución "
+          f"dentro de {args.objetivo_app:.2f}s y sin módulos pesados")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark de descarga paginada desde Supabase (API REST)
+Compara fetch_all_data secuencial (1 página a la vez) contra páginas en paralelo.
+
+Uso:
+    python scripts/benchmark_fetch.py
+    python scripts/benchmark_fetch.py ejecucion ordenes --repeticiones 5 --workers 4
+
+Credenciales: SUPABASE_URL y SUPABASE_KEY del .env (o .streamlit/secrets.toml).
+
+Resultados de referencia (no es Supabase: endpoint local compatible con
+PostgREST sobre PostgreSQL 16, datos sintéticos, 1 CPU compartida entre
+servidor y cliente; mediana de 3 corridas, 6 workers):
+
+    Tabla            Filas   RTT 0 ms (sec / par)   RTT 80 ms (sec / par)
+    ejecucion       60.000   4.33 / 4.37  (1.0x)    9.33 / 5.12  (1.8x)
+    ordenes         40.000   2.95 / 2.65  (1.1x)    6.81 / 2.97  (2.3x)
+    stock_critico    8.000   0.41 / 0.32  (1.3x)    1.18 / 0.60  (2.0x)
+    pedidos         15.000   0.86 / 0.82  (1.1x)    2.33 / 1.05  (2.2x)
+
+La mejora viene de solapar la latencia de red entre páginas: sin latencia el
+costo es CPU (armar y parsear JSON) y el paralelo no gana. Contra Supabase la
+mejora depende de la latencia real; medir con este script antes de ajustar
+FETCH_MAX_WORKERS.
+"""
+import sys
+import os
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+# Agregar raíz al path
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from dotenv import load_dotenv
+from supabase import create_client
+
+from frontend.utils.db_connection import fetch_all_data, FETCH_MAX_WORKERS
+
+TABLAS_DEFECTO = ['ejecucion', 'ordenes', 'stock_critico', 'pedidos']
+
+
+def _credenciales():
+    """URL y key de Supabase desde .env o .streamlit/secrets.toml"""
+    load_dotenv(root_dir / '.env')
+    url, key = os.getenv('SUPABASE_URL', ''), os.getenv('SUPABASE_KEY', '')
+    secrets = root_dir / '.streamlit' / 'secrets.toml'
+    if (not url or not key) and secrets.exists():
+        import tomllib
+        with open(secrets, 'rb') as f:
+            data = tomllib.load(f)
+        url = url or data.get('SUPABASE_URL', '')
+        key = key or data.get('SUPABASE_KEY', '')
+    return url, key
+
+
+def _medir(client, tabla, workers, repeticiones):
+    """Tiempos (s) y filas de `repeticiones` descargas completas de `tabla`"""
+    tiempos, filas = [], 0
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        filas = len(fetch_all_data(tabla, client, max_workers=workers))
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos, filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de fetch_all_data secuencial vs paralelo")
+    parser.add_argument('tablas', nargs='*', default=TABLAS_DEFECTO)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=FETCH_MAX_WORKERS)
+    args = parser.parse_args()
+
+    url, key = _credenciales()
+    if not url or not key:
+        print("[ERROR] Faltan SUPABASE_URL / SUPABASE_KEY")
+        sys.exit(1)
+    client = create_client(url, key)
+
+    print(f"{'Tabla':<18}{'Filas':>9}{'Secuencial (s)':>16}{f'Paralelo x{args.workers} (s)':>20}{'Mejora':>9}")
+    for tabla in args.tablas:
+        # Calentar conexión / caché del servidor antes de medir
+        fetch_all_data(tabla, client, max_workers=args.workers)
+        seq, filas = _medir(client, tabla, 1, args.repeticiones)
+        par, filas_par = _medir(client, tabla, args.workers, args.repeticiones)
+        if filas != filas_par:
+            print(f"[AVISO] {tabla}: filas distintas (secuencial={filas}, paralelo={filas_par})")
+        seq_med, par_med = statistics.median(seq), statistics.median(par)
+        mejora = seq_med / par_med if par_med > 0 else 0
+        print(f"{tabla:<18}{filas:>9,}{seq_med:>16.2f}{par_med:>20.2f}{mejora:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()